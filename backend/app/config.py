@@ -5,15 +5,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-# support both names in case .env uses GEMINI_API_KEY
+# support both names in case .env uses GEMINI_API_KEY;
+# without a key the app still starts and LLMClient runs in mock mode
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
 
 
-if not GOOGLE_API_KEY:
-    raise Exception("GOOGLE_API_KEY is missing! Check .env file (or GEMINI_API_KEY).")
+# which LLMProvider backend serves model calls (see app/llm_provider.py)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
 
 
 # model selection: use a model that works for your account
-# leave defaults — if you change model, update MODEL_NAME and API_VERSION
-MODEL_NAME = "models/gemini-2.5-flash"
-API_VERSION = "v1"
\ No newline at end of file
+# MODEL_NAME is also part of every LLM cache key, so changing it starts a fresh cache
+MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+API_VERSION = os.getenv("GEMINI_API_VERSION", "v1beta")
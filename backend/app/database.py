@@ -1,12 +1,127 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 import os
 
 
 DATABASE_URL = os.getenv("DATABASE_URL") or "sqlite:///./app.db"
 
+# sync URL scheme -> async driver used by the async engine
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {})
+
+def async_database_url(url: str):
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+# Set ASYNC_DATABASE_URL to pick a different async driver than the default one
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+
+# ----------------------------
+# SQLITE PROFILE
+# ----------------------------
+# Applied to every new SQLite connection. WAL lets readers run while one
+# writer commits, and NORMAL sync is durable in WAL mode except against
+# power loss. foreign_keys makes SQLite enforce REFERENCES clauses, which
+# deletes rely on: a project's sections, revisions, comments and jobs are
+# removed by ON DELETE CASCADE. Set a value to an empty string to leave
+# SQLite's default.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")
+SQLITE_MMAP_SIZE = os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))
+SQLITE_CACHE_SIZE = os.getenv("SQLITE_CACHE_SIZE", "-65536")  # negative = KiB, i.e. 64 MB
+SQLITE_FOREIGN_KEYS = os.getenv("SQLITE_FOREIGN_KEYS", "ON")
+
+# ----------------------------
+# CONNECTION POOL
+# ----------------------------
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))    # seconds to wait for a free connection
+
+
+def is_sqlite(url: str):
+    return url.startswith("sqlite")
+
+
+def is_memory_sqlite(url: str):
+    return is_sqlite(url) and (":memory:" in url or url.rstrip("/").endswith(":"))
+
+
+def engine_options(url: str):
+    """create_engine() keyword arguments for this database URL."""
+    if is_memory_sqlite(url):
+        # every connection to :memory: is a new, empty database, so the
+        # engine keeps exactly one and shares it across threads
+        return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+    if is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        # drop connections the server closed while they sat in the pool
+        options["pool_pre_ping"] = True
+    return options
+
+
+def sqlite_pragmas():
+    pragmas = [
+        ("journal_mode", SQLITE_JOURNAL_MODE),
+        ("synchronous", SQLITE_SYNCHRONOUS),
+        ("busy_timeout", SQLITE_BUSY_TIMEOUT_MS),
+        ("mmap_size", SQLITE_MMAP_SIZE),
+        ("cache_size", SQLITE_CACHE_SIZE),
+        ("foreign_keys", SQLITE_FOREIGN_KEYS),
+    ]
+    return [(name, value) for name, value in pragmas if value]
+
+
+def apply_sqlite_profile(sync_engine):
+    """Run the profile pragmas on each new connection of a SQLite engine."""
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+# The app opens the database from two engines (sync and async), and two
+# engines can't share an in-memory SQLite database
+for url in (DATABASE_URL, ASYNC_DATABASE_URL):
+    if is_memory_sqlite(url):
+        raise ValueError(f"in-memory SQLite ({url}) is not supported; point DATABASE_URL at a file")
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+
+# Async routes use this pair; objects stay readable after commit so they can
+# be returned without another (implicit, and in async mode illegal) load.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if is_sqlite(DATABASE_URL):
+    apply_sqlite_profile(engine)
+if is_sqlite(ASYNC_DATABASE_URL):
+    apply_sqlite_profile(async_engine.sync_engine)
+
+Base = declarative_base()
@@ -0,0 +1,149 @@
+# app/llm_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# ----------------------------
+# CACHE CONFIG
+# ----------------------------
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))      # in-memory entries, 0 disables
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))    # seconds
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB")                      # optional sqlite file for a persistent tier
+
+
+def normalize(text: str) -> str:
+    """Collapse whitespace inside each line so cosmetic differences share a cache entry."""
+    text = unicodedata.normalize("NFC", text or "")
+    return "\n".join(" ".join(line.split()) for line in text.strip().splitlines())
+
+
+def make_key(model: str, kind: str, *inputs: str) -> str:
+    payload = json.dumps([model, kind, *[normalize(i) for i in inputs]], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier response cache for LLM calls: an LRU/TTL dict in memory and an
+    optional SQLite table that survives restarts. Concurrent lookups for the
+    same key are coalesced so only one of them reaches the upstream model.
+    """
+
+    def __init__(self, max_entries: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL, db_path: str = LLM_CACHE_DB,
+                 clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._memory = OrderedDict()   # key -> (stored_at, value)
+        self._inflight = {}            # key -> Future
+        self._lock = threading.Lock()
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._db_lock = threading.Lock()
+
+    # ----------------------------- TIERS ----------------------------------
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl > 0 and self.clock() - stored_at > self.ttl
+
+    def _remember(self, key: str, value: str, stored_at: float):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = (stored_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit:
+                if not self._expired(hit[0]):
+                    self._memory.move_to_end(key)
+                    return hit[1]
+                del self._memory[key]
+
+        if self._db is None:
+            return None
+
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, stored_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if not row or self._expired(row[1]):
+            return None
+
+        self._remember(key, row[0], row[1])
+        return row[0]
+
+    def set(self, key: str, value: str):
+        now = self.clock()
+        self._remember(key, value, now)
+
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, value, now)
+                )
+                self._db.commit()
+
+    # ----------------------------- LOOKUP ---------------------------------
+
+    def get_or_compute(self, key: str, compute, fresh: bool = False) -> str:
+        """
+        Return the cached value for key, or run compute() once and cache its
+        result. Callers asking for the same key while compute() is running
+        wait for that call instead of issuing their own. fresh=True skips
+        the lookup (but still stores the new result).
+        """
+        if fresh:
+            value = compute()
+            if value:
+                self.set(key, value)
+            return value
+
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = self._inflight[key] = Future()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            return pending.result()
+
+        try:
+            # another leader may have finished between our miss and taking the slot
+            value = self.get(key)
+            if value is None:
+                value = compute()
+                if value:
+                    self.set(key, value)
+            pending.set_result(value)
+            return value
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
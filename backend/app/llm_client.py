@@ -1,52 +1,398 @@
+import asyncio
+import functools
+import json
+import logging
 import os
-from google.genai import Client
+from concurrent.futures import ThreadPoolExecutor
+from app.config import MODEL_NAME
+from app.llm_cache import LLMCache, make_key, normalize
+from app.llm_provider import get_provider
+from app.llm_resilience import guard
+from app.llm_scheduler import BULK, INTERACTIVE, scheduler
+from app.utils.text_chunks import join_chunks, split_chunks
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on simultaneous Gemini calls made for a single request
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# Threads that async routes park blocking LLM calls on while they wait
+LLM_WAIT_THREADS = int(os.getenv("LLM_WAIT_THREADS", "64"))
+_wait_pool = ThreadPoolExecutor(max_workers=LLM_WAIT_THREADS, thread_name_prefix="llm-wait")
+
+# Most sections generate_all() asks for in one structured request
+LLM_BATCH_SECTIONS = int(os.getenv("LLM_BATCH_SECTIONS", "12"))
+
+# refine_chunked(): target chunk size
+LLM_REFINE_CHUNK_TOKENS = int(os.getenv("LLM_REFINE_CHUNK_TOKENS", "800"))
+# routes refine in chunks by default once a section is longer than this
+LLM_REFINE_CHUNKED_ABOVE = int(os.getenv("LLM_REFINE_CHUNKED_ABOVE", "3000"))
+
+# where a chunk sits in its section. Together with the document topic and
+# section title this is all the context a chunk prompt carries; none of it
+# depends on the other chunks, so an unchanged chunk keeps its cache entry
+# when other chunks are edited.
+CHUNK_ROLES = {
+    "first": "the opening part of a longer text",
+    "middle": "a part from the middle of a longer text",
+    "last": "the closing part of a longer text",
+}
+
+# what a chunk prompt asks the model to answer when the chunk needs no change
+UNCHANGED = "UNCHANGED"
+
+# Response schema for generate_all(): one entry per requested section
+SECTIONS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "sections": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "number": {"type": "INTEGER"},
+                    "content": {"type": "STRING"},
+                },
+                "required": ["number", "content"],
+            },
+        },
+    },
+    "required": ["sections"],
+}
+
+
+async def run_llm(fn, *args, **kwargs):
+    """
+    Await a blocking LLMClient call from async code. The wait happens on a
+    dedicated pool, so it neither blocks the event loop nor takes one of
+    Starlette's threadpool slots.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_wait_pool, functools.partial(fn, *args, **kwargs))
+
+
+def fan_out(fn, items, max_concurrency: int = None):
+    """
+    Call fn(item) for every item on a bounded thread pool and return the
+    results in input order. An exception raised for one item is returned in
+    its slot instead of aborting the others.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def safe_call(item):
+        try:
+            return fn(item)
+        except Exception as e:
+            return e
+
+    workers = max(1, min(max_concurrency or LLM_MAX_CONCURRENCY, len(items)))
+    if workers == 1:
+        return [safe_call(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(safe_call, items))
+
 
 class LLMClient:
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
+    def __init__(self, provider=None):
+        self.provider = provider or get_provider()
 
-        if not api_key:
+        if not self.provider.configured:
             print("[LLM WARNING] No GEMINI_API_KEY found; using mock mode.")
             self.mock = True
             return
 
         self.mock = False
-        self.client = Client(api_key=api_key)
+        self.cache = LLMCache()
+        self.scheduler = scheduler
+        self.guard = guard
 
-    def generate(self, main_topic: str, section_title: str):
-        if self.mock:
-            return "[Mock] Missing API key."
+    # Every upstream request goes through the guard: the circuit breaker is
+    # checked first, then the call waits for the scheduler (cache hits never
+    # do), then the deadline and hedging apply and failures become LLMError.
+    # Refines are interactive, generation is bulk.
 
-        prompt = (
+    def _guarded(self, kind: str, lane: str, user_id, request):
+        return self.guard.call(
+            kind,
+            request,
+            may_hedge=lambda: self.scheduler.try_acquire(user_id, lane),
+            before=lambda: self.scheduler.acquire(user_id, lane)
+        )
+
+    def _call(self, prompt: str, kind: str, lane: str, user_id=None):
+        return self._guarded(kind, lane, user_id, lambda: self.provider.generate(prompt, model=MODEL_NAME))
+
+    def _call_json(self, prompt: str, schema: dict, lane: str, user_id=None):
+        return self._guarded(
+            "generate_all", lane, user_id, lambda: self.provider.generate(prompt, schema=schema, model=MODEL_NAME)
+        )
+
+    def _stream(self, key: str, prompt: str, fresh: bool, lane: str, user_id=None):
+        """Yield text chunks as the model emits them; the joined text is cached at the end."""
+        if not fresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        parts = []
+        chunks = self.provider.stream(prompt, model=MODEL_NAME)
+        for text in self.guard.stream(chunks, before=lambda: self.scheduler.acquire(user_id, lane)):
+            parts.append(text)
+            yield text
+
+        text = "".join(parts)
+        if text:
+            self.cache.set(key, text)
+
+    # ----------------------------- PROMPTS --------------------------------
+
+    @staticmethod
+    def _generate_prompt(main_topic: str, section_title: str):
+        return (
             f"Write a detailed, well-structured section titled '{section_title}' "
             f"for a business document on '{main_topic}'. Ensure clarity, depth "
             f"and professional tone."
         )
 
-        try:
-            result = self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt
-            )
-            return result.text
-        except Exception as e:
-            return f"[LLM ERROR] {str(e)}"
+    @staticmethod
+    def _generate_all_prompt(main_topic: str, outline, section_titles):
+        numbered = lambda titles: "\n".join(f"{n}. {t}" for n, t in enumerate(titles, start=1))
+        return (
+            f"You are writing a business document on '{main_topic}'.\n\n"
+            f"Outline of the whole document:\n{numbered(outline)}\n\n"
+            f"Write these sections, numbered as listed:\n{numbered(section_titles)}\n\n"
+            f"Make each section detailed, well-structured and professional. Keep to "
+            f"the subject of its title and do not repeat what other sections of the "
+            f"outline cover. Return one entry per section with its number and its "
+            f"content, without the section title."
+        )
 
-    def refine(self, original_text: str, instruction: str):
-        if self.mock:
-            return f"{original_text}\n\n[Mock refine: {instruction}]"
+    @staticmethod
+    def _parse_sections(text: str, count: int):
+        """
+        {position: content} for the well-formed entries of a generate_all
+        response; positions that are missing, duplicated or empty are left out.
+        """
+        data = json.loads(text)
+        entries = data.get("sections") if isinstance(data, dict) else None
+        if not isinstance(entries, list):
+            raise ValueError("response has no sections list")
+
+        parsed = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            number, content = entry.get("number"), entry.get("content")
+            if not isinstance(number, int) or not 1 <= number <= count or number - 1 in parsed:
+                continue
+            if isinstance(content, str) and content.strip():
+                parsed[number - 1] = content.strip()
+        return parsed
 
-        prompt = (
+    @staticmethod
+    def _refine_prompt(original_text: str, instruction: str):
+        return (
             f"Refine the following text according to this instruction:\n"
             f"{instruction}\n\n"
             f"Text:\n{original_text}"
         )
 
-        try:
-            result = self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt
+    @staticmethod
+    def _chunk_header(main_topic: str, section_title: str):
+        """Context shared by every chunk of one refine; it never includes the text itself."""
+        lines = []
+        if main_topic:
+            lines.append(f"Document topic: {main_topic}")
+        if section_title:
+            lines.append(f"Section: {section_title}")
+        return "".join(line + "\n" for line in lines)
+
+    @staticmethod
+    def _refine_chunk_prompt(chunk: str, instruction: str, role: str, header: str):
+        return (
+            f"You are refining {CHUNK_ROLES[role]}, one part at a time.\n"
+            f"{header}"
+            f"Instruction for the whole text:\n{instruction}\n\n"
+            f"Apply the instruction to this part only as far as it concerns it, and "
+            f"keep its paragraph breaks. Reply with the revised part and nothing "
+            f"else. If this part needs no change, reply with exactly {UNCHANGED}.\n\n"
+            f"Part:\n{chunk}"
+        )
+
+    @staticmethod
+    def _chunk_role(position: int, count: int):
+        if position == 1:
+            return "first"
+        return "last" if position == count else "middle"
+
+    # ----------------------------- GENERATE -------------------------------
+
+    def generate(self, main_topic: str, section_title: str, fresh: bool = False, user_id=None):
+        """Text for one section. Raises an LLMError subclass if the model can't provide it."""
+        if self.mock:
+            return "[Mock] Missing API key."
+
+        prompt = self._generate_prompt(main_topic, section_title)
+        key = make_key(MODEL_NAME, "generate", main_topic, section_title)
+        return self.cache.get_or_compute(key, lambda: self._call(prompt, "generate", BULK, user_id), fresh=fresh)
+
+    def generate_many(self, main_topic: str, section_titles, max_concurrency: int = None, fresh: bool = False,
+                      user_id=None):
+        """
+        Generate several sections of the same document concurrently.
+        Results come back in the order of section_titles; a failed call
+        shows up as the exception it raised.
+        """
+        return fan_out(
+            lambda title: self.generate(main_topic, title, fresh=fresh, user_id=user_id),
+            section_titles,
+            max_concurrency
+        )
+
+    def generate_all(self, main_topic: str, section_titles, max_concurrency: int = None, fresh: bool = False,
+                     user_id=None):
+        """
+        Generate the sections of one document with a single structured
+        request per LLM_BATCH_SECTIONS sections instead of one per section,
+        so the model sees the whole outline and keeps sections distinct.
+
+        Cached sections are not asked for again, and each parsed section is
+        cached like a generate() result. Sections missing from the response
+        or failing validation fall back to generate(). A batch whose call
+        failed (timeout, open breaker, queue timeout, ...) does not: its
+        sections get that LLMError, since retrying them one by one would
+        only multiply the load on a struggling upstream. Same return shape
+        as generate_many().
+        """
+        titles = list(section_titles)
+        if self.mock:
+            return ["[Mock] Missing API key." for _ in titles]
+
+        keys = [make_key(MODEL_NAME, "generate", main_topic, title) for title in titles]
+        results = [None] * len(titles)
+        if not fresh:
+            results = [self.cache.get(key) for key in keys]
+
+        todo = [i for i, result in enumerate(results) if result is None]
+        batches = [todo[i:i + LLM_BATCH_SECTIONS] for i in range(0, len(todo), LLM_BATCH_SECTIONS)]
+
+        def run_batch(batch):
+            prompt = self._generate_all_prompt(main_topic, titles, [titles[i] for i in batch])
+            return self._parse_sections(self._call_json(prompt, SECTIONS_SCHEMA, BULK, user_id), len(batch))
+
+        for batch, parsed in zip(batches, fan_out(run_batch, batches, max_concurrency)):
+            if isinstance(parsed, ValueError):
+                # includes json.JSONDecodeError
+                logger.warning("batched generation returned an unusable response, falling back to single calls: %s",
+                               parsed)
+                continue
+            if isinstance(parsed, Exception):
+                for i in batch:
+                    results[i] = parsed
+                continue
+            for position, i in enumerate(batch):
+                if position in parsed:
+                    results[i] = parsed[position]
+                    self.cache.set(keys[i], parsed[position])
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            if len(missing) < len(todo):
+                logger.info("batched generation left %d of %d sections for single calls", len(missing), len(todo))
+            retried = self.generate_many(
+                main_topic, [titles[i] for i in missing], max_concurrency, fresh=fresh, user_id=user_id
             )
-            return result.text
-        except Exception as e:
-            return f"[LLM ERROR] {str(e)}"
+            for i, result in zip(missing, retried):
+                results[i] = result
+
+        return results
+
+    def generate_stream(self, main_topic: str, section_title: str, fresh: bool = False, user_id=None):
+        """Streaming variant of generate(). Upstream errors are raised, not yielded."""
+        if self.mock:
+            yield "[Mock] Missing API key."
+            return
+
+        prompt = self._generate_prompt(main_topic, section_title)
+        key = make_key(MODEL_NAME, "generate", main_topic, section_title)
+        yield from self._stream(key, prompt, fresh, BULK, user_id)
+
+    def complete(self, prompt: str, kind: str = "complete", lane: str = BULK, fresh: bool = False, user_id=None):
+        """The model's answer to a free-form prompt, through the same cache, scheduler and guard."""
+        if self.mock:
+            return "[Mock] Missing API key."
+
+        key = make_key(MODEL_NAME, kind, prompt)
+        return self.cache.get_or_compute(key, lambda: self._call(prompt, kind, lane, user_id), fresh=fresh)
+
+    # ----------------------------- REFINE ---------------------------------
+
+    def refine(self, original_text: str, instruction: str, fresh: bool = False, user_id=None):
+        """Refined text. Raises an LLMError subclass if the model can't provide it."""
+        if self.mock:
+            return f"{original_text}\n\n[Mock refine: {instruction}]"
+
+        prompt = self._refine_prompt(original_text, instruction)
+        key = make_key(MODEL_NAME, "refine", original_text, instruction)
+        return self.cache.get_or_compute(key, lambda: self._call(prompt, "refine", INTERACTIVE, user_id), fresh=fresh)
+
+    def refine_chunked(self, original_text: str, instruction: str, fresh: bool = False, user_id=None,
+                       max_concurrency: int = None, chunk_tokens: int = None,
+                       main_topic: str = None, section_title: str = None):
+        """
+        Refine long text piece by piece: split it at paragraph boundaries into
+        chunks of about chunk_tokens, refine the chunks concurrently (each
+        prompt carries the instruction, the document topic and section title,
+        and whether the chunk opens, continues or closes the text) and join
+        the results with the original separators.
+
+        A chunk the model answers UNCHANGED, or returns as is, keeps its
+        original text exactly, and each chunk's answer is cached, so refining
+        again with the same instruction only calls the model for chunks whose
+        text changed. If any chunk fails, its LLMError is raised and nothing
+        is returned. Text that fits in one chunk goes through refine().
+        """
+        chunks, separators = split_chunks(original_text or "", chunk_tokens or LLM_REFINE_CHUNK_TOKENS)
+        if len(chunks) == 1:
+            return self.refine(original_text, instruction, fresh=fresh, user_id=user_id)
+        if self.mock:
+            return f"{original_text}\n\n[Mock refine: {instruction}]"
+
+        header = self._chunk_header(main_topic, section_title)
+
+        def refine_chunk(indexed):
+            position, chunk = indexed
+            if not chunk.strip():
+                return chunk
+            role = self._chunk_role(position, len(chunks))
+            prompt = self._refine_chunk_prompt(chunk, instruction, role, header)
+            key = make_key(MODEL_NAME, "refine_chunk", chunk, instruction, role, header)
+            answer = self.cache.get_or_compute(
+                key, lambda: self._call(prompt, "refine_chunk", INTERACTIVE, user_id), fresh=fresh
+            ).strip()
+            if answer.strip("\"'. ").upper() == UNCHANGED or normalize(answer) == normalize(chunk):
+                return chunk
+            # keep the chunk's own leading/trailing whitespace
+            lead = chunk[:len(chunk) - len(chunk.lstrip())]
+            trail = chunk[len(chunk.rstrip()):]
+            return lead + answer + trail
+
+        results = fan_out(refine_chunk, enumerate(chunks, start=1), max_concurrency)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return join_chunks(results, separators)
+
+    def refine_stream(self, original_text: str, instruction: str, fresh: bool = False, user_id=None):
+        """Streaming variant of refine(). Upstream errors are raised, not yielded."""
+        if self.mock:
+            yield f"{original_text}\n\n[Mock refine: {instruction}]"
+            return
+
+        prompt = self._refine_prompt(original_text, instruction)
+        key = make_key(MODEL_NAME, "refine", original_text, instruction)
+        yield from self._stream(key, prompt, fresh, INTERACTIVE, user_id)
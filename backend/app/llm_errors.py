@@ -0,0 +1,41 @@
+# app/llm_errors.py
+"""
+Errors raised by LLMClient. Each carries the HTTP status a route should
+answer with; main.py turns any that escape a route into that response.
+"""
+
+
+class LLMError(Exception):
+    status_code = 502
+    retry_after = None  # seconds, sent as Retry-After when known
+
+
+class LLMUpstreamError(LLMError):
+    """The model API returned an error or an unusable response."""
+
+
+class LLMTimeout(LLMError):
+    """No response arrived before the call's deadline."""
+    status_code = 504
+
+
+class LLMUnavailable(LLMError):
+    """
+    The model can't serve the call right now: the upstream answered with a
+    5xx, or the circuit breaker is open (recent calls mostly failed) and
+    this one wasn't tried.
+    """
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMRateLimited(LLMUnavailable):
+    """The upstream refused the call with 429: the model API's quota or rate limit was hit."""
+
+
+class LLMQueueTimeout(LLMError):
+    """The call waited longer than LLM_QUEUE_TIMEOUT for an upstream slot."""
+    status_code = 503
@@ -0,0 +1,225 @@
+# app/llm_provider.py
+"""
+Model backends behind one interface.
+
+LLMClient sends every request through the provider chosen by LLM_PROVIDER
+(services/ai_service.py goes through LLMClient too). Providers are blocking;
+async code awaits them with llm_client.run_llm(), so every call passes the
+same cache, scheduler and circuit breaker. They speak plain HTTP over the
+shared pooled client below, so connections (and TLS sessions) are reused
+across calls instead of being opened per request. HTTP/2 is used when the
+`h2` package is installed.
+"""
+import asyncio
+import importlib.util
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+
+import httpx
+
+from app.config import API_VERSION, GOOGLE_API_KEY, LLM_PROVIDER, MODEL_NAME
+from app.llm_errors import LLMRateLimited, LLMUnavailable, LLMUpstreamError
+from app.llm_resilience import LLM_TIMEOUT
+
+# ----------------------------
+# HTTP CONFIG
+# ----------------------------
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "64"))
+LLM_HTTP_KEEPALIVE = int(os.getenv("LLM_HTTP_KEEPALIVE", "32"))               # idle connections kept open
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))  # seconds an idle one is kept
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "1") not in ("0", "false", "")
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class ProviderError(LLMUpstreamError):
+    """
+    Error response from the model API that isn't a rate limit or a server
+    error (those raise LLMRateLimited / LLMUnavailable); `code` is its HTTP
+    status, and a 4xx here means the request itself was rejected.
+    """
+
+    def __init__(self, message: str, code: int = None):
+        super().__init__(message)
+        self.code = code
+
+
+# ----------------------------- SHARED HTTP CLIENT -----------------------------
+
+_http_lock = threading.Lock()
+_sync_client = None
+
+
+def _client_options():
+    return {
+        "http2": LLM_HTTP2 and HTTP2_AVAILABLE,
+        "limits": httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_KEEPALIVE,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(LLM_TIMEOUT, connect=10.0),
+    }
+
+
+def http_client() -> httpx.Client:
+    """The process-wide client for blocking callers."""
+    global _sync_client
+    with _http_lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(**_client_options())
+        return _sync_client
+
+
+async def close_http_client():
+    global _sync_client
+    with _http_lock:
+        sync_client, _sync_client = _sync_client, None
+    if sync_client is not None:
+        await asyncio.to_thread(sync_client.close)
+
+
+def _retry_after(headers):
+    """Seconds from a Retry-After header, if it holds a number."""
+    try:
+        return float((headers or {}).get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# ----------------------------- INTERFACE --------------------------------------
+
+class LLMProvider(ABC):
+    """
+    A model backend. Subclasses implement the request building and parsing;
+    every method takes a plain prompt and returns plain text.
+    """
+
+    name = None
+
+    @property
+    @abstractmethod
+    def configured(self) -> bool:
+        """False when credentials are missing; LLMClient then runs in mock mode."""
+
+    @abstractmethod
+    def generate(self, prompt: str, schema: dict = None, model: str = None) -> str:
+        """Blocking call. With a schema the reply is JSON matching it."""
+
+    @abstractmethod
+    def stream(self, prompt: str, model: str = None):
+        """Blocking iterator over text chunks as the model produces them."""
+
+
+# ----------------------------- GEMINI -----------------------------------------
+
+class GeminiProvider(LLMProvider):
+    """Gemini over its REST API (generateContent / streamGenerateContent)."""
+
+    name = "gemini"
+    base_url = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com")
+
+    def __init__(self, api_key: str = GOOGLE_API_KEY, model: str = MODEL_NAME, api_version: str = API_VERSION):
+        self.api_key = api_key
+        self.model = model
+        self.api_version = api_version
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _url(self, model: str, method: str) -> str:
+        model = (model or self.model).removeprefix("models/")
+        return f"{self.base_url}/{self.api_version}/models/{model}:{method}"
+
+    def _headers(self):
+        return {"x-goog-api-key": self.api_key}
+
+    @staticmethod
+    def _body(prompt: str, schema: dict = None):
+        body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if schema is not None:
+            body["generationConfig"] = {"responseMimeType": "application/json", "responseSchema": schema}
+        return body
+
+    @staticmethod
+    def _check(status: int, content: bytes, headers=None):
+        if status < 400:
+            return
+        try:
+            message = json.loads(content)["error"]["message"]
+        except (ValueError, KeyError, TypeError):
+            message = content[:500].decode("utf-8", "replace")
+        message = f"Gemini API error {status}: {message}"
+        if status == 429:
+            raise LLMRateLimited(message, retry_after=_retry_after(headers))
+        if status >= 500:
+            raise LLMUnavailable(message, retry_after=_retry_after(headers))
+        raise ProviderError(message, code=status)
+
+    @staticmethod
+    def _text(data: dict, partial: bool = False) -> str:
+        """Joined text parts of the first candidate, leaving out thought summaries."""
+        candidates = data.get("candidates") or []
+        if not candidates:
+            if partial:
+                return ""
+            reason = (data.get("promptFeedback") or {}).get("blockReason")
+            raise ProviderError(f"Gemini returned no candidates (block reason: {reason})" if reason
+                                else "Gemini returned no candidates")
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        return "".join(p.get("text", "") for p in parts if not p.get("thought"))
+
+    @staticmethod
+    def _sse_data(line: str):
+        if line.startswith("data:"):
+            return json.loads(line[5:])
+        return None
+
+    def generate(self, prompt: str, schema: dict = None, model: str = None) -> str:
+        resp = http_client().post(
+            self._url(model, "generateContent"), headers=self._headers(), json=self._body(prompt, schema)
+        )
+        self._check(resp.status_code, resp.content, resp.headers)
+        return self._text(resp.json())
+
+    def stream(self, prompt: str, model: str = None):
+        with http_client().stream(
+            "POST", self._url(model, "streamGenerateContent"),
+            params={"alt": "sse"}, headers=self._headers(), json=self._body(prompt)
+        ) as resp:
+            if resp.status_code >= 400:
+                self._check(resp.status_code, resp.read(), resp.headers)
+            for line in resp.iter_lines():
+                data = self._sse_data(line)
+                if data is not None:
+                    text = self._text(data, partial=True)
+                    if text:
+                        yield text
+
+
+# ----------------------------- REGISTRY ---------------------------------------
+
+PROVIDERS = {
+    GeminiProvider.name: GeminiProvider,
+}
+
+_providers = {}
+
+
+def register_provider(cls):
+    """Make an LLMProvider subclass selectable through LLM_PROVIDER=<cls.name>."""
+    PROVIDERS[cls.name] = cls
+    return cls
+
+
+def get_provider(name: str = LLM_PROVIDER) -> LLMProvider:
+    """The shared instance of the named provider."""
+    if name not in PROVIDERS:
+        raise ValueError(f"unknown LLM_PROVIDER {name!r}; choose from {', '.join(sorted(PROVIDERS))}")
+    with _http_lock:
+        if name not in _providers:
+            _providers[name] = PROVIDERS[name]()
+        return _providers[name]
@@ -0,0 +1,313 @@
+# app/llm_resilience.py
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from app.llm_errors import LLMError, LLMTimeout, LLMUnavailable, LLMUpstreamError
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# RESILIENCE CONFIG
+# ----------------------------
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))                 # hard cap on one call, seconds
+LLM_MIN_TIMEOUT = float(os.getenv("LLM_MIN_TIMEOUT", "15"))          # adaptive deadlines never go below this
+LLM_TIMEOUT_FACTOR = float(os.getenv("LLM_TIMEOUT_FACTOR", "3"))     # deadline = p99 latency * factor
+LLM_HEDGE = os.getenv("LLM_HEDGE", "1") not in ("0", "false", "")    # duplicate calls slower than p95
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))      # recent calls the breaker looks at
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))  # seconds open before a trial call
+LLM_BREAKER_TRIAL_TIMEOUT = float(os.getenv("LLM_BREAKER_TRIAL_TIMEOUT", str(LLM_TIMEOUT)))  # seconds
+LLM_UPSTREAM_THREADS = int(os.getenv("LLM_UPSTREAM_THREADS", "32"))
+
+# latencies kept per kind of call; below MIN_SAMPLES the fixed limits apply
+LATENCY_SAMPLES = 200
+MIN_SAMPLES = 20
+
+
+def is_client_error(e: Exception) -> bool:
+    """A 4xx other than 429: the request was bad, the upstream is fine."""
+    code = getattr(e, "code", None)
+    return isinstance(code, int) and 400 <= code < 500 and code != 429
+
+
+class LatencyTracker:
+    """Recent successful call latencies for one kind of call (generate, refine, ...)."""
+
+    def __init__(self, size: int = LATENCY_SAMPLES):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float):
+        """None until there are enough samples to trust."""
+        with self._lock:
+            if len(self._samples) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def deadline(self):
+        p99 = self.percentile(0.99)
+        if p99 is None:
+            return LLM_TIMEOUT
+        return min(LLM_TIMEOUT, max(LLM_MIN_TIMEOUT, p99 * LLM_TIMEOUT_FACTOR))
+
+    def stats(self):
+        p50, p95 = self.percentile(0.50), self.percentile(0.95)
+        with self._lock:
+            count = len(self._samples)
+        return {
+            "samples": count,
+            "p50": round(p50, 3) if p50 is not None else None,
+            "p95": round(p95, 3) if p95 is not None else None,
+            "deadline": round(self.deadline(), 3),
+        }
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through and outcomes are recorded. Once at least half
+    the window has been seen and the failure rate reaches failure_rate, the
+    breaker opens and calls fail immediately for `cooldown` seconds. After
+    that a single trial call is let through (half-open); only its outcome
+    closes or re-opens the breaker. A trial that reports nothing within
+    trial_timeout seconds is given up and the next call becomes the trial.
+    `clock` defaults to time.monotonic.
+    """
+
+    def __init__(self, window: int = LLM_BREAKER_WINDOW, failure_rate: float = LLM_BREAKER_FAILURE_RATE,
+                 cooldown: float = LLM_BREAKER_COOLDOWN, trial_timeout: float = LLM_BREAKER_TRIAL_TIMEOUT,
+                 clock=time.monotonic):
+        self.clock = clock
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self.trial_timeout = trial_timeout
+        self.min_calls = max(1, window // 2)
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = None
+        self._trial = None              # token of the running half-open trial
+        self._trial_started_at = None
+        self._tokens = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if self.clock() - self._opened_at < self.cooldown:
+            return "open"
+        return "half-open"
+
+    def before_call(self):
+        """
+        Raise LLMUnavailable if the call should not be attempted. Returns a
+        trial token when this call is the half-open trial, else None; pass it
+        on to record() or release().
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return None
+            now = self.clock()
+            if state == "half-open":
+                if self._trial is not None and now - self._trial_started_at > self.trial_timeout:
+                    logger.warning("LLM circuit breaker trial got no answer in %gs; starting another", self.trial_timeout)
+                    self._trial = None
+                if self._trial is None:
+                    self._trial = next(self._tokens)
+                    self._trial_started_at = now
+                    return self._trial
+            retry_after = max(1.0, self.cooldown - (now - self._opened_at))
+        raise LLMUnavailable("The AI service is failing; try again shortly", retry_after=retry_after)
+
+    def record(self, ok: bool, trial=None):
+        with self._lock:
+            if self._opened_at is not None or trial is not None:
+                # while open, only the current trial's outcome counts; calls
+                # that started before the breaker opened are ignored
+                if trial is None or trial != self._trial:
+                    return
+                self._trial = None
+                if ok:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = self.clock()
+                return
+
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                logger.warning("LLM circuit breaker open: %d of the last %d calls failed", failures, len(self._outcomes))
+                self._opened_at = self.clock()
+
+    def release(self, trial=None):
+        """The trial ended without telling us anything about the upstream (e.g. the client went away)."""
+        with self._lock:
+            if trial is not None and trial == self._trial:
+                self._trial = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": self._outcomes.count(False),
+            }
+
+
+class UpstreamGuard:
+    """
+    Wraps every upstream model call: circuit breaker first, then the call
+    with an adaptive deadline. A call still running after the observed p95
+    is hedged with a duplicate request and whichever answers first wins.
+    All failures come out as LLMError subclasses.
+
+    A losing or timed-out call can't be interrupted; it finishes on the
+    upstream pool and its result is dropped. The shared httpx client's
+    timeout in llm_provider.py (LLM_TIMEOUT) bounds how long that takes.
+    """
+
+    def __init__(self, hedge: bool = LLM_HEDGE, threads: int = LLM_UPSTREAM_THREADS):
+        self.hedge = hedge
+        self.breaker = CircuitBreaker()
+        self._latency = {}
+        self._hedges = {"sent": 0, "won": 0}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="llm-upstream")
+
+    def latency(self, kind: str) -> LatencyTracker:
+        with self._lock:
+            return self._latency.setdefault(kind, LatencyTracker())
+
+    def _timed(self, fn):
+        started = time.monotonic()
+        return fn(), time.monotonic() - started
+
+    def _admit(self, before):
+        """Breaker check first, so a rejected call never reaches before() (the scheduler)."""
+        trial = self.breaker.before_call()
+        if before is not None:
+            try:
+                before()
+            except BaseException:
+                self.breaker.release(trial)
+                raise
+        return trial
+
+    def call(self, kind: str, fn, may_hedge=None, before=None):
+        """
+        Run fn() (one upstream request returning text) under the guard.
+        before() runs once the breaker has let the call through, to wait for
+        a scheduler slot. may_hedge() is asked before sending a duplicate and
+        returns False when there is no spare capacity for one.
+        """
+        trial = self._admit(before)
+        tracker = self.latency(kind)
+        limit = tracker.deadline()
+        p95 = tracker.percentile(0.95) if self.hedge else None
+
+        started = time.monotonic()
+        deadline = started + limit
+        hedge_at = started + p95 if p95 is not None else None
+
+        attempts = {self._pool.submit(self._timed, fn): False}  # future -> is the hedge
+        last_error = None
+        while attempts:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+
+            wake = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, _ = wait(attempts, timeout=wake - now, return_when=FIRST_COMPLETED)
+            if not done:
+                if hedge_at is not None and time.monotonic() >= hedge_at:
+                    hedge_at = None
+                    if may_hedge is None or may_hedge():
+                        attempts[self._pool.submit(self._timed, fn)] = True
+                        with self._lock:
+                            self._hedges["sent"] += 1
+                continue
+
+            for future in done:
+                is_hedge = attempts.pop(future)
+                try:
+                    text, seconds = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if not text:
+                    last_error = LLMUpstreamError("The model returned an empty response")
+                    continue
+
+                tracker.record(seconds)
+                self.breaker.record(True, trial)
+                if is_hedge:
+                    with self._lock:
+                        self._hedges["won"] += 1
+                return text
+
+            if last_error is not None and is_client_error(last_error):
+                # a duplicate would be rejected the same way
+                break
+
+        if last_error is None or (attempts and not is_client_error(last_error)):
+            self.breaker.record(False, trial)
+            raise LLMTimeout(f"The AI service did not answer within {limit:.1f}s")
+
+        self.breaker.record(is_client_error(last_error), trial)
+        if isinstance(last_error, LLMError):
+            raise last_error
+        raise LLMUpstreamError(str(last_error)) from last_error
+
+    def stream(self, chunks, before=None):
+        """
+        Pass a stream of text chunks through the breaker. Streams are not
+        hedged: the caller is already showing the first one's output. If
+        the consumer stops early (client disconnected) nothing is recorded,
+        but a half-open trial slot is handed back.
+        """
+        trial = self._admit(before)
+        ok = None
+        try:
+            received = False
+            for chunk in chunks:
+                received = True
+                yield chunk
+            if not received:
+                ok = False
+                raise LLMUpstreamError("The model returned an empty response")
+            ok = True
+        except LLMError:
+            ok = False
+            raise
+        except Exception as e:
+            ok = is_client_error(e)
+            raise LLMUpstreamError(str(e)) from e
+        finally:
+            if ok is None:
+                self.breaker.release(trial)
+            else:
+                self.breaker.record(ok, trial)
+
+    def stats(self):
+        with self._lock:
+            latency = dict(self._latency)
+            hedges = dict(self._hedges)
+        return {
+            "breaker": self.breaker.stats(),
+            "hedges": hedges,
+            "latency": {kind: tracker.stats() for kind, tracker in latency.items()},
+        }
+
+
+# Shared by every LLMClient in the process, like the scheduler
+guard = UpstreamGuard()
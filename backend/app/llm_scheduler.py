@@ -0,0 +1,190 @@
+# app/llm_scheduler.py
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from app.llm_errors import LLMQueueTimeout
+
+# ----------------------------
+# SCHEDULER CONFIG
+# ----------------------------
+LLM_RATE_PER_MINUTE = float(os.getenv("LLM_RATE_PER_MINUTE", "60"))  # upstream requests per minute, 0 = no limit
+LLM_BURST = int(os.getenv("LLM_BURST", "10"))                         # requests allowed back to back
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "300"))      # seconds a call may wait, 0 = forever
+
+# Lanes in priority order: anything waiting in an earlier lane goes first
+INTERACTIVE, BULK = "interactive", "bulk"
+LANES = (INTERACTIVE, BULK)
+
+# recent waits kept per lane for the percentiles in stats()
+_WAIT_SAMPLES = 500
+
+
+class _Ticket:
+    __slots__ = ("user_id", "lane", "enqueued_at")
+
+    def __init__(self, user_id, lane: str, enqueued_at: float):
+        self.user_id = user_id
+        self.lane = lane
+        self.enqueued_at = enqueued_at
+
+
+class LLMScheduler:
+    """
+    Decides which waiting LLM call goes upstream next.
+
+    A token bucket holds the request rate to rate_per_minute with bursts of
+    up to `burst`. When a token is free it goes to the interactive lane
+    before the bulk lane; inside a lane, users take turns, so one user's
+    fifty queued sections wait behind another user's single call rather
+    than in front of it.
+
+    `clock` returns seconds (time.monotonic by default); tests pass their
+    own to move time forward explicitly.
+    """
+
+    def __init__(self, rate_per_minute: float = LLM_RATE_PER_MINUTE, burst: int = LLM_BURST,
+                 queue_timeout: float = LLM_QUEUE_TIMEOUT, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.queue_timeout = queue_timeout
+        self.clock = clock
+
+        self._tokens = float(self.burst)
+        self._refilled_at = clock()
+        self._cond = threading.Condition()
+
+        # lane -> user_id -> queued tickets; the user at the front is served next
+        self._queues = {lane: OrderedDict() for lane in LANES}
+        self._granted = {lane: 0 for lane in LANES}
+        self._timeouts = {lane: 0 for lane in LANES}
+        self._waits = {lane: deque(maxlen=_WAIT_SAMPLES) for lane in LANES}
+
+    # ----------------------------- BUCKET ---------------------------------
+
+    def _refill(self, now: float):
+        if self.rate <= 0:
+            self._tokens = float(self.burst)
+        else:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _until_next_token(self):
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    # ----------------------------- QUEUES ---------------------------------
+
+    def _head(self):
+        """The ticket that gets the next token."""
+        for lane in LANES:
+            users = self._queues[lane]
+            if users:
+                return next(iter(users.values()))[0]
+        return None
+
+    def _remove(self, ticket: _Ticket):
+        users = self._queues[ticket.lane]
+        tickets = users[ticket.user_id]
+        tickets.remove(ticket)
+        if not tickets:
+            del users[ticket.user_id]
+
+    def _rotate(self, ticket: _Ticket):
+        """Serve ticket and send its user to the back of the lane."""
+        users = self._queues[ticket.lane]
+        tickets = users.pop(ticket.user_id)
+        tickets.popleft()
+        if tickets:
+            users[ticket.user_id] = tickets
+
+    # ----------------------------- ACQUIRE --------------------------------
+
+    def acquire(self, user_id=None, lane: str = BULK):
+        """
+        Block until this call may go upstream. Raises LLMQueueTimeout if
+        that takes longer than queue_timeout seconds.
+        """
+        if lane not in self._queues:
+            raise ValueError(f"unknown lane {lane!r}")
+
+        with self._cond:
+            ticket = _Ticket(user_id, lane, self.clock())
+            self._queues[lane].setdefault(user_id, deque()).append(ticket)
+            deadline = ticket.enqueued_at + self.queue_timeout if self.queue_timeout > 0 else None
+
+            while True:
+                now = self.clock()
+                self._refill(now)
+
+                if self._head() is ticket and self._tokens >= 1:
+                    self._tokens -= 1
+                    self._rotate(ticket)
+                    self._granted[lane] += 1
+                    self._waits[lane].append(now - ticket.enqueued_at)
+                    # the next head may be able to go right away
+                    self._cond.notify_all()
+                    return
+
+                if deadline is not None and now >= deadline:
+                    self._remove(ticket)
+                    self._timeouts[lane] += 1
+                    self._cond.notify_all()
+                    raise LLMQueueTimeout(f"waited {self.queue_timeout:g}s for an LLM slot")
+
+                timeout = self._until_next_token() if self._head() is ticket else None
+                if deadline is not None:
+                    timeout = min(timeout, deadline - now) if timeout is not None else deadline - now
+                self._cond.wait(timeout)
+
+    def try_acquire(self, user_id=None, lane: str = BULK):
+        """Take a token only if one is free and nobody is queued for it; never blocks."""
+        with self._cond:
+            self._refill(self.clock())
+            if self._head() is not None or self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self._granted[lane] += 1
+            return True
+
+    # ----------------------------- STATS ----------------------------------
+
+    def stats(self):
+        with self._cond:
+            now = self.clock()
+            self._refill(now)
+
+            lanes = {}
+            for lane in LANES:
+                users = self._queues[lane]
+                queued = [t for tickets in users.values() for t in tickets]
+                waits = sorted(self._waits[lane])
+                lanes[lane] = {
+                    "queued": len(queued),
+                    "users_waiting": len(users),
+                    "oldest_wait": round(max((now - t.enqueued_at for t in queued), default=0.0), 3),
+                    "granted": self._granted[lane],
+                    "timeouts": self._timeouts[lane],
+                    "wait_p50": round(_percentile(waits, 0.50), 3),
+                    "wait_p95": round(_percentile(waits, 0.95), 3),
+                    "wait_max": round(waits[-1] if waits else 0.0, 3),
+                }
+
+            return {
+                "rate_per_minute": self.rate * 60,
+                "burst": self.burst,
+                "tokens": round(self._tokens, 3),
+                "lanes": lanes,
+            }
+
+
+def _percentile(ordered, q: float):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# Shared by every LLMClient in the process, so the limit applies to all traffic
+scheduler = LLMScheduler()
@@ -1,25 +1,50 @@
 # app/main.py
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from app.database import engine, Base
+from app.database import engine, async_engine, Base
 import app.models  # ensures models are registered
 
 # Routers
 from app.routers.project_routes import router as project_router
 from app.routers.auth_routes import router as auth_router
-
-# Create DB tables
+from app.routers.llm_routes import router as llm_router
+from app.routers.project_routes import llm
+from app.services.job_service import start_job_sweeper, stop_job_sweeper
+from app.migrations import run_migrations
+from app.llm_errors import LLMError
+from app.llm_provider import close_http_client
+from app.utils.export_utils import shutdown_export_pool
+
+# Create DB tables, then bring older databases up to date
 Base.metadata.create_all(bind=engine)
+run_migrations()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # pick up generation jobs interrupted by the last shutdown, and later
+    # ones whose worker stopped renewing its lease
+    start_job_sweeper(llm)
+    yield
+    stop_job_sweeper()
+    shutdown_export_pool()
+    await close_http_client()
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title="AI Document Authoring API",
     version="1.0.0",
-    description="API for generating, refining and exporting AI-assisted documents."
+    description="API for generating, refining and exporting AI-assisted documents.",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # --------- IMPORTANT: FIX CORS FOR FRONTEND ---------
@@ -40,6 +65,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --------- LLM ERRORS ---------
+@app.exception_handler(LLMError)
+async def llm_error_handler(request: Request, exc: LLMError):
+    headers = {"Retry-After": str(int(exc.retry_after))} if exc.retry_after else None
+    return ORJSONResponse({"detail": str(exc)}, status_code=exc.status_code, headers=headers)
+
+
 # --------- OPENAPI (JWT support) ---------
 def custom_openapi():
     if app.openapi_schema:
@@ -72,4 +104,5 @@ def root():
 
 app.include_router(auth_router)
 app.include_router(project_router)
+app.include_router(llm_router)
 
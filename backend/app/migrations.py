@@ -0,0 +1,213 @@
+# app/migrations.py
+"""
+Forward-only data/schema migrations for databases created by older versions.
+
+Base.metadata.create_all() only adds missing tables; anything that has to
+change an existing table or move data is registered here with @migration and
+runs once at startup. Applied names are recorded in schema_migrations.
+"""
+import json
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, String, Table, inspect, insert, select, text
+
+from app.database import Base, SessionLocal
+from app.models import Comment, GenerationJob, Project, Section, SectionRevision
+from app.services.history_service import record_history
+from app.services.order_service import spaced_orders
+from app.services.search_service import create_search_index, drop_search_index, rebuild_search_index
+
+logger = logging.getLogger(__name__)
+
+schema_migrations = Table(
+    "schema_migrations",
+    Base.metadata,
+    Column("name", String, primary_key=True),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+MIGRATIONS = []
+
+
+def migration(name: str):
+    def register(fn):
+        MIGRATIONS.append((name, fn))
+        return fn
+    return register
+
+
+def column_names(db, table: str):
+    return {c["name"] for c in inspect(db.connection()).get_columns(table)}
+
+
+def run_migrations():
+    db = SessionLocal()
+    try:
+        applied = set(db.scalars(select(schema_migrations.c.name)))
+        for name, fn in MIGRATIONS:
+            if name in applied:
+                continue
+            logger.info("applying migration %s", name)
+            fn(db)
+            db.execute(insert(schema_migrations).values(name=name))
+            db.commit()
+    finally:
+        db.close()
+
+
+# ----------------------------- MIGRATIONS -------------------------------------
+
+def _legacy_timestamp(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return time.time()
+
+
+@migration("0001_section_history_to_revisions")
+def section_history_to_revisions(db):
+    """Move the old Section.history JSON lists into section_revisions rows."""
+    if "history" not in column_names(db, "sections"):
+        return
+
+    rows = db.execute(text("SELECT id, history FROM sections WHERE history IS NOT NULL")).all()
+    for section_id, raw in rows:
+        entries = json.loads(raw) if isinstance(raw, str) else raw
+        if not entries:
+            continue
+
+        for entry in entries:
+            prompt = entry.get("prompt")
+            action = entry.get("action") or (
+                "generate" if str(prompt).startswith("generate ") else "refine"
+            )
+            record_history(
+                db, section_id, action, prompt,
+                entry.get("old"), entry.get("new"), entry.get("user_id"),
+                timestamp=_legacy_timestamp(entry.get("timestamp"))
+            )
+        db.flush()
+
+    db.execute(text("UPDATE sections SET history = NULL"))
+
+    # DROP COLUMN needs SQLite 3.35+; on older versions the column just stays empty
+    try:
+        with db.begin_nested():
+            db.execute(text("ALTER TABLE sections DROP COLUMN history"))
+    except Exception as e:
+        logger.warning("could not drop sections.history: %s", e)
+
+
+@migration("0002_delta_compressed_revisions")
+def delta_compressed_revisions(db):
+    """Re-encode full old/new revision rows into the snapshot + delta layout."""
+    if "old" not in column_names(db, "section_revisions"):
+        return
+
+    # indexes keep their names across a rename, so clear them before recreating
+    for index in inspect(db.connection()).get_indexes("section_revisions"):
+        db.execute(text(f'DROP INDEX IF EXISTS "{index["name"]}"'))
+    db.execute(text("ALTER TABLE section_revisions RENAME TO section_revisions_v1"))
+    SectionRevision.__table__.create(db.connection())
+
+    rows = db.execute(text(
+        "SELECT section_id, action, prompt, old, new, user_id, timestamp "
+        "FROM section_revisions_v1 ORDER BY section_id, id"
+    )).all()
+
+    # plain SQL rather than the Section model, whose columns may be newer than this table
+    section_ids = set(db.scalars(text("SELECT id FROM sections")))
+
+    for section_id, action, prompt, old, new, user_id, timestamp in rows:
+        if section_id not in section_ids:
+            continue
+        record_history(db, section_id, action, prompt, old, new, user_id, timestamp=timestamp)
+
+    db.execute(text("DROP TABLE section_revisions_v1"))
+
+
+@migration("0003_section_version")
+def section_version(db):
+    """Add the optimistic-concurrency counter to existing sections."""
+    if "version" in column_names(db, "sections"):
+        return
+    db.execute(text("ALTER TABLE sections ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+@migration("0004_hot_lookup_indexes")
+def hot_lookup_indexes(db):
+    """Indexes for the per-user project and per-project section lookups."""
+    for index in (
+        *Project.__table__.indexes,
+        *Section.__table__.indexes,
+        *Comment.__table__.indexes,
+    ):
+        index.create(db.connection(), checkfirst=True)
+
+
+@migration("0005_updated_at")
+def updated_at_columns(db):
+    """Track modification times on projects and sections, starting from creation time."""
+    if "updated_at" not in column_names(db, "projects"):
+        db.execute(text("ALTER TABLE projects ADD COLUMN updated_at DATETIME"))
+        db.execute(text("UPDATE projects SET updated_at = created_at"))
+
+    if "updated_at" not in column_names(db, "sections"):
+        db.execute(text("ALTER TABLE sections ADD COLUMN updated_at DATETIME"))
+        db.execute(text(
+            "UPDATE sections SET updated_at = "
+            "(SELECT created_at FROM projects WHERE projects.id = sections.project_id)"
+        ))
+
+
+@migration("0006_search_index")
+def search_index(db):
+    """FTS5 index for /projects/search, filled from the existing rows once."""
+    if db.get_bind().dialect.name != "sqlite":
+        logger.warning("full-text search needs SQLite FTS5; /projects/search is disabled")
+        return
+    create_search_index(db)
+    rebuild_search_index(db)
+
+
+@migration("0007_spaced_section_order")
+def spaced_section_order(db):
+    """Space section orders out so a single move only rewrites the moved row."""
+    rows = db.execute(text('SELECT project_id, id FROM sections ORDER BY project_id, "order", id')).all()
+
+    by_project = {}
+    for project_id, section_id in rows:
+        by_project.setdefault(project_id, []).append(section_id)
+
+    params = [
+        {"id": section_id, "order": order}
+        for section_ids in by_project.values()
+        for section_id, order in spaced_orders(section_ids).items()
+    ]
+    if params:
+        db.execute(text('UPDATE sections SET "order" = :order WHERE id = :id'), params)
+
+
+@migration("0008_job_leases")
+def job_leases(db):
+    """Lease columns so a job is only resumed once its worker has stopped heartbeating."""
+    if "owner" not in column_names(db, "generation_jobs"):
+        db.execute(text("ALTER TABLE generation_jobs ADD COLUMN owner VARCHAR"))
+    if "heartbeat_at" not in column_names(db, "generation_jobs"):
+        db.execute(text("ALTER TABLE generation_jobs ADD COLUMN heartbeat_at DATETIME"))
+    for index in GenerationJob.__table__.indexes:
+        index.create(db.connection(), checkfirst=True)
+
+
+@migration("0009_search_owner_token")
+def search_owner_token(db):
+    """Recreate the search index with the owner token column and fill it again."""
+    if db.get_bind().dialect.name != "sqlite":
+        return
+    drop_search_index(db)
+    create_search_index(db)
+    rebuild_search_index(db)
@@ -1,7 +1,8 @@
 # app/models.py
+import time
 from datetime import datetime
 from sqlalchemy import (
-    Column, Integer, String, Text, ForeignKey, DateTime, JSON
+    Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Float, Index
 )
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -18,6 +19,10 @@ class User(Base):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # the dashboard lists a user's projects by creation time
+        Index("ix_projects_user_id_created_at", "user_id", "created_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     main_topic = Column(String)
@@ -25,18 +30,32 @@ class Project(Base):
 
     user_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = relationship("User", back_populates="projects")
+    # passive_deletes: the child rows go through ON DELETE CASCADE in the
+    # database instead of being loaded and deleted one by one
     sections = relationship(
         "Section",
         back_populates="project",
         cascade="all, delete-orphan",
+        passive_deletes=True,
         order_by="Section.order"
     )
+    jobs = relationship(
+        "GenerationJob",
+        back_populates="project",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
 
 
 class Section(Base):
     __tablename__ = "sections"
+    __table_args__ = (
+        # sections are almost always fetched per project in display order
+        Index("ix_sections_project_id_order", "project_id", "order"),
+    )
     id = Column(Integer, primary_key=True, index=True)
 
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -48,26 +67,109 @@ class Section(Base):
     likes = Column(Integer, default=0)
     dislikes = Column(Integer, default=0)
 
-    # List of revision objects:
-    # [{ "timestamp": "...", "prompt": "...", "old": "...", "new": "...", "user_id": 1 }]
-    history = Column(JSON, default=list)
+    # Bumped on every content write; writers compare it to detect edits made
+    # since they read the section.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     project = relationship("Project", back_populates="sections")
     comments = relationship(
         "Comment",
         back_populates="section",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
+    # Write revisions with db.add(SectionRevision(...)) rather than through
+    # this collection, so appending never loads the existing ones.
+    revisions = relationship(
+        "SectionRevision",
+        back_populates="section",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="SectionRevision.seq"
+    )
+
+
+class SectionRevision(Base):
+    """
+    One generate/refine of a section. Text is stored delta-compressed: every
+    few revisions (and whenever the chain breaks) a row keeps the full new
+    text in `snapshot`, and the rows after it keep only `delta` against the
+    previous revision. See services/history_service.py for reading them back.
+    """
+    __tablename__ = "section_revisions"
+    __table_args__ = (
+        Index("ix_section_revisions_section_id_seq", "section_id", "seq", unique=True),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+
+    section_id = Column(Integer, ForeignKey("sections.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"))
+
+    seq = Column(Integer, nullable=False)       # 1, 2, 3... per section
+    base_seq = Column(Integer, nullable=False)  # seq of the snapshot this row chains from
+
+    action = Column(String, nullable=False)  # 'generate' | 'refine'
+    prompt = Column(Text)
+    timestamp = Column(Float, nullable=False, default=time.time)  # unix seconds, as the UI expects
+
+    snapshot = Column(Text, nullable=True)    # full new text on snapshot rows
+    delta = Column(Text, nullable=False)      # snapshot rows: new -> old; others: previous new -> new
+    new_hash = Column(String, nullable=False)
+
+    section = relationship("Section", back_populates="revisions")
 
 
 class Comment(Base):
     __tablename__ = "comments"
     id = Column(Integer, primary_key=True, index=True)
 
-    section_id = Column(Integer, ForeignKey("sections.id", ondelete="CASCADE"))
+    section_id = Column(Integer, ForeignKey("sections.id", ondelete="CASCADE"), index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
 
     text = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     section = relationship("Section", back_populates="comments")
+
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+
+    status = Column(String, nullable=False, default="queued", index=True)  # 'queued' | 'running' | 'done' | 'failed'
+    fresh = Column(Boolean, default=False)
+    error = Column(Text, nullable=True)
+
+    # lease on a running job: the worker processing it and when it last said so
+    owner = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    project = relationship("Project", back_populates="jobs")
+    items = relationship(
+        "GenerationJobItem",
+        back_populates="job",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="GenerationJobItem.id"
+    )
+
+
+class GenerationJobItem(Base):
+    __tablename__ = "generation_job_items"
+    id = Column(Integer, primary_key=True, index=True)
+
+    job_id = Column(Integer, ForeignKey("generation_jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    section_id = Column(Integer, ForeignKey("sections.id", ondelete="CASCADE"), nullable=False)
+
+    status = Column(String, nullable=False, default="pending")  # 'pending' | 'running' | 'done' | 'failed'
+    error = Column(Text, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    job = relationship("GenerationJob", back_populates="items")
@@ -0,0 +1,20 @@
+# app/routers/llm_routes.py
+from fastapi import APIRouter, Depends
+from app.auth_utils import get_current_user
+from app.llm_resilience import guard
+from app.llm_scheduler import scheduler
+
+router = APIRouter(prefix="/llm", tags=["LLM"])
+
+
+# ----------------------------- SCHEDULER STATS --------------------------------
+
+@router.get("/stats")
+def llm_stats(user_id: int = Depends(get_current_user)):
+    """
+    Upstream rate limiter state: tokens left in the bucket, and per lane how
+    many calls are queued, how many users they belong to, and how long
+    recent calls waited (seconds). `upstream` has the circuit breaker state,
+    hedged request counts and call latencies per kind of call.
+    """
+    return {**scheduler.stats(), "upstream": guard.stats()}
@@ -1,13 +1,33 @@
 # app/routers/project_routes.py
-from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from app.database import SessionLocal
-from app.models import Project, Section, Comment
+from fastapi import APIRouter, HTTPException, Depends, Query, Header
+from fastapi.responses import StreamingResponse, Response
+from sqlalchemy import case, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from app.database import SessionLocal, AsyncSessionLocal
+from app.models import Project, Section, SectionRevision, Comment, GenerationJob, GenerationJobItem
 from app.auth_utils import get_current_user
-from app.llm_client import LLMClient
-from app.utils.export_utils import assemble_docx, assemble_pptx
-import logging, time
+from app.schemas.project import (
+    ProjectCreate, ProjectUpdate, BulkExportRequest, SectionOrder, SectionBatchEdit,
+    MessageResponse, SectionResponse, SectionOrderResponse, SectionBatchResponse, ProjectResponse, ProjectDetailResponse, ProjectPage, FeedbackItem, FeedbackBatch,
+    FeedbackResponse, FeedbackBatchResponse, HistoryItem, HistoryPage, SearchResults
+)
+from app.llm_client import LLMClient, LLM_REFINE_CHUNKED_ABOVE, run_llm
+from app.llm_errors import LLMError
+from app.services.history_service import save_section_text, get_revision, revision_texts
+from app.services.job_service import enqueue_job
+from app.services.order_service import ORDER_STEP, reorder_statement, order_between
+from app.services.search_service import SEARCH_SQL, match_expression, highlight
+from app.utils.export_utils import (
+    RENDERERS, MEDIA_TYPES, EXPORT_WORKERS, export_filename, format_extension, render_export, iter_zip
+)
+from app.utils.export_cache import CachedFileResponse, ExportCache, fingerprint, etag_matches
+from app.utils.text_chunks import estimate_tokens
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import SimpleNamespace
+from datetime import datetime
+import base64, json, logging
 
 logger = logging.getLogger(__name__)
 
@@ -24,18 +44,23 @@ def get_db():
         db.close()
 
 
-# ----------------------------- Pydantic Models --------------------------------
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
 
-class ProjectCreate(BaseModel):
-    name: str
-    main_topic: str
-    doc_type: str
 
+# ----------------------------- LLM FAILURES -----------------------------------
 
-class ProjectUpdate(BaseModel):
-    name: str | None = None
-    main_topic: str | None = None
-    doc_type: str | None = None
+def llm_failure(error: Exception):
+    """
+    (status, message) to show a client for a failed model call. LLMError
+    messages are written for clients; anything else is an internal error,
+    logged here and reported generically.
+    """
+    if isinstance(error, LLMError):
+        return error.status_code, str(error)
+    logger.error("unexpected error from a model call", exc_info=error)
+    return 502, "The AI service failed unexpectedly"
 
 
 llm = LLMClient()
@@ -43,10 +68,10 @@ llm = LLMClient()
 
 # ----------------------------- CREATE PROJECT ---------------------------------
 
-@router.post("/")
-def create_project(
+@router.post("/", response_model=ProjectResponse)
+async def create_project(
     payload: ProjectCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = Depends(get_current_user)
 ):
     proj = Project(
@@ -57,53 +82,53 @@ def create_project(
     )
 
     db.add(proj)
-    db.commit()
-    db.refresh(proj)
+    await db.flush()
 
     # Default sections
     if payload.doc_type == "docx":
         default_sections = [
-            ("Introduction", 1),
-            ("Problem Statement", 2),
-            ("Methodology", 3),
-            ("Results", 4),
-            ("Conclusion", 5),
+            "Introduction",
+            "Problem Statement",
+            "Methodology",
+            "Results",
+            "Conclusion",
         ]
     else:
         default_sections = [
-            ("Title Slide", 1),
-            ("Problem Slide", 2),
-            ("Key Insights", 3),
-            ("Graph Slide", 4),
-            ("Conclusion Slide", 5),
+            "Title Slide",
+            "Problem Slide",
+            "Key Insights",
+            "Graph Slide",
+            "Conclusion Slide",
         ]
 
-    for title, order in default_sections:
+    for position, title in enumerate(default_sections, start=1):
         sec = Section(
             project_id=proj.id,
             title=title,
-            order=order,
+            order=position * ORDER_STEP,
             content=""
         )
         db.add(sec)
 
-    db.commit()
+    await db.commit()
+    await db.refresh(proj)
     return proj
 
 
 # ----------------------------- UPDATE PROJECT (NEW) ----------------------------
 
-@router.put("/{project_id}")
-def update_project(
+@router.put("/{project_id}", response_model=ProjectResponse)
+async def update_project(
     project_id: int,
     payload: ProjectUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = Depends(get_current_user)
 ):
-    proj = db.query(Project).filter(
+    proj = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.user_id == user_id
-    ).first()
+    ))
 
     if not proj:
         raise HTTPException(404, "Project not found")
@@ -115,83 +140,213 @@ def update_project(
     if payload.doc_type is not None:
         proj.doc_type = payload.doc_type
 
-    db.commit()
-    db.refresh(proj)
+    await db.commit()
+    await db.refresh(proj)
     return proj
 
 
 # ----------------------------- DELETE PROJECT (NEW) ----------------------------
 
-@router.delete("/{project_id}")
-def delete_project(
+@router.delete("/{project_id}", response_model=MessageResponse)
+async def delete_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = Depends(get_current_user)
 ):
-    proj = db.query(Project).filter(
+    proj = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.user_id == user_id
-    ).first()
+    ))
 
     if not proj:
         raise HTTPException(404, "Project not found")
 
-    # Cascade deletes all sections + comments
-    db.delete(proj)
-    db.commit()
+    # ON DELETE CASCADE removes the sections, their revisions and comments, and jobs
+    await db.delete(proj)
+    await db.commit()
 
     return {"message": "Project deleted"}
 
 
 # ----------------------------- LIST PROJECTS ----------------------------------
 
-@router.get("/")
-def list_projects(db: Session = Depends(get_db), user_id: int = Depends(get_current_user)):
-    return db.query(Project).filter(Project.user_id == user_id).all()
+PROJECT_SORT_COLUMNS = {
+    "created_at": Project.created_at,
+    "name": func.coalesce(Project.name, ""),
+}
+
+
+def encode_cursor(sort: str, order: str, value, row_id: int):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([sort, order, value, row_id]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort: str, order: str):
+    """
+    (sort value, id) from a cursor; 400 unless it was issued for the same
+    sort and order and both values have the types the sort column compares
+    against.
+    """
+    try:
+        cursor_sort, cursor_order, value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if (cursor_sort, cursor_order) != (sort, order):
+            raise ValueError("cursor belongs to a different sort order")
+        if sort == "created_at":
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, str):
+            raise TypeError("name cursor value must be a string")
+        if type(row_id) is not int:
+            raise TypeError("cursor id must be an integer")
+        return value, row_id
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+@router.get("/", response_model=ProjectPage)
+async def list_projects(
+    cursor: str = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    sort: str = Query("created_at", pattern="^(created_at|name)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    The user's projects as summaries, one page at a time. Section count and
+    last change come from correlated subqueries in the same statement, so
+    no relationships are loaded.
+    """
+    sort_col = PROJECT_SORT_COLUMNS[sort]
+
+    section_count = select(func.count(Section.id)).where(
+        Section.project_id == Project.id
+    ).correlate(Project).scalar_subquery()
+
+    sections_updated = select(func.max(Section.updated_at)).where(
+        Section.project_id == Project.id
+    ).correlate(Project).scalar_subquery()
+
+    query = select(
+        Project.id,
+        Project.name,
+        Project.main_topic,
+        Project.doc_type,
+        Project.created_at,
+        Project.updated_at,
+        sort_col.label("sort_value"),
+        section_count.label("section_count"),
+        sections_updated.label("sections_updated_at")
+    ).where(Project.user_id == user_id)
+
+    # keyset: continue strictly after the last (sort value, id) of the previous page
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort, order)
+        after = tuple_(sort_col, Project.id)
+        query = query.where(after < tuple_(value, row_id) if order == "desc" else after > tuple_(value, row_id))
+
+    if order == "desc":
+        query = query.order_by(sort_col.desc(), Project.id.desc())
+    else:
+        query = query.order_by(sort_col.asc(), Project.id.asc())
+
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = []
+    for row in rows:
+        changes = [t for t in (row.created_at, row.updated_at, row.sections_updated_at) if t]
+        items.append({
+            "id": row.id,
+            "name": row.name,
+            "main_topic": row.main_topic,
+            "doc_type": row.doc_type,
+            "section_count": row.section_count,
+            "created_at": row.created_at,
+            "last_modified": max(changes) if changes else None
+        })
+
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(sort, order, rows[-1].sort_value, rows[-1].id) if has_more else None
+    }
+
+
+# ----------------------------- SEARCH -----------------------------------------
+
+# declared before /{project_id} so "search" is not taken for a project id
+@router.get("/search", response_model=SearchResults)
+async def search_projects(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Ranked full-text search over the user's project names/topics and
+    section titles/content. `title` and `snippet` are HTML-escaped with the
+    matched words wrapped in <mark>.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        raise HTTPException(501, "Search is only available on SQLite")
+
+    match = match_expression(q, user_id)
+    if not match:
+        return {"items": []}
+
+    rows = (await db.execute(SEARCH_SQL, {"match": match, "user_id": user_id, "limit": limit})).all()
+
+    return {"items": [{
+        "type": "section" if row.section_id is not None else "project",
+        "project_id": row.project_id,
+        "project_name": row.project_name,
+        "section_id": row.section_id,
+        "title": highlight(row.title),
+        "snippet": highlight(row.snippet),
+        "score": -row.rank  # bm25() is lower-is-better
+    } for row in rows]}
 
 
 # ----------------------------- GET PROJECT ------------------------------------
 
-@router.get("/{project_id}")
-def get_project(project_id: int, db: Session = Depends(get_db), user_id: int = Depends(get_current_user)):
-    proj = db.query(Project).filter(
+@router.get("/{project_id}", response_model=ProjectDetailResponse)
+async def get_project(project_id: int, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_current_user)):
+    # sections and their comments come with the project in two extra queries
+    proj = await db.scalar(select(Project).options(
+        selectinload(Project.sections).selectinload(Section.comments)
+    ).where(
         Project.id == project_id,
         Project.user_id == user_id
-    ).first()
+    ))
 
     if not proj:
         raise HTTPException(404, "Project not found")
 
-    sections = db.query(Section).filter(
-        Section.project_id == project_id
-    ).order_by(Section.order).all()
-
-    proj.sections = sections
     return proj
 
 
 # ----------------------------- ADD SECTION ------------------------------------
 
-@router.post("/{project_id}/sections")
-def add_section(
+@router.post("/{project_id}/sections", response_model=SectionResponse)
+async def add_section(
     project_id: int,
     title: str = Query(...),
     order: int = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = Depends(get_current_user)
 ):
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.user_id == user_id
-    ).first()
+    ))
 
     if not project:
         raise HTTPException(404, "Project not found")
 
     if order is None:
-        order = db.query(Section).filter(
-            Section.project_id == project_id
-        ).count() + 1
+        last = await db.scalar(select(func.max(Section.order)).where(Section.project_id == project_id))
+        order = order_between(last, None)
 
     sec = Section(
         project_id=project_id,
@@ -200,170 +355,491 @@ def add_section(
         content=""
     )
     db.add(sec)
-    db.commit()
-    db.refresh(sec)
+    await db.commit()
+    await db.refresh(sec)
 
     return sec
 
 
+# ----------------------------- REORDER SECTIONS -------------------------------
+
+SECTION_BATCH_MAX = 500
+
+
+@router.put("/{project_id}/sections/order", response_model=SectionOrderResponse)
+async def reorder_sections(
+    data: SectionOrder,
+    project_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Put all sections of a project in the given order with one UPDATE.
+    section_ids must list every section of the project exactly once.
+    """
+    project = await db.scalar(select(Project).where(
+        Project.id == project_id,
+        Project.user_id == user_id
+    ))
+
+    if not project:
+        raise HTTPException(404, "Project not found")
+
+    current = set(await db.scalars(select(Section.id).where(Section.project_id == project_id)))
+    if len(data.section_ids) != len(set(data.section_ids)) or set(data.section_ids) != current:
+        raise HTTPException(400, "section_ids must list every section of the project exactly once")
+
+    if data.section_ids:
+        await db.execute(reorder_statement(project_id, data.section_ids))
+    await db.commit()
+
+    return {"sections": [
+        {"id": sid, "order": (i + 1) * ORDER_STEP} for i, sid in enumerate(data.section_ids)
+    ]}
+
+
+# ----------------------------- BATCH EDIT SECTIONS ----------------------------
+
+@router.patch("/{project_id}/sections", response_model=SectionBatchResponse)
+async def edit_sections(
+    data: SectionBatchEdit,
+    project_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Change titles and/or content of several sections with one UPDATE,
+    applied together or not at all. Content changes bump the version; items
+    with expected_version fail the whole batch with 409 if the section is no
+    longer at that version.
+    """
+    if not data.items:
+        raise HTTPException(400, "No edits given")
+    if len(data.items) > SECTION_BATCH_MAX:
+        raise HTTPException(400, f"At most {SECTION_BATCH_MAX} items per request")
+
+    ids = [item.id for item in data.items]
+    if len(ids) != len(set(ids)):
+        raise HTTPException(400, "Each section may appear only once")
+
+    titles = {item.id: item.title for item in data.items if item.title is not None}
+    contents = {item.id: item.content for item in data.items if item.content is not None}
+    expected = {item.id: item.expected_version for item in data.items if item.expected_version is not None}
+
+    owned_project = select(Project.id).where(
+        Project.id == project_id,
+        Project.user_id == user_id
+    ).scalar_subquery()
+
+    values = {}
+    if titles:
+        values["title"] = case(titles, value=Section.id, else_=Section.title)
+    if contents:
+        values["content"] = case(contents, value=Section.id, else_=Section.content)
+        values["version"] = Section.version + case(dict.fromkeys(contents, 1), value=Section.id, else_=0)
+    if not values:
+        values["title"] = Section.title  # nothing to change, but still check ownership and versions
+
+    stmt = update(Section).where(Section.id.in_(ids), Section.project_id == owned_project)
+    if expected:
+        stmt = stmt.where(Section.version == case(expected, value=Section.id, else_=Section.version))
+    stmt = stmt.values(**values).returning(Section).execution_options(synchronize_session=False)
+
+    sections = {sec.id: sec for sec in await db.scalars(stmt)}
+
+    skipped = set(ids) - sections.keys()
+    if skipped:
+        await db.rollback()
+        found = set(await db.scalars(select(Section.id).where(
+            Section.id.in_(skipped), Section.project_id == owned_project
+        )))
+        missing = skipped - found
+        if missing:
+            raise HTTPException(404, f"Section not found: {', '.join(map(str, sorted(missing)))}")
+        raise HTTPException(409, {
+            "message": "Some sections were changed by someone else; nothing was saved",
+            "section_ids": sorted(found)
+        })
+
+    await db.commit()
+    return {"sections": [sections[sid] for sid in ids]}
+
+
 # ----------------------------- UPDATE SECTION ---------------------------------
 
-@router.put("/{project_id}/sections/{section_id}")
-def update_section(
+@router.put("/{project_id}/sections/{section_id}", response_model=SectionResponse)
+async def update_section(
     project_id: int,
     section_id: int,
     title: str = None,
     content: str = None,
     order: int = None,
-    db: Session = Depends(get_db),
+    expected_version: int = Query(None, description="Reject the edit with 409 if the section is no longer at this version"),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = Depends(get_current_user)
 ):
-    sec = db.query(Section).join(Project).filter(
+    sec = await db.scalar(select(Section).join(Project).where(
         Section.id == section_id,
         Project.id == project_id,
         Project.user_id == user_id
-    ).first()
+    ))
 
     if not sec:
         raise HTTPException(404, "Section not found")
 
+    values = {}
     if title is not None:
-        sec.title = title
+        values["title"] = title
     if content is not None:
-        sec.content = content
+        values["content"] = content
+        values["version"] = Section.version + 1
     if order is not None:
-        sec.order = order
+        values["order"] = order
 
-    db.commit()
-    db.refresh(sec)
+    if values:
+        stmt = update(Section).where(Section.id == section_id)
+        if expected_version is not None:
+            stmt = stmt.where(Section.version == expected_version)
+        result = await db.execute(stmt.values(**values).execution_options(synchronize_session=False))
+        if result.rowcount != 1:
+            raise HTTPException(409, "Section was changed by someone else; reload and try again")
+
+    await db.commit()
+    await db.refresh(sec)
 
     return sec
 
 
 # ----------------------------- DELETE SECTION ---------------------------------
 
-@router.delete("/{project_id}/sections/{section_id}")
-def delete_section(
+@router.delete("/{project_id}/sections/{section_id}", response_model=MessageResponse)
+async def delete_section(
     project_id: int,
     section_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = Depends(get_current_user)
 ):
-    sec = db.query(Section).join(Project).filter(
+    sec = await db.scalar(select(Section).join(Project).where(
         Section.id == section_id,
         Project.id == project_id,
         Project.user_id == user_id
-    ).first()
+    ))
 
     if not sec:
         raise HTTPException(404, "Section not found")
 
-    db.delete(sec)
-    db.commit()
+    await db.delete(sec)
+    await db.commit()
 
     return {"message": "Deleted"}
 
 
 # ----------------------------- GENERATE CONTENT -------------------------------
 
-@router.post("/{project_id}/generate")
-def generate_content(
+@router.post("/{project_id}/generate", response_model=MessageResponse)
+async def generate_content(
     project_id: int,
     section_id: int = None,
-    db: Session = Depends(get_db),
+    fresh: bool = Query(False, description="Skip the response cache and ask the model again"),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = Depends(get_current_user)
 ):
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.user_id == user_id
-    ).first()
+    ))
 
     if not project:
         raise HTTPException(404, "Project not found")
 
+    query = select(Section.id, Section.title, Section.version).where(
+        Section.project_id == project_id
+    ).order_by(Section.order)
     if section_id:
-        sections = db.query(Section).filter(
-            Section.project_id == project_id,
-            Section.id == section_id
-        ).all()
-    else:
-        sections = db.query(Section).filter(
-            Section.project_id == project_id
-        ).all()
+        query = query.where(Section.id == section_id)
+    sections = (await db.execute(query)).all()
+    main_topic = project.main_topic
 
-    for sec in sections:
-        try:
-            generated = llm.generate(project.main_topic, sec.title)
-        except:
-            generated = "Content could not be generated. Try refining this section."
+    # end the read transaction so no connection or lock is held during the LLM calls
+    await db.commit()
 
-        sec.history = (sec.history or []) + [{
-            "timestamp": time.time(),
-            "action": "generate",
-            "prompt": f"generate {sec.title}",
-            "old": sec.content,
-            "new": generated,
-            "user_id": user_id
-        }]
-
-        sec.content = generated
+    # One structured request covers the whole outline; sections it fails
+    # to return are generated one by one.
+    results = await run_llm(
+        llm.generate_all, main_topic, [sec.title for sec in sections], fresh=fresh, user_id=user_id
+    )
 
-    db.commit()
+    conflicts, failed, error = [], [], None
+    for sec, generated in zip(sections, results):
+        if isinstance(generated, Exception):
+            # never store an error as section content
+            failed.append(sec.id)
+            if not isinstance(error, LLMError):
+                # report an LLMError (with its status) over anything else
+                error = generated
+            continue
+
+        saved = await db.run_sync(
+            save_section_text, sec.id, sec.version, "generate", f"generate {sec.title}", generated, user_id
+        )
+        if saved is None:
+            conflicts.append(sec.id)
+
+    await db.commit()
+
+    if failed:
+        logger.warning("generation failed for sections %s: %s", failed, error)
+        status, message = llm_failure(error)
+        raise HTTPException(status, {
+            "message": f"Some sections could not be generated and were left unchanged: {message}",
+            "section_ids": failed
+        })
+    if conflicts:
+        raise HTTPException(409, {
+            "message": "Some sections were edited during generation and were left unchanged",
+            "section_ids": conflicts
+        })
     return {"message": "Generated"}
 
 
 # ----------------------------- REFINE SECTION ---------------------------------
 
-@router.post("/{project_id}/sections/{section_id}/refine")
-def refine_section(
+@router.post("/{project_id}/sections/{section_id}/refine", response_model=SectionResponse)
+async def refine_section(
     project_id: int,
     section_id: int,
     instruction: str = Query(...),
-    db: Session = Depends(get_db),
+    fresh: bool = Query(False, description="Skip the response cache and ask the model again"),
+    chunked: bool = Query(None, description="Refine paragraph chunks in parallel; by default only long sections are chunked"),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = Depends(get_current_user)
 ):
-    sec = db.query(Section).join(Project).filter(
+    row = (await db.execute(select(Section, Project.main_topic).join(Project).where(
         Section.id == section_id,
         Project.id == project_id,
         Project.user_id == user_id
+    ))).first()
+
+    if not row:
+        raise HTTPException(404, "Section not found")
+
+    sec, main_topic = row
+    old, version, title = sec.content or "", sec.version, sec.title
+
+    # end the read transaction so no connection or lock is held during the LLM call
+    await db.commit()
+
+    if chunked is None:
+        chunked = estimate_tokens(old) > LLM_REFINE_CHUNKED_ABOVE
+
+    # an LLMError propagates as its 502/503/504 response and nothing is saved
+    if chunked:
+        refined = await run_llm(
+            llm.refine_chunked, old, instruction, fresh=fresh, user_id=user_id,
+            main_topic=main_topic, section_title=title
+        )
+    else:
+        refined = await run_llm(llm.refine, old, instruction, fresh=fresh, user_id=user_id)
+
+    saved = await db.run_sync(save_section_text, section_id, version, "refine", instruction, refined, user_id)
+    await db.commit()
+
+    if saved is None:
+        raise HTTPException(409, "Section was edited while refining; reload and try again")
+
+    await db.refresh(sec)
+    return sec
+
+
+# ----------------------------- GENERATION JOBS --------------------------------
+
+@router.post("/{project_id}/jobs", status_code=202)
+def create_generation_job(
+    project_id: int,
+    section_id: int = None,
+    fresh: bool = Query(False, description="Skip the response cache and ask the model again"),
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Queue generation of the project (or a single section) in the background.
+    Poll GET /{project_id}/jobs/{job_id} for progress.
+    """
+    project = db.query(Project).filter(
+        Project.id == project_id,
+        Project.user_id == user_id
     ).first()
 
-    if not sec:
+    if not project:
+        raise HTTPException(404, "Project not found")
+
+    query = db.query(Section.id).filter(Section.project_id == project_id)
+    if section_id:
+        query = query.filter(Section.id == section_id)
+    section_ids = [sid for (sid,) in query.order_by(Section.order).all()]
+
+    if not section_ids:
         raise HTTPException(404, "Section not found")
 
-    old = sec.content or ""
+    job = GenerationJob(project_id=project_id, user_id=user_id, fresh=fresh)
+    job.items = [GenerationJobItem(section_id=sid) for sid in section_ids]
+    db.add(job)
+    db.commit()
+
+    enqueue_job(job.id, llm)
+    return {"job_id": job.id, "status": job.status}
+
+
+@router.get("/{project_id}/jobs/{job_id}")
+def get_generation_job(
+    project_id: int,
+    job_id: int,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    job = db.query(GenerationJob).join(Project).filter(
+        GenerationJob.id == job_id,
+        Project.id == project_id,
+        Project.user_id == user_id
+    ).first()
+
+    if not job:
+        raise HTTPException(404, "Job not found")
+
+    rows = db.query(GenerationJobItem, Section.title, Section.content).outerjoin(
+        Section, Section.id == GenerationJobItem.section_id
+    ).filter(
+        GenerationJobItem.job_id == job_id
+    ).order_by(GenerationJobItem.id).all()
+
+    progress = {"total": len(rows), "pending": 0, "running": 0, "done": 0, "failed": 0}
+    for item, _, _ in rows:
+        progress[item.status] += 1
+
+    return {
+        "job_id": job.id,
+        "project_id": job.project_id,
+        "status": job.status,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "progress": progress,
+        "sections": [{
+            "section_id": item.section_id,
+            "title": title,
+            "status": item.status,
+            "error": item.error,
+            "finished_at": item.finished_at,
+            "content": content if item.status == "done" else None
+        } for item, title, content in rows]
+    }
+
+
+# ----------------------------- STREAMING --------------------------------------
+
+def sse_event(event: str, data: dict):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events):
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
+def stream_and_save(section_id: int, version: int, chunks, action: str, prompt: str, user_id: int):
+    """
+    Forward LLM chunks as SSE events, then store the joined text on the
+    section once the stream is complete. Nothing is saved if it fails midway,
+    or if the section moved past `version` while the model was writing.
+    """
+    parts = []
     try:
-        refined = llm.refine(old, instruction)
-    except:
-        refined = "Refining failed. Try changing the instruction."
-
-    sec.history = (sec.history or []) + [{
-        "timestamp": time.time(),
-        "action": "refine",
-        "prompt": instruction,
-        "old": old,
-        "new": refined,
-        "user_id": user_id
-    }]
+        for text in chunks:
+            parts.append(text)
+            yield sse_event("chunk", {"section_id": section_id, "text": text})
+    except Exception as e:
+        logger.warning("stream for section %s failed: %s", section_id, e)
+        status, message = llm_failure(e)
+        yield sse_event("error", {
+            "section_id": section_id,
+            "detail": message,
+            "status": status
+        })
+        return
+
+    new = "".join(parts)
+    db = SessionLocal()
+    try:
+        saved = save_section_text(db, section_id, version, action, prompt, new, user_id)
+        db.commit()
+    finally:
+        db.close()
 
-    sec.content = refined
-    db.commit()
-    db.refresh(sec)
-    return sec
+    if saved is None:
+        yield sse_event("error", {"section_id": section_id, "detail": "Section was changed or deleted during generation"})
+        return
 
+    yield sse_event("done", {"section_id": section_id, "version": saved})
 
-# ----------------------------- FEEDBACK ---------------------------------------
 
-@router.post("/{project_id}/sections/{section_id}/feedback")
-def feedback(
+@router.post("/{project_id}/generate/stream")
+def generate_content_stream(
+    project_id: int,
+    section_id: int = None,
+    fresh: bool = Query(False, description="Skip the response cache and ask the model again"),
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Same as /generate, but sends the text as server-sent events while the
+    model writes it. Sections are streamed one after another.
+    """
+    project = db.query(Project).filter(
+        Project.id == project_id,
+        Project.user_id == user_id
+    ).first()
+
+    if not project:
+        raise HTTPException(404, "Project not found")
+
+    query = db.query(Section.id, Section.title, Section.version).filter(Section.project_id == project_id)
+    if section_id:
+        query = query.filter(Section.id == section_id)
+    sections = query.order_by(Section.order).all()
+    main_topic = project.main_topic
+
+    # the stream can run for minutes; don't keep this request's connection
+    db.close()
+
+    def events():
+        for sid, title, version in sections:
+            yield sse_event("section", {"section_id": sid, "title": title})
+            yield from stream_and_save(
+                sid,
+                version,
+                llm.generate_stream(main_topic, title, fresh=fresh, user_id=user_id),
+                "generate",
+                f"generate {title}",
+                user_id
+            )
+        yield sse_event("end", {"project_id": project_id})
+
+    return sse_response(events())
+
+
+@router.post("/{project_id}/sections/{section_id}/refine/stream")
+def refine_section_stream(
     project_id: int,
     section_id: int,
-    like: bool = Query(...),
-    comment: str = Query(None),
+    instruction: str = Query(...),
+    fresh: bool = Query(False, description="Skip the response cache and ask the model again"),
     db: Session = Depends(get_db),
     user_id: int = Depends(get_current_user)
 ):
+    """Same as /refine, but sends the refined text as server-sent events."""
     sec = db.query(Section).join(Project).filter(
         Section.id == section_id,
         Project.id == project_id,
@@ -373,47 +849,287 @@ def feedback(
     if not sec:
         raise HTTPException(404, "Section not found")
 
-    if like:
-        sec.likes = (sec.likes or 0) + 1
+    old, title, version = sec.content or "", sec.title, sec.version
+    db.close()
+
+    def events():
+        yield sse_event("section", {"section_id": section_id, "title": title})
+        yield from stream_and_save(
+            section_id,
+            version,
+            llm.refine_stream(old, instruction, fresh=fresh, user_id=user_id),
+            "refine",
+            instruction,
+            user_id
+        )
+        yield sse_event("end", {"project_id": project_id})
+
+    return sse_response(events())
+
+
+# ----------------------------- FEEDBACK ---------------------------------------
+
+FEEDBACK_BATCH_MAX = 500
+
+
+async def record_feedback(db: AsyncSession, project_id: int, user_id: int, items):
+    """
+    Apply votes and comments for sections of one project in one transaction.
+    Counters move through a single UPDATE ... SET likes = likes + n, so
+    concurrent votes are never lost and no section row is loaded first.
+    Returns {section_id: (likes, dislikes)}.
+    """
+    section_ids = {item.section_id for item in items}
+    likes = Counter(item.section_id for item in items if item.like is True)
+    dislikes = Counter(item.section_id for item in items if item.like is False)
+
+    owned_project = select(Project.id).where(
+        Project.id == project_id,
+        Project.user_id == user_id
+    ).scalar_subquery()
+    in_project = (Section.id.in_(section_ids), Section.project_id == owned_project)
+
+    if likes or dislikes:
+        # votes aren't edits, so updated_at keeps its value
+        values = {"updated_at": Section.updated_at}
+        if likes:
+            values["likes"] = func.coalesce(Section.likes, 0) + case(dict(likes), value=Section.id, else_=0)
+        if dislikes:
+            values["dislikes"] = func.coalesce(Section.dislikes, 0) + case(dict(dislikes), value=Section.id, else_=0)
+        stmt = update(Section).where(*in_project).values(**values).returning(
+            Section.id, Section.likes, Section.dislikes
+        ).execution_options(synchronize_session=False)
     else:
-        sec.dislikes = (sec.dislikes or 0) + 1
+        stmt = select(Section.id, Section.likes, Section.dislikes).where(*in_project)
 
-    if comment:
-        c = Comment(section_id=section_id, user_id=user_id, text=comment)
-        db.add(c)
+    counts = {sid: (l or 0, d or 0) for sid, l, d in (await db.execute(stmt)).all()}
 
-    db.commit()
-    return {"likes": sec.likes, "dislikes": sec.dislikes}
+    missing = section_ids - counts.keys()
+    if missing:
+        await db.rollback()
+        raise HTTPException(404, f"Section not found: {', '.join(map(str, sorted(missing)))}")
+
+    db.add_all([
+        Comment(section_id=item.section_id, user_id=user_id, text=item.comment)
+        for item in items if item.comment
+    ])
+    await db.commit()
+    return counts
+
+
+@router.post("/{project_id}/sections/{section_id}/feedback", response_model=FeedbackResponse)
+async def feedback(
+    project_id: int,
+    section_id: int,
+    like: bool = Query(None, description="true = like, false = dislike; omit to only comment"),
+    comment: str = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user)
+):
+    if like is None and not comment:
+        raise HTTPException(400, "Nothing to record")
+
+    counts = await record_feedback(db, project_id, user_id, [
+        FeedbackItem(section_id=section_id, like=like, comment=comment)
+    ])
+    likes, dislikes = counts[section_id]
+    return {"likes": likes, "dislikes": dislikes}
+
+
+@router.post("/{project_id}/feedback", response_model=FeedbackBatchResponse)
+async def feedback_batch(
+    data: FeedbackBatch,
+    project_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Votes and comments for several sections at once, applied together or
+    not at all. Returns the new counters of every section mentioned.
+    """
+    if not data.items:
+        raise HTTPException(400, "No feedback given")
+    if len(data.items) > FEEDBACK_BATCH_MAX:
+        raise HTTPException(400, f"At most {FEEDBACK_BATCH_MAX} items per request")
+
+    counts = await record_feedback(db, project_id, user_id, data.items)
+    return {"sections": [
+        {"section_id": sid, "likes": likes, "dislikes": dislikes}
+        for sid, (likes, dislikes) in sorted(counts.items())
+    ]}
 
 
 # ----------------------------- HISTORY ----------------------------------------
 
-@router.get("/{project_id}/history")
+HISTORY_FIELDS = ("id", "section_id", "section_title", "version", "action", "prompt", "timestamp", "user_id", "old", "new")
+HISTORY_DEFAULT_FIELDS = "id,section_id,section_title,version,action,prompt,timestamp,user_id"
+
+
+@router.get("/{project_id}/history", response_model=HistoryPage, response_model_exclude_unset=True)
 def get_history(
     project_id: int,
+    cursor: str = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    section_id: int = None,
+    action: str = Query(None, pattern="^(generate|refine)$"),
+    author_id: int = Query(None, alias="user", description="Only revisions made by this user"),
+    since: float = Query(None, description="Unix timestamp, inclusive"),
+    until: float = Query(None, description="Unix timestamp, exclusive"),
+    fields: str = Query(HISTORY_DEFAULT_FIELDS, description="Comma-separated; add old,new for the text bodies"),
     db: Session = Depends(get_db),
     user_id: int = Depends(get_current_user)
 ):
-    sections = db.query(Section).filter(
+    """
+    Revisions of the project's sections, newest first, one page at a time.
+    Text bodies are only rebuilt when `fields` asks for them.
+    """
+    project = db.query(Project).filter(
+        Project.id == project_id,
+        Project.user_id == user_id
+    ).first()
+
+    if not project:
+        raise HTTPException(404, "Project not found")
+
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = set(selected) - set(HISTORY_FIELDS)
+    if unknown:
+        raise HTTPException(400, f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    query = db.query(SectionRevision, Section.title).join(Section).filter(
         Section.project_id == project_id
-    ).all()
+    )
+    if cursor:
+        if not cursor.isdigit():
+            raise HTTPException(400, "Invalid cursor")
+        query = query.filter(SectionRevision.id < int(cursor))
+    if section_id:
+        query = query.filter(SectionRevision.section_id == section_id)
+    if action:
+        query = query.filter(SectionRevision.action == action)
+    if author_id:
+        query = query.filter(SectionRevision.user_id == author_id)
+    if since is not None:
+        query = query.filter(SectionRevision.timestamp >= since)
+    if until is not None:
+        query = query.filter(SectionRevision.timestamp < until)
+
+    rows = query.order_by(SectionRevision.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    texts = {}
+    if "old" in selected or "new" in selected:
+        texts = revision_texts(db, [rev for rev, _ in rows])
+
+    items = []
+    for rev, title in rows:
+        old, new = texts.get(rev.id, (None, None))
+        full = {
+            "id": rev.id,
+            "section_id": rev.section_id,
+            "section_title": title,
+            "version": rev.seq,
+            "action": rev.action,
+            "prompt": rev.prompt,
+            "timestamp": rev.timestamp,
+            "user_id": rev.user_id,
+            "old": old,
+            "new": new
+        }
+        items.append({f: full[f] for f in selected})
+
+    return {
+        "items": items,
+        "next_cursor": str(rows[-1][0].id) if has_more else None
+    }
+
+
+@router.get("/{project_id}/history/{revision_id}", response_model=HistoryItem)
+def get_history_entry(
+    project_id: int,
+    revision_id: int,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """A single revision with its full old/new text."""
+    row = db.query(SectionRevision, Section.title).join(Section).join(Project).filter(
+        SectionRevision.id == revision_id,
+        Project.id == project_id,
+        Project.user_id == user_id
+    ).first()
+
+    if not row:
+        raise HTTPException(404, "Revision not found")
+
+    rev, title = row
+    old, new = revision_texts(db, [rev])[rev.id]
+    return {
+        "id": rev.id,
+        "section_id": rev.section_id,
+        "section_title": title,
+        "version": rev.seq,
+        "action": rev.action,
+        "prompt": rev.prompt,
+        "timestamp": rev.timestamp,
+        "user_id": rev.user_id,
+        "old": old,
+        "new": new
+    }
+
+
+@router.get("/{project_id}/sections/{section_id}/versions/{version}", response_model=HistoryItem, response_model_exclude_unset=True)
+def get_section_version(
+    project_id: int,
+    section_id: int,
+    version: int,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """Rebuild the section text as it was after revision number `version`."""
+    sec = db.query(Section.id).join(Project).filter(
+        Section.id == section_id,
+        Project.id == project_id,
+        Project.user_id == user_id
+    ).first()
+
+    if not sec:
+        raise HTTPException(404, "Section not found")
 
-    return [{
-        "section_id": s.id,
-        "title": s.title,
-        "history": s.history or []
-    } for s in sections]
+    found = get_revision(db, section_id, version)
+    if not found:
+        raise HTTPException(404, "Version not found")
+
+    rev, old, new = found
+    return {
+        "section_id": section_id,
+        "version": rev.seq,
+        "timestamp": rev.timestamp,
+        "action": rev.action,
+        "prompt": rev.prompt,
+        "user_id": rev.user_id,
+        "old": old,
+        "new": new
+    }
 
 
 # ----------------------------- EXPORT -----------------------------------------
 
+export_cache = ExportCache()
+
+
 @router.get("/{project_id}/export")
 def export_project(
     project_id: int,
-    format: str = Query("docx"),
+    format: str = Query("docx", description="docx | pptx, or docx-stream | pptx-stream for the fast writer"),
+    if_none_match: str = Header(None),
     db: Session = Depends(get_db),
     user_id: int = Depends(get_current_user)
 ):
+    """
+    Download the project as .docx or .pptx. Files are cached by a
+    fingerprint of the project content, which doubles as the ETag.
+    """
     project = db.query(Project).filter(
         Project.id == project_id,
         Project.user_id == user_id
@@ -422,45 +1138,203 @@ def export_project(
     if not project:
         raise HTTPException(404, "Project not found")
 
+    if format not in RENDERERS:
+        raise HTTPException(400, "Invalid format")
+
     sections = db.query(Section).filter(
         Section.project_id == project_id
     ).order_by(Section.order).all()
 
-    if format == "docx":
-        return assemble_docx(project, sections)
-    if format == "pptx":
-        return assemble_pptx(project, sections)
+    key = fingerprint(project, sections, format)
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    ext = format_extension(format)
+    path = export_cache.get_or_render(
+        key, ext, lambda out: render_export(format, project, sections, out)
+    )
+
+    # streamed in chunks, so memory stays flat per download; the cache entry
+    # stays pinned until the response is done with it
+    return CachedFileResponse(
+        export_cache,
+        path,
+        media_type=MEDIA_TYPES[ext],
+        filename=export_filename(project, ext),
+        headers=headers
+    )
+
+
+# ----------------------------- BULK EXPORT ------------------------------------
+
+BULK_EXPORT_MAX_PROJECTS = 200
+
+
+def _cached_export(project, sections, fmt: str):
+    key = fingerprint(project, sections, fmt)
+    return export_cache.get_or_render(
+        key, format_extension(fmt), lambda out: render_export(fmt, project, sections, out)
+    )
+
+
+def _release_export(future):
+    if not future.cancelled() and future.exception() is None:
+        export_cache.release(future.result())
+
+
+def _bulk_export_members(projects, missing, fmt: str):
+    """
+    Yield (arcname, open file) for each project as soon as its file is
+    ready, then manifest.json. A project that fails to render, or whose
+    file can't be opened or read, is listed in the manifest instead of
+    ending the archive.
+    """
+    ext = format_extension(fmt)
+    manifest = [
+        {"project_id": pid, "status": "error", "error": "Project not found"}
+        for pid in missing
+    ]
+
+    # threads only wait on the export process pool, so size them to match it
+    executor = ThreadPoolExecutor(max_workers=max(1, EXPORT_WORKERS))
+    futures = {
+        executor.submit(_cached_export, project, sections, fmt): project
+        for project, sections in projects
+    }
+    consumed = set()
+    try:
+        for future in as_completed(futures):
+            consumed.add(future)
+            project = futures[future]
+            entry = {"project_id": project.id, "name": project.name}
+            try:
+                path = future.result()
+            except Exception as e:
+                logger.exception("bulk export failed for project %s", project.id)
+                manifest.append({**entry, "status": "error", "error": str(e)})
+                continue
+
+            arcname = f"{project.id}_{export_filename(project, ext)}"
+            try:
+                # opened right away: the open file stays readable whatever
+                # happens to the cache entry before it is zipped
+                src = open(path, "rb")
+            except OSError as e:
+                export_cache.release(path)
+                logger.exception("bulk export could not open the file for project %s", project.id)
+                manifest.append({**entry, "status": "error", "error": str(e)})
+                continue
+
+            result = {**entry, "status": "ok", "file": arcname}
+            manifest.append(result)
+            try:
+                with src:
+                    yield arcname, src
+            except OSError as e:
+                # thrown back by iter_zip: the member was cut short
+                logger.exception("bulk export could not read the file for project %s", project.id)
+                result.update(status="error", error=str(e))
+            finally:
+                export_cache.release(path)
+    finally:
+        # when the client goes away mid-archive (GeneratorExit), don't render
+        # the projects nobody will receive or hold the response open for them
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+        # and give back the pins of files rendered for members never sent
+        for future in futures.keys() - consumed:
+            future.add_done_callback(_release_export)
+
+    manifest.sort(key=lambda e: e["project_id"])
+    yield "manifest.json", json.dumps(
+        {"format": fmt, "projects": manifest}, ensure_ascii=False, indent=2
+    ).encode("utf-8")
+
+
+@router.post("/export")
+def bulk_export(
+    data: BulkExportRequest,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Export several projects as one ZIP archive. Files are rendered in
+    parallel (through the export cache) and streamed into the archive as
+    each one finishes; manifest.json at the end lists per-project results.
+    """
+    if data.format not in RENDERERS:
+        raise HTTPException(400, "Invalid format")
+
+    project_ids = list(dict.fromkeys(data.project_ids))
+    if not project_ids:
+        raise HTTPException(400, "No projects given")
+    if len(project_ids) > BULK_EXPORT_MAX_PROJECTS:
+        raise HTTPException(400, f"At most {BULK_EXPORT_MAX_PROJECTS} projects per export")
+
+    rows = db.query(Project).filter(
+        Project.id.in_(project_ids),
+        Project.user_id == user_id
+    ).all()
+
+    sections_by_project = {}
+    for sec in db.query(Section).filter(
+        Section.project_id.in_([p.id for p in rows])
+    ).order_by(Section.project_id, Section.order):
+        sections_by_project.setdefault(sec.project_id, []).append(
+            SimpleNamespace(title=sec.title, content=sec.content, order=sec.order)
+        )
+
+    # plain copies: the archive is produced after this request's session closes
+    projects = [
+        (
+            SimpleNamespace(id=p.id, name=p.name, main_topic=p.main_topic),
+            sections_by_project.get(p.id, [])
+        )
+        for p in sorted(rows, key=lambda p: project_ids.index(p.id))
+    ]
+    found = {p.id for p, _ in projects}
+    missing = [pid for pid in project_ids if pid not in found]
+
+    return StreamingResponse(
+        iter_zip(_bulk_export_members(projects, missing, data.format)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=projects_{format_extension(data.format)}.zip"}
+    )
+
 
-    raise HTTPException(400, "Invalid format")
 # ----------------------------- MOVE SECTION ---------------------------------
 
-@router.post("/{project_id}/sections/{section_id}/move")
-def move_section(
+@router.post("/{project_id}/sections/{section_id}/move", response_model=MessageResponse)
+async def move_section(
     project_id: int,
     section_id: int,
     direction: str = Query(..., regex="^(up|down)$"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = Depends(get_current_user)
 ):
     """
     Swap the order of the current section with the section above or below it.
     """
-    sec = db.query(Section).join(Project).filter(
+    sec = await db.scalar(select(Section).join(Project).where(
         Section.id == section_id,
         Project.id == project_id,
         Project.user_id == user_id
-    ).first()
+    ))
 
     if not sec:
         raise HTTPException(404, "Section not found")
 
-    # Determine neighbor
-    target_order = sec.order - 1 if direction == "up" else sec.order + 1
-
-    neighbor = db.query(Section).filter(
-        Section.project_id == project_id,
-        Section.order == target_order
-    ).first()
+    # Determine neighbor; orders have gaps, so it is the nearest one on that side
+    query = select(Section).where(Section.project_id == project_id)
+    if direction == "up":
+        query = query.where(Section.order < sec.order).order_by(Section.order.desc())
+    else:
+        query = query.where(Section.order > sec.order).order_by(Section.order)
+    neighbor = await db.scalar(query.limit(1))
 
     if not neighbor:
         # already at top or bottom
@@ -469,5 +1343,62 @@ def move_section(
     # Swap order values
     sec.order, neighbor.order = neighbor.order, sec.order
 
-    db.commit()
+    await db.commit()
     return {"message": "reordered"}
+
+
+@router.post("/{project_id}/sections/{section_id}/position", response_model=SectionResponse)
+async def position_section(
+    project_id: int,
+    section_id: int,
+    after_id: int = Query(None, description="Place the section right after this one; omit to move it to the top"),
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Move a section anywhere in the project. Usually only the moved row is
+    written: it takes an order between its new neighbours. If they have no
+    room left between them the project is renumbered first.
+    """
+    sec = await db.scalar(select(Section).join(Project).where(
+        Section.id == section_id,
+        Project.id == project_id,
+        Project.user_id == user_id
+    ))
+
+    if not sec:
+        raise HTTPException(404, "Section not found")
+    if after_id == section_id:
+        raise HTTPException(400, "A section cannot be placed after itself")
+
+    before = None
+    if after_id is not None:
+        before = await db.scalar(select(Section.order).where(
+            Section.id == after_id,
+            Section.project_id == project_id
+        ))
+        if before is None:
+            raise HTTPException(404, "Section not found")
+
+    query = select(func.min(Section.order)).where(Section.project_id == project_id, Section.id != section_id)
+    if before is not None:
+        query = query.where(Section.order > before)
+    after = await db.scalar(query)
+
+    order = order_between(before, after)
+    if order is None:
+        others = list(await db.scalars(
+            select(Section.id).where(Section.project_id == project_id, Section.id != section_id)
+            .order_by(Section.order, Section.id)
+        ))
+        at = others.index(after_id) + 1
+        await db.execute(reorder_statement(project_id, others[:at] + [section_id] + others[at:]))
+    else:
+        await db.execute(
+            update(Section).where(Section.id == section_id).values(order=order)
+            .execution_options(synchronize_session=False)
+        )
+
+    await db.commit()
+    await db.refresh(sec)
+    return sec
@@ -1 +1,8 @@
-from .project import ProjectCreate, ProjectContentUpdate, ProjectResponse
+from .project import (
+    ProjectCreate, ProjectUpdate, BulkExportRequest, SectionOrder, SectionEdit, SectionBatchEdit,
+    MessageResponse, CommentResponse, SectionResponse, SectionPosition, SectionOrderResponse,
+    SectionBatchResponse, SectionDetailResponse, ProjectResponse, ProjectDetailResponse,
+    ProjectSummary, ProjectPage, FeedbackItem, FeedbackBatch, FeedbackResponse,
+    SectionFeedback, FeedbackBatchResponse, HistoryItem, HistoryPage, SearchHit,
+    SearchResults
+)
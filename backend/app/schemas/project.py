@@ -1,22 +1,171 @@
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 
+
+# ----------------------------- REQUESTS ---------------------------------------
+
 class ProjectCreate(BaseModel):
-    title: str
-    doc_type: str
+    name: str
     main_topic: str
-    structure: List[str]
+    doc_type: str
 
-class ProjectContentUpdate(BaseModel):
-    section_index: int
-    new_content: str
 
-class ProjectResponse(BaseModel):
+class ProjectUpdate(BaseModel):
+    name: Optional[str] = None
+    main_topic: Optional[str] = None
+    doc_type: Optional[str] = None
+
+
+class BulkExportRequest(BaseModel):
+    project_ids: List[int]
+    format: str = "docx"
+
+
+class SectionOrder(BaseModel):
+    section_ids: List[int]  # every section of the project, in the new display order
+
+
+class SectionEdit(BaseModel):
     id: int
+    title: Optional[str] = None
+    content: Optional[str] = None
+    expected_version: Optional[int] = None  # 409 for the whole batch if the section is no longer at this version
+
+
+class SectionBatchEdit(BaseModel):
+    items: List[SectionEdit]
+
+
+# ----------------------------- RESPONSES --------------------------------------
+
+class MessageResponse(BaseModel):
+    message: str
+
+
+class SectionResponse(BaseModel):
+    id: int
+    project_id: int
     title: str
+    content: Optional[str] = None
+    order: int
+    version: int
+    likes: Optional[int] = 0
+    dislikes: Optional[int] = 0
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SectionPosition(BaseModel):
+    id: int
+    order: int
+
+
+class SectionOrderResponse(BaseModel):
+    sections: List[SectionPosition]
+
+
+class SectionBatchResponse(BaseModel):
+    sections: List[SectionResponse]
+
+
+class CommentResponse(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    text: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SectionDetailResponse(SectionResponse):
+    comments: List[CommentResponse] = []
+
+
+class ProjectResponse(BaseModel):
+    id: int
+    name: Optional[str] = None
+    main_topic: Optional[str] = None
     doc_type: str
-    main_topic: str
-    structure_json: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ProjectDetailResponse(ProjectResponse):
+    sections: List[SectionDetailResponse] = []
+
+
+class ProjectSummary(BaseModel):
+    id: int
+    name: Optional[str] = None
+    main_topic: Optional[str] = None
+    doc_type: str
+    section_count: int
+    created_at: Optional[datetime] = None
+    last_modified: Optional[datetime] = None
+
+
+class ProjectPage(BaseModel):
+    items: List[ProjectSummary]
+    next_cursor: Optional[str] = None
+
+
+class FeedbackItem(BaseModel):
+    section_id: int
+    like: Optional[bool] = None  # True = like, False = dislike, None = comment only
+    comment: Optional[str] = None
+
+
+class FeedbackBatch(BaseModel):
+    items: List[FeedbackItem]
+
+
+class FeedbackResponse(BaseModel):
+    likes: int
+    dislikes: int
+
+
+class SectionFeedback(BaseModel):
+    section_id: int
+    likes: int
+    dislikes: int
+
+
+class FeedbackBatchResponse(BaseModel):
+    sections: List[SectionFeedback]
+
+
+class HistoryItem(BaseModel):
+    """A section revision; list endpoints only fill the fields that were asked for."""
+    id: Optional[int] = None
+    section_id: Optional[int] = None
+    section_title: Optional[str] = None
+    version: Optional[int] = None
+    action: Optional[str] = None
+    prompt: Optional[str] = None
+    timestamp: Optional[float] = None
+    user_id: Optional[int] = None
+    old: Optional[str] = None
+    new: Optional[str] = None
+
+
+class HistoryPage(BaseModel):
+    items: List[HistoryItem]
+    next_cursor: Optional[str] = None
+
+
+class SearchHit(BaseModel):
+    type: str  # 'project' | 'section'
+    project_id: int
+    project_name: Optional[str] = None
+    section_id: Optional[int] = None
+    title: str
+    snippet: str
+    score: float
+
 
-    class Config:
-        orm_mode = True
+class SearchResults(BaseModel):
+    items: List[SearchHit]
@@ -1,48 +1,44 @@
-import requests
-from app.config import GOOGLE_API_KEY, MODEL_NAME, API_VERSION
+from app.llm_client import LLMClient, run_llm
 
 
-API_URL = f"https://generativelanguage.googleapis.com/{API_VERSION}/{MODEL_NAME}:generateContent"
+# Same provider, cache, scheduler and circuit breaker as the routes
+llm = LLMClient()
 
 
 
 
 def call_gemini(prompt: str) -> str:
-    payload = {
-        "contents": [
-            {"parts": [{"text": prompt}]}
-            ]
-    }
-    params = {"key": GOOGLE_API_KEY}
-    resp = requests.post(API_URL, json=payload, params=params, timeout=60)
-    data = resp.json()
-    # helpful debug when something's wrong
-    if resp.status_code != 200:
-        raise Exception(f"Gemini API Error: status={resp.status_code} data={data}")
+    return llm.complete(prompt)
 
 
-    if "candidates" not in data:
-        raise Exception(f"Gemini API Error: unexpected response: {data}")
-    return data["candidates"][0]["content"]["parts"][0]["text"]
+async def call_gemini_async(prompt: str) -> str:
+    return await run_llm(llm.complete, prompt)
 
 
 
 
-def generate_section_content(main_topic: str, section_title: str) -> str:
-    prompt = f"""
+def _section_prompt(main_topic: str, section_title: str) -> str:
+    return f"""
 Generate professional structured content.
 
 
 Main Topic: {main_topic}
 Section: {section_title}
 """
-    return call_gemini(prompt)
 
 
+def generate_section_content(main_topic: str, section_title: str) -> str:
+    return call_gemini(_section_prompt(main_topic, section_title))
 
 
-def refine_content(existing_text: str, instruction: str) -> str:
-    prompt = f"""
+async def generate_section_content_async(main_topic: str, section_title: str) -> str:
+    return await call_gemini_async(_section_prompt(main_topic, section_title))
+
+
+
+
+def _refine_prompt(existing_text: str, instruction: str) -> str:
+    return f"""
 Instruction: {instruction}
 
 
@@ -51,7 +47,12 @@ Original text:
 
 
 Rewrite professionally.
-""" 
-    return call_gemini(prompt)
+"""
+
+
+def refine_content(existing_text: str, instruction: str) -> str:
+    return call_gemini(_refine_prompt(existing_text, instruction))
 
 
+async def refine_content_async(existing_text: str, instruction: str) -> str:
+    return await call_gemini_async(_refine_prompt(existing_text, instruction))
@@ -0,0 +1,152 @@
+# app/services/history_service.py
+import hashlib
+import os
+import time
+from sqlalchemy import select, update
+from app.models import Section, SectionRevision
+from app.utils.text_delta import apply_delta, make_delta
+
+# A full copy of the text is stored at least every N revisions, so rebuilding
+# any version replays at most N-1 deltas.
+REVISION_SNAPSHOT_EVERY = int(os.getenv("REVISION_SNAPSHOT_EVERY", "20"))
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+def record_history(db, section_id: int, action: str, prompt: str, old: str, new: str, user_id: int,
+                   timestamp: float = None):
+    """
+    Append a revision row for the section. Only the latest row's bookkeeping
+    columns are read, so the cost does not depend on how many revisions exist.
+    """
+    old, new = old or "", new or ""
+
+    last = db.query(
+        SectionRevision.seq, SectionRevision.base_seq, SectionRevision.new_hash
+    ).filter(
+        SectionRevision.section_id == section_id
+    ).order_by(SectionRevision.seq.desc()).first()
+
+    seq = last.seq + 1 if last else 1
+
+    # Chain onto the previous revision only if it ended where this one starts
+    # (the text may have been edited by hand in between).
+    if last and last.new_hash == text_hash(old) and seq - last.base_seq < REVISION_SNAPSHOT_EVERY:
+        base_seq, snapshot, delta = last.base_seq, None, make_delta(old, new)
+    else:
+        base_seq, snapshot, delta = seq, new, make_delta(new, old)
+
+    db.add(SectionRevision(
+        section_id=section_id,
+        user_id=user_id,
+        seq=seq,
+        base_seq=base_seq,
+        action=action,
+        prompt=prompt,
+        timestamp=timestamp if timestamp is not None else time.time(),
+        snapshot=snapshot,
+        delta=delta,
+        new_hash=text_hash(new)
+    ))
+    db.flush()
+
+
+def save_section_text(db, section_id: int, expected_version: int, action: str, prompt: str, new: str,
+                      user_id: int):
+    """
+    Store LLM output on a section and record the revision, unless the
+    section changed (or was deleted) since `expected_version` was read.
+    Meant to run as its own short transaction after the LLM call; the caller
+    commits. Returns the new version, or None on a conflict. Text identical
+    to the stored content is not written and records no revision.
+    """
+    row = db.execute(select(Section.content).where(
+        Section.id == section_id,
+        Section.version == expected_version
+    )).first()
+    if row is None:
+        return None
+    old = row.content
+    if old == new:
+        return expected_version
+
+    # the version check in the UPDATE is what guards against a concurrent writer
+    result = db.execute(
+        update(Section).where(
+            Section.id == section_id,
+            Section.version == expected_version
+        ).values(
+            content=new,
+            version=expected_version + 1
+        ).execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return None
+
+    record_history(db, section_id, action, prompt, old, new, user_id)
+    return expected_version + 1
+
+
+def decode_revisions(revisions):
+    """
+    Yield (revision, old, new) for revisions of one section, given in seq
+    order and starting at a snapshot row.
+    """
+    new = None
+    for rev in revisions:
+        if rev.snapshot is not None:
+            new = rev.snapshot
+            old = apply_delta(new, rev.delta)
+        else:
+            old = new
+            new = apply_delta(old, rev.delta)
+        yield rev, old, new
+
+
+def get_revision(db, section_id: int, seq: int):
+    """
+    Rebuild a single revision. Returns (revision, old, new), or None if the
+    section has no revision with that number.
+    """
+    rev = db.query(SectionRevision).filter(
+        SectionRevision.section_id == section_id,
+        SectionRevision.seq == seq
+    ).first()
+
+    if not rev:
+        return None
+
+    chain = db.query(SectionRevision).filter(
+        SectionRevision.section_id == section_id,
+        SectionRevision.seq.between(rev.base_seq, seq)
+    ).order_by(SectionRevision.seq).all()
+
+    *_, last = decode_revisions(chain)
+    return last
+
+
+def revision_texts(db, revisions):
+    """
+    Rebuild old/new text for an arbitrary set of revisions, e.g. one page of
+    history. Each section's chain is replayed once for the whole set.
+    Returns {revision id: (old, new)}.
+    """
+    wanted = {}
+    for rev in revisions:
+        wanted.setdefault(rev.section_id, []).append(rev)
+
+    texts = {}
+    for section_id, revs in wanted.items():
+        ids = {rev.id for rev in revs}
+        chain = db.query(SectionRevision).filter(
+            SectionRevision.section_id == section_id,
+            SectionRevision.seq.between(min(r.base_seq for r in revs), max(r.seq for r in revs))
+        ).order_by(SectionRevision.seq).all()
+
+        for rev, old, new in decode_revisions(chain):
+            if rev.id in ids:
+                texts[rev.id] = (old, new)
+
+    return texts
@@ -0,0 +1,241 @@
+# app/services/job_service.py
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+
+from app.database import SessionLocal
+from app.llm_client import fan_out
+from app.models import GenerationJob, GenerationJobItem, Project, Section
+from app.services.history_service import save_section_text
+
+logger = logging.getLogger(__name__)
+
+# Number of jobs processed at the same time; sections inside a job are
+# additionally fanned out up to LLM_MAX_CONCURRENCY.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# A running job belongs to the worker holding its lease. The worker renews
+# it every JOB_LEASE_SECONDS / 3; a job whose lease is older than
+# JOB_LEASE_SECONDS is assumed abandoned and re-queued by the sweeper.
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+
+# identifies this process in generation_jobs.owner
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="generation-job")
+_sweeper_stop = threading.Event()
+
+# jobs waiting in or running on _executor, so a sweep doesn't submit them twice
+_enqueued = set()
+_enqueued_lock = threading.Lock()
+
+
+def enqueue_job(job_id: int, llm):
+    with _enqueued_lock:
+        if job_id in _enqueued:
+            return
+        _enqueued.add(job_id)
+    _executor.submit(_run_enqueued, job_id, llm)
+
+
+def _run_enqueued(job_id: int, llm):
+    try:
+        run_job(job_id, llm)
+    finally:
+        with _enqueued_lock:
+            _enqueued.discard(job_id)
+
+
+def _lease_expired(now: datetime):
+    return or_(
+        GenerationJob.heartbeat_at.is_(None),
+        GenerationJob.heartbeat_at < now - timedelta(seconds=JOB_LEASE_SECONDS)
+    )
+
+
+def resume_jobs(llm):
+    """
+    Re-queue queued jobs, and running jobs whose worker has stopped renewing
+    its lease. Sections that already finished are kept; interrupted ones
+    start over. Jobs still leased by a live worker, or already waiting on
+    this process's executor, are left alone.
+    """
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        job_ids = list(db.scalars(select(GenerationJob.id).where(GenerationJob.status == "queued")))
+        expired = list(db.scalars(select(GenerationJob.id).where(
+            GenerationJob.status == "running", _lease_expired(now)
+        )))
+
+        for job_id in expired:
+            # conditional, so two sweepers can't both take over the same job
+            released = db.execute(
+                update(GenerationJob)
+                .where(GenerationJob.id == job_id, GenerationJob.status == "running", _lease_expired(now))
+                .values(status="queued", owner=None, heartbeat_at=None)
+            ).rowcount
+            if released:
+                db.execute(
+                    update(GenerationJobItem)
+                    .where(GenerationJobItem.job_id == job_id, GenerationJobItem.status == "running")
+                    .values(status="pending")
+                )
+                job_ids.append(job_id)
+            db.commit()
+    finally:
+        db.close()
+
+    for job_id in job_ids:
+        logger.info("resuming generation job %s", job_id)
+        enqueue_job(job_id, llm)
+
+
+def start_job_sweeper(llm):
+    """Resume jobs now, then keep picking up jobs whose lease has run out."""
+    resume_jobs(llm)
+
+    def sweep():
+        while not _sweeper_stop.wait(JOB_LEASE_SECONDS):
+            try:
+                resume_jobs(llm)
+            except Exception:
+                logger.exception("generation job sweep failed")
+
+    _sweeper_stop.clear()
+    threading.Thread(target=sweep, name="generation-job-sweeper", daemon=True).start()
+
+
+def stop_job_sweeper():
+    _sweeper_stop.set()
+
+
+def _claim(db, job_id: int) -> bool:
+    """Take the lease on a job; False if another worker holds a live one or the job is finished."""
+    now = datetime.utcnow()
+    claimed = db.execute(
+        update(GenerationJob)
+        .where(
+            GenerationJob.id == job_id,
+            or_(
+                GenerationJob.status == "queued",
+                and_(GenerationJob.status == "running", _lease_expired(now))
+            )
+        )
+        .values(status="running", owner=WORKER_ID, heartbeat_at=now)
+    ).rowcount
+    db.commit()
+    return bool(claimed)
+
+
+def _heartbeat(job_id: int, stop: threading.Event):
+    """Renew the lease on job_id until stop is set."""
+    while not stop.wait(JOB_LEASE_SECONDS / 3):
+        db = SessionLocal()
+        try:
+            renewed = db.execute(
+                update(GenerationJob)
+                .where(GenerationJob.id == job_id, GenerationJob.owner == WORKER_ID)
+                .values(heartbeat_at=datetime.utcnow())
+            ).rowcount
+            db.commit()
+            if not renewed:
+                logger.warning("lost the lease on generation job %s", job_id)
+                return
+        except Exception:
+            logger.exception("could not renew the lease on generation job %s", job_id)
+        finally:
+            db.close()
+
+
+def run_job(job_id: int, llm):
+    db = SessionLocal()
+    try:
+        if not _claim(db, job_id):
+            return
+        job = db.get(GenerationJob, job_id)
+
+        project = db.get(Project, job.project_id)
+        if not project:
+            job.status = "failed"
+            job.error = "Project not found"
+            job.owner = None
+            db.commit()
+            return
+
+        main_topic, fresh, user_id = project.main_topic, job.fresh, job.user_id
+        item_ids = [item.id for item in job.items if item.status != "done"]
+        db.commit()
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=_heartbeat, args=(job_id, stop), daemon=True)
+        heartbeat.start()
+        try:
+            fan_out(lambda item_id: _run_item(item_id, main_topic, fresh, user_id, llm), item_ids)
+        finally:
+            stop.set()
+
+        db.expire_all()
+        if job.owner != WORKER_ID:
+            # the lease ran out and another worker has the job now
+            return
+        failed = [item for item in job.items if item.status == "failed"]
+        job.status = "failed" if failed else "done"
+        job.error = f"{len(failed)} section(s) failed" if failed else None
+        job.owner = None
+        db.commit()
+    except Exception as e:
+        logger.exception("generation job %s crashed", job_id)
+        db.rollback()
+        job = db.get(GenerationJob, job_id)
+        if job and job.owner == WORKER_ID:
+            job.status = "failed"
+            job.error = str(e)
+            job.owner = None
+            db.commit()
+    finally:
+        db.close()
+
+
+def _run_item(item_id: int, main_topic: str, fresh: bool, user_id: int, llm):
+    db = SessionLocal()
+    try:
+        item = db.get(GenerationJobItem, item_id)
+        item.status = "running"
+        section_id = item.section_id
+        section = db.query(Section.title, Section.version).filter(
+            Section.id == section_id
+        ).first()
+        db.commit()
+
+        if not section:
+            item.status = "failed"
+            item.error = "Section not found"
+        else:
+            # no transaction is open while the model runs
+            try:
+                generated = llm.generate(main_topic, section.title, fresh=fresh, user_id=user_id)
+            except Exception as e:
+                item.status = "failed"
+                item.error = str(e)
+            else:
+                saved = save_section_text(
+                    db, section_id, section.version,
+                    "generate", f"generate {section.title}", generated, user_id
+                )
+                if saved is None:
+                    item.status = "failed"
+                    item.error = "Section was edited during generation"
+                else:
+                    item.status = "done"
+
+        item.finished_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
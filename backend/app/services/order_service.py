@@ -0,0 +1,46 @@
+# app/services/order_service.py
+"""
+Section ordering.
+
+Sections are kept ORDER_STEP apart (1024, 2048, ...), so moving one section
+between two others only rewrites the moved row: it takes the midpoint of
+its new neighbours. Only when two neighbours have run out of room between
+them is the whole project renumbered, which is one UPDATE.
+"""
+from sqlalchemy import case, update
+
+from app.models import Section
+
+ORDER_STEP = 1024
+
+
+def spaced_orders(section_ids):
+    """{section_id: order} for the ids in display order, ORDER_STEP apart."""
+    return {sid: (i + 1) * ORDER_STEP for i, sid in enumerate(section_ids)}
+
+
+def reorder_statement(project_id: int, section_ids):
+    """One UPDATE giving the project's sections evenly spaced orders in the given order."""
+    return update(Section).where(
+        Section.project_id == project_id,
+        Section.id.in_(section_ids)
+    ).values(
+        order=case(spaced_orders(section_ids), value=Section.id, else_=Section.order)
+    ).execution_options(synchronize_session=False)
+
+
+def order_between(before, after):
+    """
+    An order value strictly between two neighbours; None means no neighbour
+    on that side. Returns None when there is no free value left between them.
+    """
+    if before is None and after is None:
+        return ORDER_STEP
+    if after is None:
+        return before + ORDER_STEP
+    if before is None:
+        return after - ORDER_STEP
+    if after - before < 2:
+        return None
+    return (before + after) // 2
+
@@ -0,0 +1,150 @@
+# app/services/search_service.py
+"""
+Full-text search over project names/topics and section titles/content.
+
+Backed by the SQLite FTS5 table `search_index`, which triggers keep in step
+with the projects and sections tables, so a search never rebuilds anything.
+Row ids tell the two kinds apart: sections use id * 2, projects id * 2 + 1.
+The owner column holds a `u<user id>` token that every query matches too,
+so the full-text lookup itself only returns the searching user's rows.
+"""
+import html
+import re
+
+from sqlalchemy import text
+
+# private-use characters mark the matches inside snippets until they are
+# turned into <mark> tags after HTML-escaping the text around them
+_OPEN, _CLOSE = "\ue000", "\ue001"
+
+# title matches count more than body matches; the owner token, present in
+# all of a user's rows, doesn't count at all
+TITLE_WEIGHT, BODY_WEIGHT, OWNER_WEIGHT = 5.0, 1.0, 0.0
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        title, body, owner,
+        user_id UNINDEXED, project_id UNINDEXED, section_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_projects_ai AFTER INSERT ON projects BEGIN
+        INSERT INTO search_index (rowid, title, body, owner, user_id, project_id, section_id)
+        VALUES (new.id * 2 + 1, coalesce(new.name, ''), coalesce(new.main_topic, ''), 'u' || new.user_id, new.user_id, new.id, NULL);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_projects_au AFTER UPDATE OF name, main_topic ON projects BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+        INSERT INTO search_index (rowid, title, body, owner, user_id, project_id, section_id)
+        VALUES (new.id * 2 + 1, coalesce(new.name, ''), coalesce(new.main_topic, ''), 'u' || new.user_id, new.user_id, new.id, NULL);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_projects_ad AFTER DELETE ON projects BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_sections_ai AFTER INSERT ON sections BEGIN
+        INSERT INTO search_index (rowid, title, body, owner, user_id, project_id, section_id)
+        SELECT new.id * 2, coalesce(new.title, ''), coalesce(new.content, ''), 'u' || projects.user_id, projects.user_id, new.project_id, new.id
+        FROM projects WHERE projects.id = new.project_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_sections_au AFTER UPDATE OF title, content ON sections BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+        INSERT INTO search_index (rowid, title, body, owner, user_id, project_id, section_id)
+        SELECT new.id * 2, coalesce(new.title, ''), coalesce(new.content, ''), 'u' || projects.user_id, projects.user_id, new.project_id, new.id
+        FROM projects WHERE projects.id = new.project_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_sections_ad AFTER DELETE ON sections BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+    END
+    """,
+]
+
+SEARCH_TRIGGERS = [
+    "search_projects_ai", "search_projects_au", "search_projects_ad",
+    "search_sections_ai", "search_sections_au", "search_sections_ad",
+]
+
+REBUILD_SQL = [
+    "DELETE FROM search_index",
+    """
+    INSERT INTO search_index (rowid, title, body, owner, user_id, project_id, section_id)
+    SELECT id * 2 + 1, coalesce(name, ''), coalesce(main_topic, ''), 'u' || user_id, user_id, id, NULL FROM projects
+    """,
+    """
+    INSERT INTO search_index (rowid, title, body, owner, user_id, project_id, section_id)
+    SELECT sections.id * 2, coalesce(sections.title, ''), coalesce(sections.content, ''),
+           'u' || projects.user_id, projects.user_id, sections.project_id, sections.id
+    FROM sections JOIN projects ON projects.id = sections.project_id
+    """,
+]
+
+# Rank first and build snippets only for the rows that make the page:
+# snippet() is by far the most expensive part of a query with many matches.
+SEARCH_SQL = text(f"""
+    WITH hits AS (
+        SELECT rowid, bm25(search_index, {TITLE_WEIGHT}, {BODY_WEIGHT}, {OWNER_WEIGHT}) AS rank
+        FROM search_index
+        WHERE search_index MATCH :match AND user_id = :user_id
+        ORDER BY rank
+        LIMIT :limit
+    )
+    SELECT search_index.project_id, search_index.section_id, projects.name AS project_name,
+           snippet(search_index, 0, '{_OPEN}', '{_CLOSE}', '…', 12) AS title,
+           snippet(search_index, 1, '{_OPEN}', '{_CLOSE}', '…', 24) AS snippet,
+           hits.rank
+    FROM hits
+    JOIN search_index ON search_index.rowid = hits.rowid
+    JOIN projects ON projects.id = search_index.project_id
+    WHERE search_index MATCH :match
+    ORDER BY hits.rank
+""")
+
+
+def match_expression(q: str, user_id: int):
+    """
+    Turn free text into an FTS5 query for one user's rows: every word must
+    match the title or body, the last one as a prefix so results show up
+    while typing, and the owner column must hold the user's token. Words are
+    quoted, so FTS5 operators typed by the user are searched for literally.
+    Returns None if there is nothing to search for.
+    """
+    words = _TOKEN.findall(q or "")
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return f'owner : "u{int(user_id)}" AND {{title body}} : ({" ".join(terms)})'
+
+
+def highlight(snippet: str):
+    """HTML-escape a snippet and wrap the matched words in <mark>."""
+    return html.escape(snippet or "").replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+def create_search_index(db):
+    for statement in SEARCH_DDL:
+        db.execute(text(statement))
+
+
+def drop_search_index(db):
+    for trigger in SEARCH_TRIGGERS:
+        db.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    db.execute(text("DROP TABLE IF EXISTS search_index"))
+
+
+def rebuild_search_index(db):
+    for statement in REBUILD_SQL:
+        db.execute(text(statement))
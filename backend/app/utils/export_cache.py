@@ -0,0 +1,147 @@
+# app/utils/export_cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from fastapi.responses import FileResponse
+
+# ----------------------------
+# CACHE CONFIG
+# ----------------------------
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", "./export_cache")
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Bump when the rendering code changes so old files stop matching.
+RENDER_VERSION = 1
+
+
+def fingerprint(project, sections, fmt: str) -> str:
+    """Hash of everything that ends up in the exported file."""
+    payload = json.dumps([
+        RENDER_VERSION,
+        fmt,
+        project.name,
+        project.main_topic,
+        [(s.title, s.content) for s in sorted(sections, key=lambda s: s.order)],
+    ], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+class ExportCache:
+    """
+    Rendered export files on local disk, named by content fingerprint.
+    Least recently used files are removed once the directory grows past
+    max_bytes.
+
+    get() and get_or_render() hand out pinned paths: eviction skips a file
+    while anyone holds a pin on it, so it can't disappear between being
+    returned and being read. Every returned path must be given back with
+    release().
+    """
+
+    def __init__(self, directory: str = EXPORT_CACHE_DIR, max_bytes: int = EXPORT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._pins = {}  # path -> number of readers holding it
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def _pin(self, path: str):
+        self._pins[path] = self._pins.get(path, 0) + 1
+
+    def release(self, path: str):
+        with self._lock:
+            count = self._pins.get(path, 0) - 1
+            if count > 0:
+                self._pins[path] = count
+            else:
+                self._pins.pop(path, None)
+
+    def pinned(self, path: str) -> bool:
+        with self._lock:
+            return path in self._pins
+
+    def get(self, key: str, ext: str):
+        """The cached file's path, pinned, or None on a miss."""
+        path = self.path_for(key, ext)
+        with self._lock:
+            try:
+                os.utime(path)  # mark as recently used
+            except FileNotFoundError:
+                return None
+            self._pin(path)
+        return path
+
+    def get_or_render(self, key: str, ext: str, render) -> str:
+        """Return the cached file path (pinned), calling render(path) to produce it on a miss."""
+        path = self.get(key, ext)
+        if path:
+            return path
+
+        path = self.path_for(key, ext)
+        # pinned before it exists, so no eviction can slip in between
+        # the rename and the caller opening it
+        with self._lock:
+            self._pin(path)
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+            os.close(fd)
+            try:
+                render(tmp)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except BaseException:
+            self.release(path)
+            raise
+
+        self.evict()
+        return path
+
+    def evict(self):
+        """Remove least recently used unpinned files until the directory fits max_bytes."""
+        with self._lock:
+            files, total = [], 0
+            for entry in os.scandir(self.directory):
+                if not entry.is_file() or entry.name.endswith(".part"):
+                    continue
+                st = entry.stat()
+                total += st.st_size
+                if entry.path not in self._pins:
+                    files.append((st.st_mtime, st.st_size, entry.path))
+
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+class CachedFileResponse(FileResponse):
+    """FileResponse for a pinned cache path; the pin is released once sending ends, however it ends."""
+
+    def __init__(self, cache: ExportCache, path: str, **kwargs):
+        super().__init__(path, **kwargs)
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.cache.release(self.path)
@@ -1,11 +1,33 @@
 # app/utils/export_utils.py
+from concurrent.futures import ProcessPoolExecutor
 from docx import Document
-from fastapi.responses import StreamingResponse
-import io
+from types import SimpleNamespace
+import multiprocessing
+import os
+import threading
+import zipfile
 from pptx import Presentation
 from pptx.util import Pt
+from app.utils.ooxml_writer import stream_docx, stream_pptx
 
-def assemble_docx(project, sections):
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+PPTX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+# Processes used for rendering; 0 renders in the calling thread instead.
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+
+
+def format_extension(fmt: str):
+    return fmt.split("-")[0]
+
+
+def export_filename(project, ext: str):
+    fallback = "project" if ext == "docx" else "presentation"
+    return f"{project.name or fallback}".replace(" ", "_") + f".{ext}"
+
+
+def render_docx(project, sections, out):
+    """Write the project as a .docx into the binary file-like `out`."""
     doc = Document()
     doc.add_heading(project.name or "Document", level=1)
     if project.main_topic:
@@ -13,15 +35,11 @@ def assemble_docx(project, sections):
     for sec in sorted(sections, key=lambda s: s.order):
         doc.add_heading(sec.title, level=2)
         p = doc.add_paragraph(sec.content or "")
-    buf = io.BytesIO()
-    doc.save(buf)
-    buf.seek(0)
-    filename = f"{project.name or 'project'}".replace(" ", "_") + ".docx"
-    return StreamingResponse(buf,
-                             media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                             headers={"Content-Disposition": f"attachment; filename={filename}"})
-
-def assemble_pptx(project, sections):
+    doc.save(out)
+
+
+def render_pptx(project, sections, out):
+    """Write the project as a .pptx into the binary file-like `out`."""
     prs = Presentation()
     title_slide = prs.slide_layouts[0]
     s = prs.slides.add_slide(title_slide)
@@ -39,10 +57,139 @@ def assemble_pptx(project, sections):
             p = tf.add_paragraph()
             p.text = para
             p.level = 0
-    buf = io.BytesIO()
-    prs.save(buf)
-    buf.seek(0)
-    filename = f"{project.name or 'presentation'}".replace(" ", "_") + ".pptx"
-    return StreamingResponse(buf,
-                             media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-                             headers={"Content-Disposition": f"attachment; filename={filename}"})
+    prs.save(out)
+
+
+# format query value -> renderer; "-stream" variants use the direct OOXML writer
+RENDERERS = {
+    "docx": render_docx,
+    "pptx": render_pptx,
+    "docx-stream": stream_docx,
+    "pptx-stream": stream_pptx,
+}
+
+MEDIA_TYPES = {
+    "docx": DOCX_MEDIA_TYPE,
+    "pptx": PPTX_MEDIA_TYPE,
+}
+
+
+# ----------------------------- PROCESS POOL -----------------------------------
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the API process runs threads whose locks a fork would copy
+            _pool = ProcessPoolExecutor(
+                max_workers=EXPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown_export_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _render_file(fmt, project, sections, path):
+    RENDERERS[fmt](project, sections, path)
+
+
+def render_export(fmt, project, sections, path):
+    """
+    Render the project into the file at `path` on the export process pool,
+    so the lxml work doesn't compete with request handling. Only plain
+    copies of the rows cross the process boundary.
+    """
+    project = SimpleNamespace(name=project.name, main_topic=project.main_topic)
+    sections = [
+        SimpleNamespace(title=s.title, content=s.content, order=s.order)
+        for s in sections
+    ]
+
+    if EXPORT_WORKERS <= 0:
+        return _render_file(fmt, project, sections, path)
+
+    _get_pool().submit(_render_file, fmt, project, sections, path).result()
+
+
+# ----------------------------- ZIP STREAMING ----------------------------------
+
+class _ZipSink:
+    """Write-only, non-seekable target for ZipFile that hands back what was written."""
+
+    def __init__(self):
+        self._chunks = []
+        self._pos = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(members, chunk_size: int = 64 * 1024):
+    """
+    Build a ZIP archive incrementally and yield it as byte chunks.
+    `members` yields (arcname, source) where source is a path, an open
+    binary file or bytes; each is pulled only when the previous one has
+    been sent, so the archive is never held in memory. Members are stored,
+    not re-compressed, since DOCX/PPTX are zip files already.
+
+    If reading a file fails partway, that member is cut short and, when
+    `members` is a generator, the OSError is thrown into it so it can
+    record the failure and carry on with the next member.
+    """
+    members = iter(members)
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as zf:
+        member = next(members, None)
+        while member is not None:
+            arcname, source = member
+            try:
+                if isinstance(source, bytes):
+                    zf.writestr(arcname, source)
+                elif isinstance(source, str):
+                    with open(source, "rb") as src:
+                        yield from _copy_member(zf, sink, arcname, src, chunk_size)
+                else:
+                    yield from _copy_member(zf, sink, arcname, source, chunk_size)
+            except OSError as e:
+                if not hasattr(members, "throw"):
+                    raise
+                yield sink.drain()
+                try:
+                    member = members.throw(e)
+                except StopIteration:
+                    member = None
+                continue
+            yield sink.drain()
+            member = next(members, None)
+    yield sink.drain()
+
+
+def _copy_member(zf, sink, arcname: str, src, chunk_size: int):
+    with zf.open(arcname, "w", force_zip64=True) as dest:
+        while chunk := src.read(chunk_size):
+            dest.write(chunk)
+            yield sink.drain()
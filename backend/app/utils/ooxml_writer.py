@@ -0,0 +1,203 @@
+# app/utils/ooxml_writer.py
+"""
+Streaming DOCX/PPTX writer.
+
+Produces the same headings, paragraphs and title/content slides as
+render_docx/render_pptx in export_utils.py, but writes the XML parts
+straight into the zip instead of building a python-docx/python-pptx object
+model. The untouched parts of the default templates (styles, theme, slide
+master and layouts) are loaded once per process and copied as-is.
+"""
+import io
+import re
+import zipfile
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from docx import Document
+from pptx import Presentation
+
+# characters XML 1.0 cannot represent; python-docx would reject them
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+SLIDE_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+SLIDE_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide"
+LAYOUT_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/slideLayout"
+
+
+# python-pptx keeps control characters by writing them as _xHHHH_ escapes
+_PPTX_CONTROL = re.compile("[\x00-\x08\x0b-\x1f]")
+
+
+def _pptx_text(text: str) -> str:
+    return escape(_PPTX_CONTROL.sub(lambda m: f"_x{ord(m.group()):04X}_", text or ""))
+
+
+# ----------------------------- TEMPLATES --------------------------------------
+
+def _package_parts(save):
+    buf = io.BytesIO()
+    save(buf)
+    with zipfile.ZipFile(buf) as zf:
+        return [(name, zf.read(name)) for name in zf.namelist()]
+
+
+@lru_cache(maxsize=None)
+def _docx_template():
+    parts = _package_parts(Document().save)
+    document = dict(parts)["word/document.xml"].decode("utf-8")
+
+    head = document[:document.index("<w:body>") + len("<w:body>")]
+    tail = document[document.index("<w:sectPr"):]
+    others = [(name, data) for name, data in parts if name != "word/document.xml"]
+    return head, tail, others
+
+
+@lru_cache(maxsize=None)
+def _pptx_template():
+    return _package_parts(Presentation().save)
+
+
+# ----------------------------- DOCX -------------------------------------------
+
+def _docx_run(text: str) -> str:
+    """Mirror python-docx's run.text: tabs and line breaks become elements."""
+    pieces = []
+    for chunk in re.split(r"([\t\r\n])", _INVALID_XML.sub("", text)):
+        if chunk == "\t":
+            pieces.append("<w:tab/>")
+        elif chunk in ("\r", "\n"):
+            pieces.append("<w:br/>")
+        elif chunk:
+            space = ' xml:space="preserve"' if chunk != chunk.strip() else ""
+            pieces.append(f"<w:t{space}>{escape(chunk)}</w:t>")
+    return f"<w:r>{''.join(pieces)}</w:r>"
+
+
+def _docx_paragraph(text: str, style: str = None) -> str:
+    ppr = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    if not text and not ppr:
+        return "<w:p/>"
+    run = _docx_run(text) if text else ""
+    return f"<w:p>{ppr}{run}</w:p>"
+
+
+def stream_docx(project, sections, out):
+    """Write the project as a .docx into `out` (path or binary file-like)."""
+    head, tail, others = _docx_template()
+
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in others:
+            zf.writestr(name, data)
+
+        with zf.open("word/document.xml", "w") as doc:
+            doc.write(head.encode("utf-8"))
+            doc.write(_docx_paragraph(project.name or "Document", "Heading1").encode("utf-8"))
+            if project.main_topic:
+                doc.write(_docx_paragraph(f"Topic: {project.main_topic}").encode("utf-8"))
+            for sec in sorted(sections, key=lambda s: s.order):
+                doc.write(_docx_paragraph(sec.title, "Heading2").encode("utf-8"))
+                doc.write(_docx_paragraph(sec.content or "").encode("utf-8"))
+            doc.write(tail.encode("utf-8"))
+
+
+# ----------------------------- PPTX -------------------------------------------
+
+_SLIDE_HEAD = (
+    "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+    '<p:sld xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<p:cSld><p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/>'
+    "</p:nvGrpSpPr><p:grpSpPr/>"
+)
+_SLIDE_TAIL = "</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>"
+
+
+def _shape(shape_id: int, name: str, ph: str, paragraphs: str) -> str:
+    return (
+        f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="{name}"/>'
+        '<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr>'
+        f"<p:nvPr>{ph}</p:nvPr></p:nvSpPr><p:spPr/>"
+        f"<p:txBody><a:bodyPr/><a:lstStyle/>{paragraphs}</p:txBody></p:sp>"
+    )
+
+
+def _text_paragraph(text: str, ppr: str = "") -> str:
+    if not text:
+        return f"<a:p>{ppr}</a:p>" if ppr else "<a:p/>"
+    return f"<a:p>{ppr}<a:r><a:t>{_pptx_text(text)}</a:t></a:r></a:p>"
+
+
+def _title_slide(title: str, subtitle: str) -> str:
+    return (
+        _SLIDE_HEAD
+        + _shape(2, "Title 1", '<p:ph type="ctrTitle"/>', _text_paragraph(title))
+        + _shape(3, "Subtitle 2", '<p:ph type="subTitle" idx="1"/>', _text_paragraph(subtitle))
+        + _SLIDE_TAIL
+    )
+
+
+def _content_slide(title: str, content: str) -> str:
+    # python-pptx starts the body with an empty paragraph and appends one per line
+    body = "<a:p/>" + "".join(_text_paragraph(line, "<a:pPr/>") for line in content.split("\n"))
+    return (
+        _SLIDE_HEAD
+        + _shape(2, "Title 1", '<p:ph type="title"/>', _text_paragraph(title))
+        + _shape(3, "Content Placeholder 2", '<p:ph idx="1"/>', body)
+        + _SLIDE_TAIL
+    )
+
+
+def _slide_rels(layout: str) -> str:
+    return (
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{LAYOUT_REL_TYPE}" Target="../slideLayouts/{layout}"/>'
+        "</Relationships>"
+    )
+
+
+def stream_pptx(project, sections, out):
+    """Write the project as a .pptx into `out` (path or binary file-like)."""
+    slides = [(project.name or "Presentation", project.main_topic or "", "slideLayout1.xml")]
+    slides += [
+        (sec.title, sec.content or "", "slideLayout2.xml")
+        for sec in sorted(sections, key=lambda s: s.order)
+    ]
+
+    parts = dict(_pptx_template())
+    rels = parts["ppt/_rels/presentation.xml.rels"].decode("utf-8")
+    first_rid = max(int(n) for n in re.findall(r'Id="rId(\d+)"', rels)) + 1
+    rids = [f"rId{first_rid + i}" for i in range(len(slides))]
+
+    rels = rels.replace("</Relationships>", "".join(
+        f'<Relationship Id="{rid}" Type="{SLIDE_REL_TYPE}" Target="slides/slide{n}.xml"/>'
+        for n, rid in enumerate(rids, start=1)
+    ) + "</Relationships>")
+
+    presentation = parts["ppt/presentation.xml"].decode("utf-8").replace(
+        "</p:sldMasterIdLst>",
+        "</p:sldMasterIdLst><p:sldIdLst>" + "".join(
+            f'<p:sldId id="{256 + i}" r:id="{rid}"/>' for i, rid in enumerate(rids)
+        ) + "</p:sldIdLst>",
+        1
+    )
+
+    content_types = parts["[Content_Types].xml"].decode("utf-8").replace("</Types>", "".join(
+        f'<Override PartName="/ppt/slides/slide{n}.xml" ContentType="{SLIDE_CONTENT_TYPE}"/>'
+        for n in range(1, len(slides) + 1)
+    ) + "</Types>")
+
+    parts["ppt/_rels/presentation.xml.rels"] = rels.encode("utf-8")
+    parts["ppt/presentation.xml"] = presentation.encode("utf-8")
+    parts["[Content_Types].xml"] = content_types.encode("utf-8")
+
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in parts.items():
+            zf.writestr(name, data)
+
+        for n, (title, text, layout) in enumerate(slides, start=1):
+            xml = _title_slide(title, text) if n == 1 else _content_slide(title, text)
+            zf.writestr(f"ppt/slides/slide{n}.xml", xml)
+            zf.writestr(f"ppt/slides/_rels/slide{n}.xml.rels", _slide_rels(layout))
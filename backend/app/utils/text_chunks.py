@@ -0,0 +1,71 @@
+# app/utils/text_chunks.py
+"""
+Splitting long section text into pieces that can be sent to the model
+separately and put back together exactly.
+
+split_chunks(text, max_tokens) returns (chunks, separators) with
+    chunks[0] + separators[0] + chunks[1] + ... + chunks[-1] == text
+Chunks break at paragraph boundaries (blank lines); a single paragraph
+longer than the limit is broken between sentences instead.
+"""
+import re
+
+# blank-line paragraph breaks, and whitespace after a sentence end
+_PARAGRAPH_BREAK = re.compile(r"(\n[ \t]*\n\s*)")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])(\s+)")
+
+# rough average for English prose; only used to size chunks
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _pieces(text: str, pattern):
+    """Split text on pattern into [(piece, separator_after), ...]; the last separator is ''."""
+    parts = pattern.split(text)
+    return [(parts[i], parts[i + 1] if i + 1 < len(parts) else "") for i in range(0, len(parts), 2)]
+
+
+def _units(text: str, max_tokens: int):
+    """Paragraphs, with any paragraph over max_tokens broken into sentences."""
+    units = []
+    for paragraph, sep in _pieces(text, _PARAGRAPH_BREAK):
+        if estimate_tokens(paragraph) <= max_tokens:
+            units.append((paragraph, sep))
+            continue
+        sentences = _pieces(paragraph, _SENTENCE_BREAK)
+        sentences[-1] = (sentences[-1][0], sep)
+        units.extend(sentences)
+    return units
+
+
+def split_chunks(text: str, max_tokens: int):
+    """
+    Group paragraphs into chunks of at most max_tokens (estimated). A single
+    sentence longer than that still becomes one chunk of its own.
+    """
+    chunks, separators = [], []
+    current, current_tokens, pending_sep = None, 0, ""
+
+    for unit, sep in _units(text or "", max_tokens):
+        tokens = estimate_tokens(unit)
+        if current is not None and current_tokens and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            separators.append(pending_sep)
+            current, current_tokens = None, 0
+        current = unit if current is None else current + pending_sep + unit
+        current_tokens += tokens
+        pending_sep = sep
+
+    chunks.append(current if current is not None else "")
+    return chunks, separators
+
+
+def join_chunks(chunks, separators) -> str:
+    out = [chunks[0]]
+    for sep, chunk in zip(separators, chunks[1:]):
+        out.append(sep)
+        out.append(chunk)
+    return "".join(out)
@@ -0,0 +1,59 @@
+# app/utils/text_delta.py
+"""
+Compact word-level deltas between two versions of a text.
+
+A delta is a JSON list of ops applied left to right against the base text:
+  n  (int > 0)  copy the next n tokens of the base
+  -n (int < 0)  skip the next n tokens of the base
+  "s" (str)     insert s
+Tokens are words with their trailing whitespace, so joining them gives the
+original text back byte for byte.
+"""
+import json
+import re
+from difflib import SequenceMatcher
+
+_TOKEN = re.compile(r"\s+|\S+\s*")
+
+# Below this similarity a diff costs more than it saves; store a full replace.
+MIN_SIMILARITY = 0.3
+
+
+def tokenize(text: str):
+    return _TOKEN.findall(text or "")
+
+
+def make_delta(base: str, target: str) -> str:
+    a, b = tokenize(base), tokenize(target)
+    ops = []
+
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    if a and b and matcher.quick_ratio() < MIN_SIMILARITY:
+        ops = [-len(a), "".join(b)]
+    else:
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                ops.append(i2 - i1)
+                continue
+            if i2 > i1:
+                ops.append(-(i2 - i1))
+            if j2 > j1:
+                ops.append("".join(b[j1:j2]))
+
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_delta(base: str, delta: str) -> str:
+    tokens = tokenize(base)
+    out, pos = [], 0
+
+    for op in json.loads(delta):
+        if isinstance(op, str):
+            out.append(op)
+        elif op > 0:
+            out.extend(tokens[pos:pos + op])
+            pos += op
+        else:
+            pos -= op
+
+    return "".join(out)
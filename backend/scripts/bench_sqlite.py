@@ -0,0 +1,138 @@
+# scripts/bench_sqlite.py
+"""
+Compare SQLite throughput with and without the engine profile from
+app/database.py (WAL, synchronous=NORMAL, busy timeout, mmap, cache size,
+tuned pool).
+
+The workload mimics several users refining at once: writer threads store
+new section text plus a revision through save_section_text, while reader
+threads load projects with their sections.
+
+    cd backend
+    python -m scripts.bench_sqlite --writers 8 --readers 8 --seconds 10
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, apply_sqlite_profile, engine_options
+from app.models import Project, Section, User
+from app.services.history_service import save_section_text
+
+SECTIONS = 50
+WORDS = [f"{stem}{n}" for stem in ("market", "growth", "risk", "team", "plan") for n in range(200)]
+
+
+def paragraph(words: int = 120):
+    return " ".join(random.choices(WORDS, k=words))
+
+
+def make_engine(path: str, profile: bool):
+    url = f"sqlite:///{path}"
+    if not profile:
+        return create_engine(url, connect_args={"check_same_thread": False})
+    engine = create_engine(url, **engine_options(url))
+    apply_sqlite_profile(engine)
+    return engine
+
+
+def seed(Session):
+    db = Session()
+    user = User(email="bench@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    project = Project(name="Bench", main_topic="Benchmarks", doc_type="docx", user_id=user.id)
+    db.add(project)
+    db.flush()
+    for i in range(SECTIONS):
+        db.add(Section(project_id=project.id, title=f"Section {i}", order=i + 1, content=paragraph()))
+    db.commit()
+    ids = (project.id, [s.id for s in project.sections])
+    db.close()
+    return ids
+
+
+def run(profile: bool, writers: int, readers: int, seconds: float, directory: str):
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        engine = make_engine(os.path.join(tmp, "bench.db"), profile)
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        project_id, section_ids = seed(Session)
+
+        counts = {"writes": 0, "reads": 0, "conflicts": 0, "locked": 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + seconds
+
+        def bump(key):
+            with lock:
+                counts[key] += 1
+
+        def writer(n):
+            i = 0
+            while time.monotonic() < deadline:
+                section_id = section_ids[(n * 7 + i) % len(section_ids)]
+                i += 1
+                db = Session()
+                try:
+                    version = db.scalar(select(Section.version).where(Section.id == section_id))
+                    db.commit()
+                    text = paragraph()
+                    saved = save_section_text(db, section_id, version, "refine", "bench", text, n)
+                    db.commit()
+                    bump("writes" if saved else "conflicts")
+                except OperationalError:
+                    db.rollback()
+                    bump("locked")
+                finally:
+                    db.close()
+
+        def reader():
+            while time.monotonic() < deadline:
+                db = Session()
+                try:
+                    project = db.get(Project, project_id)
+                    _ = [s.content for s in project.sections]
+                    bump("reads")
+                except OperationalError:
+                    bump("locked")
+                finally:
+                    db.close()
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        engine.dispose()
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--dir", default=".", help="where to put the scratch databases (use the real data disk)")
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:g}s per run\n")
+    print(f"{'engine':<10}{'writes/s':>10}{'reads/s':>10}{'conflicts':>11}{'locked':>8}")
+    for label, profile in (("default", False), ("profile", True)):
+        c = run(profile, args.writers, args.readers, args.seconds, args.dir)
+        print(
+            f"{label:<10}{c['writes'] / args.seconds:>10.1f}{c['reads'] / args.seconds:>10.1f}"
+            f"{c['conflicts']:>11}{c['locked']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
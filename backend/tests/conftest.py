@@ -0,0 +1,67 @@
+# tests/conftest.py
+"""
+The whole suite shares one scratch SQLite database and export cache,
+configured here before the app is imported. Tests that need their own data
+register a fresh user through the `user` fixture.
+"""
+import itertools
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+SCRATCH = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(SCRATCH, 'test.db')}"
+os.environ["EXPORT_CACHE_DIR"] = os.path.join(SCRATCH, "export_cache")
+os.environ["EXPORT_WORKERS"] = "0"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+# set (not just removed) so load_dotenv() can't bring a real key back
+os.environ["GOOGLE_API_KEY"] = ""
+os.environ["GEMINI_API_KEY"] = ""
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.auth_utils import create_jwt  # noqa: E402
+from app.main import app  # noqa: E402
+
+_users = itertools.count(1)
+
+
+class FakeClock:
+    """Stands in for time.monotonic; time only moves when advance() is called."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+def wait_until(predicate, timeout: float = 5):
+    """Wait for another thread to reach a state (e.g. to be queued)."""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out waiting for a background thread"
+        time.sleep(0.001)
+
+
+@pytest.fixture(scope="session")
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def user(client):
+    """A newly registered user: .id and the .headers to act as them."""
+    email = f"user{next(_users)}@example.com"
+    user_id = client.post("/auth/register", json={"email": email, "password": "pw"}).json()["user_id"]
+    return SimpleNamespace(id=user_id, headers={"Authorization": f"Bearer {create_jwt({'user_id': user_id})}"})
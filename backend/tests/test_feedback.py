@@ -0,0 +1,73 @@
+# tests/test_feedback.py
+import threading
+
+import pytest
+
+THREADS = 8
+VOTES = 10
+
+
+@pytest.fixture
+def sections(client, user):
+    """(project id, ids of two of its sections)."""
+    pid = client.post("/projects/", json={"name": "Votes", "main_topic": "Tests", "doc_type": "docx"},
+                      headers=user.headers).json()["id"]
+    ids = [s["id"] for s in client.get(f"/projects/{pid}", headers=user.headers).json()["sections"][:2]]
+    return pid, ids
+
+
+def in_parallel(work):
+    errors = []
+
+    def run():
+        try:
+            for _ in range(VOTES):
+                work()
+        except Exception as e:  # surfaced below; a thread can't fail the test itself
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+    assert not errors
+
+
+def test_concurrent_votes_are_all_counted(client, user, sections):
+    pid, (first, _) = sections
+    statuses = []
+
+    def vote():
+        resp = client.post(f"/projects/{pid}/sections/{first}/feedback", params={"like": True}, headers=user.headers)
+        statuses.append(resp.status_code)
+
+    in_parallel(vote)
+
+    assert set(statuses) == {200}
+    final = client.post(f"/projects/{pid}/sections/{first}/feedback", params={"like": False}, headers=user.headers)
+    assert final.json() == {"likes": THREADS * VOTES, "dislikes": 1}
+
+
+def test_concurrent_batches_are_all_counted(client, user, sections):
+    pid, (first, second) = sections
+    items = [{"section_id": first, "like": True}, {"section_id": second, "like": False},
+             {"section_id": second, "like": False}]
+
+    in_parallel(lambda: client.post(f"/projects/{pid}/feedback", json={"items": items}, headers=user.headers))
+
+    counts = {s["id"]: (s["likes"], s["dislikes"])
+              for s in client.get(f"/projects/{pid}", headers=user.headers).json()["sections"]}
+    assert counts[first] == (THREADS * VOTES, 0)
+    assert counts[second] == (0, 2 * THREADS * VOTES)
+
+
+def test_a_batch_with_a_foreign_section_changes_nothing(client, user, sections):
+    pid, (first, _) = sections
+    resp = client.post(f"/projects/{pid}/feedback", headers=user.headers, json={"items": [
+        {"section_id": first, "like": True}, {"section_id": 10 ** 9, "like": True}
+    ]})
+
+    assert resp.status_code == 404
+    counts = {s["id"]: s["likes"] for s in client.get(f"/projects/{pid}", headers=user.headers).json()["sections"]}
+    assert counts[first] == 0
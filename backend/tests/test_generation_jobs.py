@@ -0,0 +1,53 @@
+# tests/test_generation_jobs.py
+import pytest
+
+from app.services import job_service
+
+
+class HeldExecutor:
+    """Records submitted work instead of running it."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append((fn, args))
+
+    def job_ids(self):
+        return [args[0] for _, args in self.submitted]
+
+    def run_all(self):
+        work, self.submitted = self.submitted, []
+        for fn, args in work:
+            fn(*args)
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    held = HeldExecutor()
+    monkeypatch.setattr(job_service, "_executor", held)
+    yield held
+    job_service._enqueued.clear()
+
+
+def test_sweeps_do_not_resubmit_a_job_already_queued_here(client, user, executor):
+    pid = client.post("/projects/", json={"name": "Jobs", "main_topic": "Tests", "doc_type": "docx"},
+                      headers=user.headers).json()["id"]
+    job_id = client.post(f"/projects/{pid}/jobs", headers=user.headers).json()["job_id"]
+
+    job_service.resume_jobs(llm=None)
+    job_service.resume_jobs(llm=None)
+    assert executor.job_ids().count(job_id) == 1
+
+
+def test_a_finished_run_can_be_enqueued_again(executor, monkeypatch):
+    runs = []
+    monkeypatch.setattr(job_service, "run_job", lambda job_id, llm: runs.append(job_id))
+
+    job_service.enqueue_job(7, llm=None)
+    job_service.enqueue_job(7, llm=None)
+    executor.run_all()
+    job_service.enqueue_job(7, llm=None)
+    executor.run_all()
+
+    assert runs == [7, 7]
@@ -0,0 +1,68 @@
+# tests/test_generation_routes.py
+import importlib
+
+import pytest
+
+from app.llm_errors import LLMTimeout
+
+project_routes = importlib.import_module("app.routers.project_routes")
+
+
+@pytest.fixture
+def project(client, user):
+    pid = client.post("/projects/", json={"name": "Gen", "main_topic": "Tests", "doc_type": "docx"},
+                      headers=user.headers).json()["id"]
+    client.post(f"/projects/{pid}/sections", params={"title": "Intro"}, headers=user.headers)
+    return pid
+
+
+def fail_with(monkeypatch, error):
+    monkeypatch.setattr(
+        project_routes.llm, "generate_all",
+        lambda main_topic, titles, **kwargs: [error for _ in titles]
+    )
+
+
+def test_llm_error_keeps_its_status_and_message(client, user, project, monkeypatch):
+    fail_with(monkeypatch, LLMTimeout("The AI service did not answer within 15.0s"))
+    resp = client.post(f"/projects/{project}/generate", headers=user.headers)
+
+    assert resp.status_code == 504
+    assert "did not answer within 15.0s" in resp.json()["detail"]["message"]
+
+
+def test_unexpected_error_is_not_shown_to_the_client(client, user, project, monkeypatch):
+    fail_with(monkeypatch, RuntimeError("connection string postgres://admin:secret@db"))
+    resp = client.post(f"/projects/{project}/generate", headers=user.headers)
+
+    assert resp.status_code == 502
+    assert "secret" not in resp.text
+    assert resp.json()["detail"]["section_ids"]
+
+
+def test_unchanged_text_records_no_revision(client, user, project, monkeypatch):
+    monkeypatch.setattr(
+        project_routes.llm, "generate_all",
+        lambda main_topic, titles, **kwargs: ["Same draft" for _ in titles]
+    )
+    revisions = []
+    for _ in range(2):
+        assert client.post(f"/projects/{project}/generate", headers=user.headers).status_code == 200
+        revisions.append(client.get(f"/projects/{project}/history", headers=user.headers).json()["items"])
+
+    first, second = revisions
+    assert first and second == first
+
+
+def test_fresh_is_passed_to_the_llm(client, user, project, monkeypatch):
+    seen = []
+
+    def generate_all(main_topic, titles, fresh=False, **kwargs):
+        seen.append(fresh)
+        return ["Draft" for _ in titles]
+
+    monkeypatch.setattr(project_routes.llm, "generate_all", generate_all)
+    client.post(f"/projects/{project}/generate", headers=user.headers)
+    client.post(f"/projects/{project}/generate", params={"fresh": True}, headers=user.headers)
+
+    assert seen == [False, True]
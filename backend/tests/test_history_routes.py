@@ -0,0 +1,78 @@
+# tests/test_history_routes.py
+import importlib
+
+import pytest
+
+project_routes = importlib.import_module("app.routers.project_routes")
+
+DEFAULT_FIELDS = {"id", "section_id", "section_title", "version", "action", "prompt", "timestamp", "user_id"}
+
+
+@pytest.fixture
+def revised(client, user, monkeypatch):
+    """A project whose new section was refined five times: (project id, section id)."""
+    monkeypatch.setattr(project_routes.llm, "refine", lambda text, instruction, **kwargs: f"draft {instruction}")
+    pid = client.post("/projects/", json={"name": "History", "main_topic": "Tests", "doc_type": "docx"},
+                      headers=user.headers).json()["id"]
+    sid = client.post(f"/projects/{pid}/sections", params={"title": "Notes"}, headers=user.headers).json()["id"]
+    for n in range(1, 6):
+        resp = client.post(f"/projects/{pid}/sections/{sid}/refine",
+                           params={"instruction": str(n), "chunked": False}, headers=user.headers)
+        assert resp.status_code == 200
+    return pid, sid
+
+
+def history(client, user, pid, **params):
+    return client.get(f"/projects/{pid}/history", params=params, headers=user.headers)
+
+
+def test_pages_run_newest_first_without_gaps(client, user, revised):
+    pid, _ = revised
+    items, cursor, pages = [], None, 0
+    while True:
+        page = history(client, user, pid, limit=2, cursor=cursor).json()
+        items += page["items"]
+        pages += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert [item["prompt"] for item in items] == ["5", "4", "3", "2", "1"]
+    assert [item["version"] for item in items] == [5, 4, 3, 2, 1]
+    assert all(set(item) == DEFAULT_FIELDS for item in items)
+
+
+def test_text_bodies_only_when_asked_for(client, user, revised):
+    pid, _ = revised
+    newest = history(client, user, pid, limit=1, fields="version,old,new").json()["items"][0]
+    assert newest == {"version": 5, "old": "draft 4", "new": "draft 5"}
+
+
+def test_filters(client, user, revised):
+    pid, sid = revised
+    assert len(history(client, user, pid, section_id=sid, action="refine").json()["items"]) == 5
+    assert history(client, user, pid, action="generate").json()["items"] == []
+
+
+def test_unknown_field_is_rejected(client, user, revised):
+    pid, _ = revised
+    resp = history(client, user, pid, fields="id,old,password")
+    assert resp.status_code == 400
+    assert "password" in resp.json()["detail"]
+
+
+@pytest.mark.parametrize("cursor", ["abc", "-1", "1.5"])
+def test_invalid_cursor_is_rejected(client, user, revised, cursor):
+    pid, _ = revised
+    assert history(client, user, pid, cursor=cursor).status_code == 400
+
+
+def test_single_revision_has_both_texts(client, user, revised):
+    pid, sid = revised
+    first = history(client, user, pid, limit=5).json()["items"][-1]
+    entry = client.get(f"/projects/{pid}/history/{first['id']}", headers=user.headers).json()
+    assert (entry["old"], entry["new"]) == ("", "draft 1")
+
+    version = client.get(f"/projects/{pid}/sections/{sid}/versions/3", headers=user.headers).json()
+    assert version["new"] == "draft 3"
@@ -0,0 +1,73 @@
+# tests/test_history_service.py
+import random
+
+import pytest
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models import SectionRevision
+from app.services.history_service import REVISION_SNAPSHOT_EVERY, get_revision, record_history, revision_texts
+
+WORDS = ["alpha", "beta", "gamma", "delta.", "épsilon", "\n\n", "zeta?"]
+REVISIONS = 2 * REVISION_SNAPSHOT_EVERY + 5
+HAND_EDIT_BEFORE = REVISION_SNAPSHOT_EVERY + 10  # this revision doesn't start where the last one ended
+
+
+@pytest.fixture
+def history(client, user):
+    """A section with REVISIONS revisions; returns (section id, {seq: (old, new)})."""
+    pid = client.post("/projects/", json={"name": "Revisions", "main_topic": "Tests", "doc_type": "docx"},
+                      headers=user.headers).json()["id"]
+    sid = client.post(f"/projects/{pid}/sections", params={"title": "Log"}, headers=user.headers).json()["id"]
+
+    rng = random.Random(sid)
+    words = []
+    expected = {}
+    with SessionLocal() as db:
+        for seq in range(1, REVISIONS + 1):
+            old = " ".join(words)
+            if seq == HAND_EDIT_BEFORE:
+                old += " edited by hand"
+                words.append("restart")
+            words[rng.randrange(len(words) + 1):0] = rng.choices(WORDS, k=rng.randint(1, 6))
+            new = " ".join(words)
+            record_history(db, sid, "refine", f"step {seq}", old, new, user.id)
+            expected[seq] = (old, new)
+        db.commit()
+    return sid, expected
+
+
+def revisions(db, sid):
+    return db.scalars(
+        select(SectionRevision).where(SectionRevision.section_id == sid).order_by(SectionRevision.seq)
+    ).all()
+
+
+def test_full_copies_are_stored_only_at_chain_starts(history):
+    sid, _ = history
+    with SessionLocal() as db:
+        snapshots = [rev.seq for rev in revisions(db, sid) if rev.snapshot is not None]
+    assert snapshots == [1, REVISION_SNAPSHOT_EVERY + 1, HAND_EDIT_BEFORE]
+
+
+def test_every_revision_is_rebuilt(history):
+    sid, expected = history
+    with SessionLocal() as db:
+        for seq, texts in expected.items():
+            _, old, new = get_revision(db, sid, seq)
+            assert (old, new) == texts, seq
+        assert get_revision(db, sid, REVISIONS + 1) is None
+
+
+@pytest.mark.parametrize("picked", [
+    "all",
+    [REVISION_SNAPSHOT_EVERY - 1, REVISION_SNAPSHOT_EVERY, REVISION_SNAPSHOT_EVERY + 1, REVISION_SNAPSHOT_EVERY + 2],
+    [HAND_EDIT_BEFORE - 1, HAND_EDIT_BEFORE, REVISIONS],
+    [REVISIONS, 1],
+])
+def test_any_set_of_revisions_is_rebuilt(history, picked):
+    sid, expected = history
+    with SessionLocal() as db:
+        revs = [rev for rev in revisions(db, sid) if picked == "all" or rev.seq in picked]
+        texts = revision_texts(db, revs)
+    assert {rev.seq: texts[rev.id] for rev in revs} == {rev.seq: expected[rev.seq] for rev in revs}
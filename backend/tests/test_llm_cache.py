@@ -0,0 +1,117 @@
+# tests/test_llm_cache.py
+import threading
+
+import pytest
+from conftest import wait_until
+
+from app.llm_cache import LLMCache, make_key
+
+
+class Upstream:
+    """A compute() stand-in that counts calls and can be held open."""
+
+    def __init__(self, value="draft"):
+        self.value = value
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        return f"{self.value} {self.calls}"
+
+
+def test_concurrent_identical_calls_reach_upstream_once():
+    cache, upstream = LLMCache(), Upstream()
+    upstream.release.clear()
+    results = []
+
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("k", upstream)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    wait_until(lambda: upstream.calls == 1)
+    upstream.release.set()
+    for t in threads:
+        t.join(5)
+
+    assert upstream.calls == 1
+    assert results == ["draft 1"] * 8
+
+
+def test_a_failed_call_reaches_every_waiter_and_is_not_cached():
+    cache = LLMCache()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    def call():
+        try:
+            cache.get_or_compute("k", failing)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    wait_until(lambda: "k" in cache._inflight)
+    follower = threading.Thread(target=call)
+    follower.start()
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(errors) == 2
+    assert cache.get("k") is None
+
+
+def test_entries_expire_after_ttl(clock):
+    cache, upstream = LLMCache(ttl=60, clock=clock), Upstream()
+
+    assert cache.get_or_compute("k", upstream) == "draft 1"
+    clock.advance(59)
+    assert cache.get_or_compute("k", upstream) == "draft 1"
+    clock.advance(2)
+    assert cache.get_or_compute("k", upstream) == "draft 2"
+
+
+def test_memory_tier_keeps_the_most_recently_used_entries():
+    cache = LLMCache(max_entries=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"   # b is now the least recently used
+    cache.set("c", "C")
+
+    assert list(cache._memory) == ["a", "c"]
+    assert cache.get("b") is None
+
+
+def test_fresh_skips_the_lookup_but_stores_the_result():
+    cache, upstream = LLMCache(), Upstream()
+
+    assert cache.get_or_compute("k", upstream) == "draft 1"
+    assert cache.get_or_compute("k", upstream, fresh=True) == "draft 2"
+    assert cache.get_or_compute("k", upstream) == "draft 2"
+    assert upstream.calls == 2
+
+
+def test_persistent_tier_survives_a_new_cache(tmp_path, clock):
+    path = str(tmp_path / "llm_cache.db")
+    LLMCache(db_path=path, clock=clock).set("k", "kept")
+
+    assert LLMCache(db_path=path, clock=clock).get("k") == "kept"
+    clock.advance(10)
+    assert LLMCache(ttl=5, db_path=path, clock=clock).get("k") is None
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Intro  text\n", "Intro text"),
+    ("line one\n  line two ", "line one\nline two"),
+])
+def test_cosmetic_whitespace_shares_a_key(a, b):
+    assert make_key("m", "generate", a) == make_key("m", "generate", b)
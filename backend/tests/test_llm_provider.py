@@ -0,0 +1,115 @@
+# tests/test_llm_provider.py
+import json
+
+import httpx
+import pytest
+
+from app import llm_provider
+from app.llm_errors import LLMRateLimited, LLMUnavailable
+from app.llm_provider import GeminiProvider, LLMProvider, ProviderError
+from app.llm_resilience import UpstreamGuard, is_client_error
+
+
+def reply(text, thought=None):
+    parts = [{"text": thought, "thought": True}] if thought else []
+    return {"candidates": [{"content": {"parts": parts + [{"text": text}]}}]}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Route the provider's shared client to handler(request) -> httpx.Response."""
+    calls = []
+
+    def install(handler):
+        def record(request):
+            calls.append(request)
+            return handler(request)
+
+        monkeypatch.setattr(llm_provider, "_sync_client", httpx.Client(transport=httpx.MockTransport(record)))
+        return calls
+
+    return install
+
+
+@pytest.fixture
+def provider():
+    return GeminiProvider(api_key="test-key", model="gemini-test", api_version="v1beta")
+
+
+def test_provider_interface_is_abstract():
+    with pytest.raises(TypeError):
+        LLMProvider()
+
+
+def test_generate_returns_text_without_thoughts(upstream, provider):
+    calls = upstream(lambda request: httpx.Response(200, json=reply("Hello", thought="thinking...")))
+
+    assert provider.generate("Say hello", schema={"type": "OBJECT"}) == "Hello"
+
+    request = calls[0]
+    assert request.url.path == "/v1beta/models/gemini-test:generateContent"
+    assert request.headers["x-goog-api-key"] == "test-key"
+    body = json.loads(request.content)
+    assert body["contents"][0]["parts"][0]["text"] == "Say hello"
+    assert body["generationConfig"]["responseMimeType"] == "application/json"
+
+
+def test_stream_yields_sse_chunks(upstream, provider):
+    events = "".join(f"data: {json.dumps(reply(text))}\r\n\r\n" for text in ("Hel", "lo"))
+    calls = upstream(lambda request: httpx.Response(200, text=events))
+
+    assert list(provider.stream("Say hello")) == ["Hel", "lo"]
+    assert calls[0].url.params["alt"] == "sse"
+
+
+def test_rate_limit_maps_to_llm_rate_limited(upstream, provider):
+    upstream(lambda request: httpx.Response(
+        429, headers={"Retry-After": "7"}, json={"error": {"message": "Quota exceeded"}}
+    ))
+
+    with pytest.raises(LLMRateLimited) as e:
+        provider.generate("hi")
+    assert e.value.retry_after == 7
+    assert "Quota exceeded" in str(e.value)
+    assert not is_client_error(e.value)
+
+
+@pytest.mark.parametrize("status", [500, 503])
+def test_server_error_maps_to_llm_unavailable(upstream, provider, status):
+    upstream(lambda request: httpx.Response(status, text="<html>oops</html>"))
+
+    with pytest.raises(LLMUnavailable) as e:
+        provider.generate("hi")
+    assert not isinstance(e.value, LLMRateLimited)
+    assert e.value.status_code == 503
+    assert "oops" in str(e.value)
+
+
+def test_streamed_error_is_mapped_too(upstream, provider):
+    upstream(lambda request: httpx.Response(503, json={"error": {"message": "overloaded"}}))
+    with pytest.raises(LLMUnavailable):
+        list(provider.stream("hi"))
+
+
+def test_bad_request_is_a_client_error(upstream, provider):
+    upstream(lambda request: httpx.Response(400, json={"error": {"message": "Invalid schema"}}))
+
+    with pytest.raises(ProviderError) as e:
+        provider.generate("hi")
+    assert e.value.code == 400
+    assert is_client_error(e.value)
+
+
+def test_blocked_prompt(upstream, provider):
+    upstream(lambda request: httpx.Response(200, json={"promptFeedback": {"blockReason": "SAFETY"}}))
+    with pytest.raises(ProviderError, match="SAFETY"):
+        provider.generate("hi")
+
+
+def test_guard_passes_mapped_errors_through(upstream, provider):
+    upstream(lambda request: httpx.Response(429, json={"error": {"message": "Quota exceeded"}}))
+    guard = UpstreamGuard(hedge=False)
+
+    with pytest.raises(LLMRateLimited):
+        guard.call("test", lambda: provider.generate("hi"))
+    assert guard.breaker.stats()["recent_failures"] == 1
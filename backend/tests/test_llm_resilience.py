@@ -0,0 +1,119 @@
+# tests/test_llm_resilience.py
+import pytest
+
+from app.llm_errors import LLMUnavailable
+from app.llm_resilience import CircuitBreaker, UpstreamGuard
+
+
+def open_breaker(clock, **options):
+    breaker = CircuitBreaker(window=4, failure_rate=0.5, cooldown=30, trial_timeout=60, clock=clock, **options)
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == "open"
+    return breaker
+
+
+def test_breaker_stays_closed_below_the_failure_rate(clock):
+    breaker = CircuitBreaker(window=4, failure_rate=0.5, clock=clock)
+    for ok in (True, True, True, False):
+        breaker.record(ok)
+    assert breaker.state == "closed"
+    assert breaker.before_call() is None
+
+
+def test_breaker_opens_and_rejects(clock):
+    breaker = open_breaker(clock)
+    clock.advance(10)
+    with pytest.raises(LLMUnavailable) as e:
+        breaker.before_call()
+    assert e.value.retry_after == pytest.approx(20)
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = open_breaker(clock)
+    clock.advance(30)
+
+    trial = breaker.before_call()
+    assert trial is not None
+    with pytest.raises(LLMUnavailable):
+        breaker.before_call()
+
+    # a call that started before the breaker opened can't close it
+    breaker.record(True)
+    assert breaker.state == "half-open"
+
+    breaker.record(True, trial)
+    assert breaker.state == "closed"
+    assert breaker.before_call() is None
+
+
+def test_failed_trial_reopens(clock):
+    breaker = open_breaker(clock)
+    clock.advance(30)
+    breaker.record(False, breaker.before_call())
+    assert breaker.state == "open"
+
+
+def test_released_trial_frees_the_slot(clock):
+    breaker = open_breaker(clock)
+    clock.advance(30)
+
+    first = breaker.before_call()
+    breaker.release(first)
+    second = breaker.before_call()
+    assert second is not None and second != first
+
+
+def test_stale_trial_is_replaced_and_ignored(clock):
+    breaker = open_breaker(clock)
+    clock.advance(30)
+
+    stale = breaker.before_call()
+    clock.advance(59)
+    with pytest.raises(LLMUnavailable):
+        breaker.before_call()
+    clock.advance(2)
+    fresh = breaker.before_call()
+    assert fresh != stale
+
+    breaker.record(True, stale)
+    assert breaker.state == "half-open"
+    breaker.record(True, fresh)
+    assert breaker.state == "closed"
+
+
+def test_abandoned_stream_releases_trial(clock):
+    guard = UpstreamGuard(hedge=False)
+    guard.breaker = open_breaker(clock)
+    clock.advance(30)
+
+    stream = guard.stream(iter(["a", "b"]))
+    next(stream)
+    stream.close()  # client disconnected
+
+    assert list(guard.stream(iter(["a", "b"]))) == ["a", "b"]
+    assert guard.breaker.state == "closed"
+
+
+def test_breaker_is_checked_before_queueing(clock):
+    guard = UpstreamGuard(hedge=False)
+    guard.breaker = open_breaker(clock)
+    queued = []
+
+    with pytest.raises(LLMUnavailable):
+        guard.call("test", lambda: "text", before=lambda: queued.append(1))
+    assert queued == []
+
+
+def test_failed_before_hook_releases_trial(clock):
+    guard = UpstreamGuard(hedge=False)
+    guard.breaker = open_breaker(clock)
+    clock.advance(30)
+
+    def queue_timeout():
+        raise LLMUnavailable("queue full")
+
+    with pytest.raises(LLMUnavailable):
+        guard.call("test", lambda: "text", before=queue_timeout)
+    assert guard.call("test", lambda: "text") == "text"
+    assert guard.breaker.state == "closed"
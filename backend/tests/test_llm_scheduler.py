@@ -0,0 +1,114 @@
+# tests/test_llm_scheduler.py
+import threading
+
+import pytest
+
+from app.llm_errors import LLMQueueTimeout
+from app.llm_scheduler import BULK, INTERACTIVE, LLMScheduler
+from conftest import wait_until
+
+
+def queued(scheduler, lane=BULK):
+    return scheduler.stats()["lanes"][lane]["queued"]
+
+
+def wake(scheduler):
+    """Let waiting threads look at the (fake) clock again."""
+    with scheduler._cond:
+        scheduler._cond.notify_all()
+
+
+def start(scheduler, user_id, lane, served):
+    def run():
+        try:
+            scheduler.acquire(user_id, lane)
+            served.append((user_id, lane))
+        except LLMQueueTimeout as e:
+            served.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_burst_then_refill(clock):
+    scheduler = LLMScheduler(rate_per_minute=60, burst=2, clock=clock)
+    scheduler.acquire("u1")
+    scheduler.acquire("u1")
+    assert not scheduler.try_acquire("u1")
+
+    clock.advance(1)
+    assert scheduler.try_acquire("u1")
+    assert not scheduler.try_acquire("u1")
+
+
+def test_unlimited_rate(clock):
+    scheduler = LLMScheduler(rate_per_minute=0, burst=1, clock=clock)
+    for _ in range(20):
+        assert scheduler.try_acquire("u1")
+
+
+def test_queue_timeout(clock):
+    scheduler = LLMScheduler(rate_per_minute=1, burst=1, queue_timeout=30, clock=clock)
+    scheduler.acquire("u1")
+
+    served = []
+    thread = start(scheduler, "u1", BULK, served)
+    wait_until(lambda: queued(scheduler) == 1)
+
+    clock.advance(31)
+    wake(scheduler)
+    thread.join(5)
+
+    assert len(served) == 1 and isinstance(served[0], LLMQueueTimeout)
+    assert scheduler.stats()["lanes"][BULK]["timeouts"] == 1
+    assert queued(scheduler) == 0
+
+
+def test_interactive_lane_goes_first(clock):
+    scheduler = LLMScheduler(rate_per_minute=60, burst=1, queue_timeout=0, clock=clock)
+    scheduler.acquire("u1")
+
+    served = []
+    bulk = start(scheduler, "u1", BULK, served)
+    wait_until(lambda: queued(scheduler, BULK) == 1)
+    interactive = start(scheduler, "u1", INTERACTIVE, served)
+    wait_until(lambda: queued(scheduler, INTERACTIVE) == 1)
+
+    # nothing moves until a token is due
+    assert not scheduler.try_acquire("u2")
+    assert served == []
+
+    clock.advance(1)
+    wake(scheduler)
+    interactive.join(5)
+    assert served == [("u1", INTERACTIVE)]
+
+    clock.advance(1)
+    wake(scheduler)
+    bulk.join(5)
+    assert served == [("u1", INTERACTIVE), ("u1", BULK)]
+
+
+def test_users_take_turns_within_a_lane(clock):
+    scheduler = LLMScheduler(rate_per_minute=60, burst=1, queue_timeout=0, clock=clock)
+    scheduler.acquire("u0")
+
+    served, threads = [], []
+    for user_id in ("a", "a", "b"):
+        threads.append(start(scheduler, user_id, BULK, served))
+        wait_until(lambda n=len(threads): queued(scheduler) == n)
+
+    for expected in (["a"], ["a", "b"], ["a", "b", "a"]):
+        clock.advance(1)
+        wake(scheduler)
+        wait_until(lambda: len(served) == len(expected))
+        assert [user_id for user_id, _ in served] == expected
+
+    for thread in threads:
+        thread.join(5)
+
+
+def test_unknown_lane(clock):
+    with pytest.raises(ValueError):
+        LLMScheduler(clock=clock).acquire("u1", "urgent")
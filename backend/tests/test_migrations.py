@@ -0,0 +1,145 @@
+# tests/test_migrations.py
+"""
+Bring a database in the layout of the first release (section history as a
+JSON column, no versions, timestamps or jobs) up to date by starting the app
+against it, the way an existing deployment is upgraded.
+"""
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.migrations import MIGRATIONS
+from app.services.history_service import get_revision
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+LEGACY_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL, email VARCHAR, password_hash VARCHAR, PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE TABLE projects (
+    id INTEGER NOT NULL, name VARCHAR, main_topic VARCHAR, doc_type VARCHAR NOT NULL,
+    user_id INTEGER, created_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE TABLE sections (
+    id INTEGER NOT NULL, project_id INTEGER NOT NULL, "order" INTEGER NOT NULL, title VARCHAR NOT NULL,
+    content TEXT, likes INTEGER, dislikes INTEGER, history JSON,
+    PRIMARY KEY (id), FOREIGN KEY(project_id) REFERENCES projects (id) ON DELETE CASCADE
+);
+CREATE TABLE comments (
+    id INTEGER NOT NULL, section_id INTEGER, user_id INTEGER, text TEXT, created_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(section_id) REFERENCES sections (id) ON DELETE CASCADE,
+    FOREIGN KEY(user_id) REFERENCES users (id)
+);
+"""
+
+CREATED = "2025-11-25 10:00:00.000000"
+ISO_TIMESTAMP = "2025-11-25T10:05:00"
+
+INTRO_HISTORY = [
+    {"timestamp": 1764053446.9, "action": "generate", "prompt": "generate Introduction",
+     "old": "", "new": "Legacy intro", "user_id": 1},
+    {"timestamp": ISO_TIMESTAMP, "action": "refine", "prompt": "shorter",
+     "old": "Legacy intro", "new": "Intro", "user_id": 1},
+]
+# entries written before "action" was recorded
+METHODS_HISTORY = [
+    {"timestamp": 1764053500.0, "prompt": "generate Methods", "old": "", "new": "Legacy methods", "user_id": 1},
+]
+
+
+def start_app(db_path, tmp_path):
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}", "EXPORT_CACHE_DIR": str(tmp_path / "cache")}
+    env.pop("ASYNC_DATABASE_URL", None)
+    done = subprocess.run([sys.executable, "-c", "import app.main"], cwd=BACKEND, env=env,
+                          capture_output=True, text=True, timeout=60)
+    assert done.returncode == 0, done.stderr
+
+
+@pytest.fixture(scope="module")
+def legacy_db(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("legacy")
+    path = tmp_path / "legacy.db"
+    db = sqlite3.connect(path)
+    db.executescript(LEGACY_SCHEMA)
+    db.execute("INSERT INTO users VALUES (1, 'old@example.com', 'x')")
+    db.execute("INSERT INTO projects VALUES (1, 'Old report', 'Legacy', 'docx', 1, ?)", (CREATED,))
+    db.executemany("INSERT INTO sections VALUES (?, 1, ?, ?, ?, ?, 0, ?)", [
+        (1, 1, "Introduction", "Intro", 2, json.dumps(INTRO_HISTORY)),
+        (2, 2, "Methods", "Legacy methods", 0, json.dumps(METHODS_HISTORY)),
+        (3, 3, "Results", None, 0, None),
+    ])
+    db.execute("INSERT INTO comments VALUES (1, 1, 1, 'nice', ?)", (CREATED,))
+    db.commit()
+    db.close()
+
+    start_app(path, tmp_path)
+    return path
+
+
+def columns(db, table):
+    return {row[1] for row in db.execute(f"PRAGMA table_info({table})")}
+
+
+def test_every_migration_is_recorded(legacy_db):
+    db = sqlite3.connect(legacy_db)
+    applied = [name for (name,) in db.execute("SELECT name FROM schema_migrations ORDER BY name")]
+    assert applied == sorted(name for name, _ in MIGRATIONS)
+
+
+def test_existing_rows_gain_the_new_columns(legacy_db):
+    db = sqlite3.connect(legacy_db)
+    assert {"version", "updated_at"} <= columns(db, "sections")
+    assert {"owner", "heartbeat_at"} <= columns(db, "generation_jobs")
+    if sqlite3.sqlite_version_info >= (3, 35):
+        assert "history" not in columns(db, "sections")
+
+    assert db.execute("SELECT updated_at FROM projects").fetchone() == (CREATED,)
+    rows = db.execute('SELECT id, "order", version, likes, updated_at FROM sections ORDER BY id').fetchall()
+    assert [(sid, order, version, likes) for sid, order, version, likes, _ in rows] == [
+        (1, 1024, 1, 2), (2, 2048, 1, 0), (3, 3072, 1, 0)
+    ]
+    assert {updated for *_, updated in rows} == {CREATED}
+    assert db.execute("SELECT count(*) FROM comments").fetchone() == (1,)
+
+
+def test_history_becomes_revisions(legacy_db):
+    with Session(create_engine(f"sqlite:///{legacy_db}")) as db:
+        rev, old, new = get_revision(db, 1, 1)
+        assert (rev.action, rev.prompt, old, new) == ("generate", "generate Introduction", "", "Legacy intro")
+
+        rev, old, new = get_revision(db, 1, 2)
+        assert (rev.action, old, new) == ("refine", "Legacy intro", "Intro")
+        assert rev.timestamp == datetime.fromisoformat(ISO_TIMESTAMP).timestamp()
+
+        rev, old, new = get_revision(db, 2, 1)
+        assert (rev.action, new, rev.user_id) == ("generate", "Legacy methods", 1)
+
+        assert get_revision(db, 1, 3) is None
+        assert get_revision(db, 3, 1) is None
+
+
+def test_existing_rows_are_searchable(legacy_db):
+    db = sqlite3.connect(legacy_db)
+    assert db.execute("SELECT count(*) FROM search_index WHERE search_index MATCH 'legacy'").fetchone()[0] > 0
+
+
+def test_restarting_applies_nothing_twice(legacy_db, tmp_path):
+    db = sqlite3.connect(legacy_db)
+    before = db.execute("SELECT count(*) FROM section_revisions").fetchone()
+    db.close()
+
+    start_app(legacy_db, tmp_path)
+
+    db = sqlite3.connect(legacy_db)
+    assert db.execute("SELECT count(*) FROM section_revisions").fetchone() == before
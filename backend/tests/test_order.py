@@ -0,0 +1,19 @@
+# tests/test_order.py
+from app.services.order_service import ORDER_STEP, order_between
+
+
+def test_order_between():
+    assert order_between(None, None) == ORDER_STEP
+    assert order_between(2048, None) == 2048 + ORDER_STEP
+    assert order_between(None, 1024) == 0
+    assert order_between(1024, 2048) == 1536
+    assert order_between(5, 6) is None
+    assert order_between(5, 7) == 6
+
+
+def test_order_between_is_strictly_between():
+    before, after = 0, ORDER_STEP
+    while (middle := order_between(before, after)) is not None:
+        assert before < middle < after
+        after = middle
+    assert after - before < 2
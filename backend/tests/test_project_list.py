@@ -0,0 +1,81 @@
+# tests/test_project_list.py
+import base64
+import json
+
+import pytest
+
+NAMES = ["beta", "alpha", "beta", "gamma", "alpha", "beta", "gamma"]
+
+
+@pytest.fixture
+def projects(client, user):
+    """Ids by name; repeated names make the id tie-breaker matter."""
+    created = []
+    for name in NAMES:
+        pid = client.post("/projects/", json={"name": name, "main_topic": "Paging", "doc_type": "docx"},
+                          headers=user.headers).json()["id"]
+        created.append((name, pid))
+    return created
+
+
+def walk(client, user, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = client.get("/projects/", params={**params, "limit": 2, "cursor": cursor},
+                          headers=user.headers).json()
+        ids += [item["id"] for item in page["items"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids, pages
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_name_pages_cover_every_project_once(client, user, projects, order):
+    expected = [pid for _, pid in sorted(projects, reverse=order == "desc")]
+    ids, pages = walk(client, user, sort="name", order=order)
+
+    assert ids == expected
+    assert pages == 4
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_created_at_pages_cover_every_project_once(client, user, projects, order):
+    one_page = client.get("/projects/", params={"sort": "created_at", "order": order, "limit": 200},
+                          headers=user.headers).json()["items"]
+    ids, _ = walk(client, user, sort="created_at", order=order)
+
+    assert ids == [item["id"] for item in one_page]
+    assert sorted(ids) == sorted(pid for _, pid in projects)
+
+
+def cursor_for(client, user, **params):
+    return client.get("/projects/", params={**params, "limit": 2}, headers=user.headers).json()["next_cursor"]
+
+
+@pytest.mark.parametrize("issued, used", [
+    ({"sort": "name", "order": "asc"}, {"sort": "created_at", "order": "asc"}),
+    ({"sort": "created_at", "order": "desc"}, {"sort": "name", "order": "desc"}),
+    ({"sort": "name", "order": "asc"}, {"sort": "name", "order": "desc"}),
+])
+def test_cursor_from_another_sort_is_rejected(client, user, projects, issued, used):
+    cursor = cursor_for(client, user, **issued)
+    resp = client.get("/projects/", params={**used, "cursor": cursor}, headers=user.headers)
+    assert resp.status_code == 400
+
+
+@pytest.mark.parametrize("payload", [
+    ["name", "asc", 5, 1],
+    ["name", "asc", "alpha", "1"],
+    ["created_at", "desc", "not a date", 1],
+    {"value": "alpha"},
+])
+def test_malformed_cursor_is_rejected(client, user, payload):
+    sort, order = (payload[0], payload[1]) if isinstance(payload, list) else ("name", "asc")
+    cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    resp = client.get("/projects/", params={"sort": sort, "order": order, "cursor": cursor}, headers=user.headers)
+    assert resp.status_code == 400
+
+
+def test_undecodable_cursor_is_rejected(client, user):
+    assert client.get("/projects/", params={"cursor": "%%%"}, headers=user.headers).status_code == 400
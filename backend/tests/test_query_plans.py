@@ -0,0 +1,118 @@
+# tests/test_query_plans.py
+"""
+Query plan audit for the API routes.
+
+Calls every project/section route once, records each SELECT/UPDATE/DELETE
+the app sends, and runs EXPLAIN QUERY PLAN on it. Fails if any statement
+scans a whole table instead of using an index.
+"""
+import re
+import sqlite3
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.auth_utils import create_jwt
+from app.database import DATABASE_URL, async_engine, engine
+from app.main import app
+
+# "SCAN projects" is a full table scan; "SCAN projects USING INDEX ..." is not
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+AUDITED = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+def exercise(client: TestClient, user_id: int, h: dict):
+    """Hit every route that reads or writes projects and sections."""
+    client.post("/auth/login", json={"email": "audit@example.com", "password": "pw"})
+
+    pid = client.post("/projects/", json={"name": "Audit", "main_topic": "Plans", "doc_type": "docx"}, headers=h).json()["id"]
+    other = client.post("/projects/", json={"name": "Other", "main_topic": "Plans", "doc_type": "pptx"}, headers=h).json()["id"]
+    client.get("/projects/", headers=h)
+    client.get("/projects/search", params={"q": "plans"}, headers=h)
+    client.put(f"/projects/{pid}", json={"name": "Audit 2"}, headers=h)
+
+    sid = client.post(f"/projects/{pid}/sections", params={"title": "Extra"}, headers=h).json()["id"]
+    client.get(f"/projects/{pid}", headers=h)
+    client.put(f"/projects/{pid}/sections/{sid}", params={"content": "text", "expected_version": 1}, headers=h)
+
+    client.post(f"/projects/{pid}/generate", headers=h)
+    client.post(f"/projects/{pid}/generate", params={"section_id": sid}, headers=h)
+    client.post(f"/projects/{pid}/sections/{sid}/refine", params={"instruction": "shorter"}, headers=h)
+    client.post(f"/projects/{pid}/generate/stream", params={"section_id": sid}, headers=h)
+    client.post(f"/projects/{pid}/sections/{sid}/refine/stream", params={"instruction": "longer"}, headers=h)
+
+    job_id = client.post(f"/projects/{pid}/jobs", headers=h).json()["job_id"]
+    for _ in range(50):
+        if client.get(f"/projects/{pid}/jobs/{job_id}", headers=h).json()["status"] in ("done", "failed"):
+            break
+        time.sleep(0.1)
+
+    client.post(f"/projects/{pid}/sections/{sid}/feedback", params={"like": True, "comment": "nice"}, headers=h)
+    client.post(f"/projects/{pid}/feedback", json={"items": [
+        {"section_id": sid, "like": False}, {"section_id": sid, "comment": "again"}
+    ]}, headers=h)
+    client.post(f"/projects/{pid}/sections/{sid}/move", params={"direction": "up"}, headers=h)
+    order = [s["id"] for s in client.get(f"/projects/{pid}", headers=h).json()["sections"]]
+    client.put(f"/projects/{pid}/sections/order", json={"section_ids": order[::-1]}, headers=h)
+    client.post(f"/projects/{pid}/sections/{sid}/position", params={"after_id": order[0]}, headers=h)
+    client.post(f"/projects/{pid}/sections/{sid}/position", headers=h)
+    client.patch(f"/projects/{pid}/sections", json={"items": [
+        {"id": sid, "title": "Renamed", "content": "batch", "expected_version": 1}, {"id": order[0], "title": "First"}
+    ]}, headers=h)
+
+    page = client.get(f"/projects/{pid}/history", params={"fields": "id,old,new"}, headers=h).json()
+    client.get(f"/projects/{pid}/history", params={
+        "section_id": sid, "action": "refine", "user": user_id, "since": 0, "until": time.time() + 60,
+        "cursor": str(page["items"][0]["id"] + 1)
+    }, headers=h)
+    client.get(f"/projects/{pid}/history/{page['items'][0]['id']}", headers=h)
+    client.get(f"/projects/{pid}/sections/{sid}/versions/1", headers=h)
+
+    client.get(f"/projects/{pid}/export", params={"format": "docx"}, headers=h)
+    client.post("/projects/export", json={"project_ids": [pid, other], "format": "pptx"}, headers=h).read()
+
+    client.delete(f"/projects/{pid}/sections/{sid}", headers=h)
+    client.delete(f"/projects/{other}", headers=h)
+
+
+def explain(db, statement: str, parameters):
+    return [row[3] for row in db.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def test_no_route_scans_a_whole_table():
+    captured = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(AUDITED):
+            return
+        captured.setdefault(statement, tuple(parameters or ()))
+
+    with TestClient(app) as client:
+        user_id = client.post("/auth/register", json={"email": "audit@example.com", "password": "pw"}).json()["user_id"]
+        h = {"Authorization": f"Bearer {create_jwt({'user_id': user_id})}"}
+
+        # only capture what requests send; startup work (migrations, job resume) is not audited
+        targets = (engine, async_engine.sync_engine)
+        for target in targets:
+            event.listen(target, "before_cursor_execute", capture)
+        try:
+            exercise(client, user_id, h)
+        finally:
+            for target in targets:
+                event.remove(target, "before_cursor_execute", capture)
+
+    db = sqlite3.connect(DATABASE_URL.removeprefix("sqlite:///"))
+    try:
+        scans = {}
+        for statement, parameters in captured.items():
+            plan = explain(db, statement, parameters)
+            if any(FULL_SCAN.match(line) for line in plan):
+                scans[" ".join(statement.split())] = plan
+    finally:
+        db.close()
+
+    assert len(captured) > 40
+    assert not scans, "full table scans:\n" + "\n\n".join(
+        f"{statement}\n    " + "\n    ".join(plan) for statement, plan in scans.items()
+    )
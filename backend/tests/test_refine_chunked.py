@@ -0,0 +1,72 @@
+# tests/test_refine_chunked.py
+import threading
+
+import pytest
+
+from app.llm_client import UNCHANGED, LLMClient
+from app.llm_provider import LLMProvider
+from app.llm_resilience import UpstreamGuard
+from app.llm_scheduler import LLMScheduler
+
+PARAGRAPHS = [f"Paragraph {i} explains one point in some detail. " * 12 for i in range(4)]
+
+
+class RecordingProvider(LLMProvider):
+    """Answers every chunk prompt with UNCHANGED and remembers the prompts."""
+
+    def __init__(self):
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self):
+        return True
+
+    def generate(self, prompt, schema=None, model=None):
+        with self._lock:
+            self.prompts.append(prompt)
+        return UNCHANGED
+
+    def stream(self, prompt, model=None):
+        yield self.generate(prompt, model=model)
+
+
+@pytest.fixture
+def client():
+    """A client with its own unthrottled scheduler and guard, so other tests' calls don't matter."""
+    llm = LLMClient(provider=RecordingProvider())
+    llm.scheduler = LLMScheduler(rate_per_minute=0)
+    llm.guard = UpstreamGuard(hedge=False)
+    return llm
+
+
+def refine(client, paragraphs, **kwargs):
+    text = "\n\n".join(paragraphs)
+    return client.refine_chunked(text, "Make it formal", chunk_tokens=200, **kwargs), text
+
+
+def test_every_chunk_prompt_carries_the_shared_header(client):
+    result, text = refine(client, PARAGRAPHS, main_topic="Testing", section_title="Methods")
+
+    assert result == text
+    assert len(client.provider.prompts) == len(PARAGRAPHS)
+    for prompt in client.provider.prompts:
+        assert "Document topic: Testing\nSection: Methods\n" in prompt
+
+
+def test_editing_one_chunk_only_asks_again_for_that_chunk(client):
+    refine(client, PARAGRAPHS, main_topic="Testing", section_title="Methods")
+    client.provider.prompts.clear()
+
+    edited = PARAGRAPHS[:2] + ["A rewritten paragraph. " * 12] + PARAGRAPHS[3:]
+    refine(client, edited, main_topic="Testing", section_title="Methods")
+
+    assert len(client.provider.prompts) == 1
+    assert "A rewritten paragraph." in client.provider.prompts[0]
+
+
+def test_a_different_section_does_not_share_answers(client):
+    refine(client, PARAGRAPHS, main_topic="Testing", section_title="Methods")
+    refine(client, PARAGRAPHS, main_topic="Testing", section_title="Results")
+
+    assert len(client.provider.prompts) == 2 * len(PARAGRAPHS)
@@ -0,0 +1,65 @@
+# tests/test_search.py
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from app.auth_utils import create_jwt
+from app.database import SessionLocal
+from app.services.search_service import match_expression
+
+
+def new_project(client, who, name, topic):
+    return client.post("/projects/", json={"name": name, "main_topic": topic, "doc_type": "docx"},
+                       headers=who.headers).json()["id"]
+
+
+@pytest.fixture
+def other(user, client):
+    """A second registered user."""
+    email = f"other{user.id}@example.com"
+    other_id = client.post("/auth/register", json={"email": email, "password": "pw"}).json()["user_id"]
+    return SimpleNamespace(id=other_id, headers={"Authorization": f"Bearer {create_jwt({'user_id': other_id})}"})
+
+
+def search(client, who, q):
+    resp = client.get("/projects/search", params={"q": q}, headers=who.headers)
+    assert resp.status_code == 200
+    return resp.json()["items"]
+
+
+def test_only_the_users_own_rows_are_found(client, user, other):
+    mine = new_project(client, user, "Zeppelin plans", "airships")
+    new_project(client, other, "Zeppelin history", "airships")
+
+    hits = search(client, user, "zeppelin")
+    assert {hit["project_id"] for hit in hits} == {mine}
+    assert hits[0]["title"] == "<mark>Zeppelin</mark> plans"
+
+
+def test_the_index_itself_is_narrowed_to_one_owner(client, user, other):
+    new_project(client, user, "Quokka notes", "marsupials")
+    new_project(client, other, "Quokka notes", "marsupials")
+
+    with SessionLocal() as db:
+        owners = set(db.scalars(
+            text("SELECT user_id FROM search_index WHERE search_index MATCH :match"),
+            {"match": match_expression("quokka", user.id)}
+        ))
+    assert owners == {user.id}
+
+
+def test_last_word_matches_as_a_prefix(client, user):
+    pid = new_project(client, user, "Photosynthesis basics", "plants")
+    client.post(f"/projects/{pid}/sections", params={"title": "Chlorophyll"}, headers=user.headers)
+
+    assert {hit["type"] for hit in search(client, user, "chloro")} == {"section"}
+    assert [hit["project_id"] for hit in search(client, user, "photosynthesis bas")] == [pid]
+
+
+def test_owner_tokens_and_operators_are_searched_as_text(client, user, other):
+    new_project(client, other, "Secret", "plans")
+
+    assert search(client, user, f"u{other.id}") == []
+    assert search(client, user, "owner : secret") == []
+    assert search(client, user, "secret OR plans") == []
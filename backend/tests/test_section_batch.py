@@ -0,0 +1,113 @@
+# tests/test_section_batch.py
+import pytest
+
+
+@pytest.fixture
+def project(client, user):
+    """(project id, section ids in display order) for the default outline."""
+    pid = client.post("/projects/", json={"name": "Batch", "main_topic": "Tests", "doc_type": "docx"},
+                      headers=user.headers).json()["id"]
+    return pid, displayed(client, user, pid)
+
+
+def sections(client, user, pid):
+    return client.get(f"/projects/{pid}", headers=user.headers).json()["sections"]
+
+
+def displayed(client, user, pid):
+    return [s["id"] for s in sorted(sections(client, user, pid), key=lambda s: s["order"])]
+
+
+def test_reorder_puts_every_section_in_place(client, user, project):
+    pid, ids = project
+    wanted = ids[::-1]
+    resp = client.put(f"/projects/{pid}/sections/order", json={"section_ids": wanted}, headers=user.headers)
+
+    assert resp.status_code == 200
+    assert [s["id"] for s in resp.json()["sections"]] == wanted
+    assert displayed(client, user, pid) == wanted
+
+
+@pytest.mark.parametrize("change", [lambda ids: ids[1:], lambda ids: ids + ids[:1], lambda ids: ids[1:] + [10 ** 9]])
+def test_reorder_needs_every_section_exactly_once(client, user, project, change):
+    pid, ids = project
+    resp = client.put(f"/projects/{pid}/sections/order", json={"section_ids": change(ids)}, headers=user.headers)
+
+    assert resp.status_code == 400
+    assert displayed(client, user, pid) == ids
+
+
+def test_batch_edit_returns_sections_in_request_order(client, user, project):
+    pid, ids = project
+    before = {s["id"]: s for s in sections(client, user, pid)}
+    resp = client.patch(f"/projects/{pid}/sections", headers=user.headers, json={"items": [
+        {"id": ids[2], "content": "new text", "expected_version": before[ids[2]]["version"]},
+        {"id": ids[0], "title": "Renamed"},
+    ]})
+
+    assert resp.status_code == 200
+    edited = resp.json()["sections"]
+    assert [s["id"] for s in edited] == [ids[2], ids[0]]
+    assert edited[0]["content"] == "new text"
+    assert edited[0]["version"] == before[ids[2]]["version"] + 1
+    assert edited[1]["title"] == "Renamed"
+    assert edited[1]["version"] == before[ids[0]]["version"]  # a title change is not a new version
+
+
+def test_one_stale_item_fails_the_whole_batch(client, user, project):
+    pid, ids = project
+    before = sections(client, user, pid)
+    resp = client.patch(f"/projects/{pid}/sections", headers=user.headers, json={"items": [
+        {"id": ids[0], "title": "Renamed"},
+        {"id": ids[1], "content": "late", "expected_version": 99},
+    ]})
+
+    assert resp.status_code == 409
+    assert resp.json()["detail"]["section_ids"] == [ids[1]]
+    assert sections(client, user, pid) == before
+
+
+@pytest.mark.parametrize("items, status", [
+    ([], 400),
+    ([{"id": 0, "title": "a"}, {"id": 0, "title": "b"}], 400),
+    ([{"id": 10 ** 9, "title": "a"}], 404),
+])
+def test_batch_edit_rejects_bad_input(client, user, project, items, status):
+    pid, _ = project
+    assert client.patch(f"/projects/{pid}/sections", json={"items": items}, headers=user.headers).status_code == status
+
+
+def test_position_moves_a_section_between_its_new_neighbours(client, user, project):
+    pid, ids = project
+    last = ids[-1]
+
+    client.post(f"/projects/{pid}/sections/{last}/position", headers=user.headers)
+    assert displayed(client, user, pid) == [last] + ids[:-1]
+
+    client.post(f"/projects/{pid}/sections/{last}/position", params={"after_id": ids[1]}, headers=user.headers)
+    assert displayed(client, user, pid) == [ids[0], ids[1], last] + ids[2:-1]
+
+
+def test_position_renumbers_when_the_gap_runs_out(client, user, project):
+    pid, ids = project
+    # each insert halves the gap after the first section; it runs out after ten
+    expected = list(ids)
+    for moved in ids[2:] * 4:
+        resp = client.post(f"/projects/{pid}/sections/{moved}/position", params={"after_id": ids[0]},
+                           headers=user.headers)
+        assert resp.status_code == 200
+        expected.remove(moved)
+        expected.insert(1, moved)
+        assert displayed(client, user, pid) == expected
+
+    orders = sorted(s["order"] for s in sections(client, user, pid))
+    assert len(set(orders)) == len(orders)
+
+
+def test_move_swaps_with_the_neighbour(client, user, project):
+    pid, ids = project
+    client.post(f"/projects/{pid}/sections/{ids[1]}/move", params={"direction": "up"}, headers=user.headers)
+    assert displayed(client, user, pid)[:2] == [ids[1], ids[0]]
+
+    resp = client.post(f"/projects/{pid}/sections/{ids[1]}/move", params={"direction": "up"}, headers=user.headers)
+    assert resp.json()["message"] == "No swap possible"
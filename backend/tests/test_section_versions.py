@@ -0,0 +1,62 @@
+# tests/test_section_versions.py
+import importlib
+
+import pytest
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models import Section
+
+project_routes = importlib.import_module("app.routers.project_routes")
+
+
+@pytest.fixture
+def section(client, user):
+    """(project id, section as returned by the API)."""
+    pid = client.post("/projects/", json={"name": "Versions", "main_topic": "Tests", "doc_type": "docx"},
+                      headers=user.headers).json()["id"]
+    sec = client.post(f"/projects/{pid}/sections", params={"title": "Draft"}, headers=user.headers).json()
+    return pid, sec
+
+
+def edit(client, user, pid, sid, **params):
+    return client.put(f"/projects/{pid}/sections/{sid}", params=params, headers=user.headers)
+
+
+def test_edit_at_the_current_version_bumps_it(client, user, section):
+    pid, sec = section
+    resp = edit(client, user, pid, sec["id"], content="first", expected_version=sec["version"])
+
+    assert resp.status_code == 200
+    assert resp.json()["version"] == sec["version"] + 1
+
+
+def test_stale_edit_is_rejected_with_409(client, user, section):
+    pid, sec = section
+    assert edit(client, user, pid, sec["id"], content="mine", expected_version=sec["version"]).status_code == 200
+
+    resp = edit(client, user, pid, sec["id"], content="theirs", expected_version=sec["version"])
+    assert resp.status_code == 409
+
+    current = client.get(f"/projects/{pid}", headers=user.headers).json()["sections"]
+    assert [s["content"] for s in current if s["id"] == sec["id"]] == ["mine"]
+
+
+def test_refine_does_not_overwrite_an_edit_made_meanwhile(client, user, section, monkeypatch):
+    pid, sec = section
+
+    def refine_while_someone_edits(text, instruction, **kwargs):
+        with SessionLocal() as db:
+            db.execute(update(Section).where(Section.id == sec["id"]).values(
+                content="edited meanwhile", version=Section.version + 1
+            ))
+            db.commit()
+        return "refined"
+
+    monkeypatch.setattr(project_routes.llm, "refine", refine_while_someone_edits)
+    resp = client.post(f"/projects/{pid}/sections/{sec['id']}/refine",
+                       params={"instruction": "shorter", "chunked": False}, headers=user.headers)
+
+    assert resp.status_code == 409
+    current = client.get(f"/projects/{pid}", headers=user.headers).json()["sections"]
+    assert [s["content"] for s in current if s["id"] == sec["id"]] == ["edited meanwhile"]
@@ -0,0 +1,33 @@
+# tests/test_text_chunks.py
+import random
+
+from app.utils.text_chunks import estimate_tokens, join_chunks, split_chunks
+
+WORDS = ["alpha", "beta", "gamma", "delta.", "epsilon!", "zeta?", "\n\n", "\n", "  ", "eta"]
+
+
+def random_text(rng, words=200):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, words)))
+
+
+def test_chunks_round_trip_random():
+    rng = random.Random(11)
+    for _ in range(300):
+        text = random_text(rng, 400)
+        max_tokens = rng.randint(1, 120)
+        assert join_chunks(*split_chunks(text, max_tokens)) == text
+
+
+def test_chunks_break_at_paragraphs_within_limit():
+    paragraphs = [f"Paragraph {i} says something. " * 10 for i in range(8)]
+    text = "\n\n".join(paragraphs)
+    chunks, separators = split_chunks(text, 200)
+
+    assert len(chunks) > 1
+    assert all(sep == "\n\n" for sep in separators)
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+
+
+def test_short_text_is_one_chunk():
+    assert split_chunks("short", 100) == (["short"], [])
+    assert split_chunks("", 100) == ([""], [])
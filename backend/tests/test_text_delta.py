@@ -0,0 +1,31 @@
+# tests/test_text_delta.py
+import random
+
+import pytest
+
+from app.utils.text_delta import apply_delta, make_delta
+
+WORDS = ["alpha", "beta", "gamma", "delta.", "epsilon!", "zeta?", "\n\n", "\n", "  ", "eta"]
+
+
+def random_text(rng, words=200):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, words)))
+
+
+@pytest.mark.parametrize("base,target", [
+    ("", ""),
+    ("", "new text"),
+    ("old text", ""),
+    ("one two three", "one 2 three"),
+    ("same\n\ntext  ", "same\n\ntext  "),
+    ("completely different", "nothing in common here at all"),
+])
+def test_delta_round_trip(base, target):
+    assert apply_delta(base, make_delta(base, target)) == target
+
+
+def test_delta_round_trip_random():
+    rng = random.Random(7)
+    for _ in range(200):
+        base, target = random_text(rng), random_text(rng)
+        assert apply_delta(base, make_delta(base, target)) == target
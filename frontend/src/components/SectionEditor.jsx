@@ -8,6 +8,7 @@ export default function SectionEditor({ section, projectId, reload }) {
   const [value, setValue] = useState(section.content || "");
   const [prompt, setPrompt] = useState("");
   const [loadingRefine, setLoadingRefine] = useState(false);
+  const [loadingGenerate, setLoadingGenerate] = useState(false);
 
   const [showComments, setShowComments] = useState(false);
   const [newComment, setNewComment] = useState("");
@@ -18,12 +19,16 @@ export default function SectionEditor({ section, projectId, reload }) {
       await api.put(
         `/projects/${projectId}/sections/${section.id}`,
         null,
-        { params: { content: value } }
+        { params: { content: value, expected_version: section.version } }
       );
       setEditing(false);
       reload();
-    } catch {
-      alert("Save failed");
+    } catch (err) {
+      if (err.response?.status === 409) {
+        alert("This section was changed since you opened it. Reload to see the latest text.");
+      } else {
+        alert("Save failed");
+      }
     }
   };
 
@@ -41,11 +46,45 @@ export default function SectionEditor({ section, projectId, reload }) {
       );
       setPrompt("");
       reload();
+    } catch (err) {
+      if (err.response?.status === 409) {
+        alert("This section was edited while refining, so the result was not saved.");
+        reload();
+      } else if (err.response?.status === 503 || err.response?.status === 504) {
+        alert("The AI service is busy or slow right now. Your text is unchanged; try again shortly.");
+      } else {
+        alert("Refine failed");
+      }
     } finally {
       setLoadingRefine(false);
     }
   };
 
+  // ---------------- REGENERATE ----------------
+  // fresh skips the server's response cache so a new draft comes back
+  const regenerate = async () => {
+    try {
+      setLoadingGenerate(true);
+      await api.post(
+        `/projects/${projectId}/generate`,
+        null,
+        { params: { section_id: section.id, fresh: true } }
+      );
+      reload();
+    } catch (err) {
+      if (err.response?.status === 409) {
+        alert("This section was edited while generating, so the result was not saved.");
+        reload();
+      } else if (err.response?.status === 503 || err.response?.status === 504) {
+        alert("The AI service is busy or slow right now. Your text is unchanged; try again shortly.");
+      } else {
+        alert("Regenerate failed");
+      }
+    } finally {
+      setLoadingGenerate(false);
+    }
+  };
+
   // ---------------- FEEDBACK ----------------
   const feedback = async (like) => {
     try {
@@ -198,6 +237,14 @@ export default function SectionEditor({ section, projectId, reload }) {
           {loadingRefine ? "Refining…" : "Refine"}
         </button>
 
+        <button
+          onClick={regenerate}
+          disabled={loadingGenerate}
+          className="px-5 py-2 rounded-lg bg-cyan-700 text-white"
+        >
+          {loadingGenerate ? "Generating…" : "Regenerate"}
+        </button>
+
         {/* Convert to Poem Button */}
         <button
           onClick={() => refine("Convert this content into a structured poem or verse with a creative tone, but meaning same.")}
@@ -8,31 +8,55 @@ export default function Dashboard() {
   const nav = useNavigate();
 
   const [projects, setProjects] = useState([]);
+  const [cursor, setCursor] = useState(null);
+  const [loading, setLoading] = useState(false);
   const [query, setQuery] = useState("");
+  const [results, setResults] = useState(null);
   const [sortType, setSortType] = useState("latest");
 
-  const load = async () => {
+  // dropdown value -> server-side sort
+  const SORTS = {
+    latest: { sort: "created_at", order: "desc" },
+    oldest: { sort: "created_at", order: "asc" },
+    az: { sort: "name", order: "asc" },
+    za: { sort: "name", order: "desc" },
+  };
+
+  const load = async (after = null) => {
     try {
-      const res = await api.get("/projects/");
-      setProjects(res.data);
+      setLoading(true);
+      const res = await api.get("/projects/", {
+        params: { ...SORTS[sortType], cursor: after, limit: 30 },
+      });
+      setProjects((prev) => (after ? [...prev, ...res.data.items] : res.data.items));
+      setCursor(res.data.next_cursor);
     } catch (err) {
       alert("Failed to load projects");
+    } finally {
+      setLoading(false);
     }
   };
 
   useEffect(() => {
     load();
-  }, []);
-
-  const filtered = projects
-    .filter((p) => p.name.toLowerCase().includes(query.toLowerCase()))
-    .sort((a, b) => {
-      if (sortType === "az") return a.name.localeCompare(b.name);
-      if (sortType === "za") return b.name.localeCompare(a.name);
-      if (sortType === "latest") return b.id - a.id;
-      if (sortType === "oldest") return a.id - b.id;
-      return 0;
-    });
+  }, [sortType]);
+
+  // full-text search across projects and sections, debounced while typing
+  useEffect(() => {
+    if (!query.trim()) {
+      setResults(null);
+      return;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const res = await api.get("/projects/search", { params: { q: query } });
+        setResults(res.data.items);
+      } catch {
+        setResults([]);
+      }
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [query]);
 
   return (
     <div className="page">
@@ -80,14 +104,44 @@ export default function Dashboard() {
         </select>
       </div>
 
-      {/* ---------- PROJECT GRID ---------- */}
-      {filtered.length === 0 ? (
+      {/* ---------- SEARCH RESULTS ---------- */}
+      {results !== null ? (
+        results.length === 0 ? (
+          <div className="text-gray-400 text-center py-20">
+            No matches found.
+          </div>
+        ) : (
+          <div className="flex flex-col gap-4">
+            {results.map((r) => (
+              <div
+                key={`${r.type}-${r.section_id ?? r.project_id}`}
+                onClick={() => nav(`/project/${r.project_id}`)}
+                className="card-glass p-5 rounded-2xl cursor-pointer border border-white/10
+                           hover:shadow-[0_0_30px_rgba(0,200,255,0.2)] transition"
+              >
+                <p className="text-xs text-gray-500 uppercase tracking-wide">
+                  {r.type === "section" ? `Section · ${r.project_name}` : "Project"}
+                </p>
+                {/* title/snippet are HTML-escaped by the API; only <mark> is added */}
+                <h3
+                  className="text-lg font-semibold text-cyan-300 mt-1"
+                  dangerouslySetInnerHTML={{ __html: r.title }}
+                />
+                <p
+                  className="text-gray-400 text-sm mt-1"
+                  dangerouslySetInnerHTML={{ __html: r.snippet }}
+                />
+              </div>
+            ))}
+          </div>
+        )
+      ) : projects.length === 0 ? (
         <div className="text-gray-400 text-center py-20">
           No projects found.
         </div>
       ) : (
         <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-8">
-          {filtered.map((p) => (
+          {projects.map((p) => (
             <div
               key={p.id}
               onClick={() => nav(`/project/${p.id}`)}
@@ -112,14 +166,28 @@ export default function Dashboard() {
                 {p.doc_type.toUpperCase()}
               </div>
 
-              {/* Last updated */}
+              {/* Sections + last updated */}
               <p className="text-xs text-gray-500 mt-3">
-                Last updated: just now
+                {p.section_count} sections · Last updated:{" "}
+                {p.last_modified ? new Date(p.last_modified + "Z").toLocaleString() : "—"}
               </p>
             </div>
           ))}
         </div>
       )}
+
+      {cursor && results === null && (
+        <div className="text-center mt-10">
+          <button
+            onClick={() => load(cursor)}
+            disabled={loading}
+            className="px-6 py-3 rounded-xl bg-gray-700/60 text-gray-200 
+              hover:bg-gray-600/60 transition active:scale-95"
+          >
+            {loading ? "Loading…" : "Load more projects"}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
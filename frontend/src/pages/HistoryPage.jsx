@@ -9,14 +9,26 @@ export default function HistoryPage() {
   const { id } = useParams();
   const nav = useNavigate();
 
-  const [history, setHistory] = useState([]);
+  const [items, setItems] = useState([]);
+  const [cursor, setCursor] = useState(null);
   const [loading, setLoading] = useState(false);
 
-  const load = async () => {
+  // old/new text per revision id, fetched the first time a row is expanded
+  const [bodies, setBodies] = useState({});
+  const [expanded, setExpanded] = useState({});
+
+  const load = async (after = null) => {
     try {
       setLoading(true);
-      const res = await api.get(`/projects/${id}/history`);
-      setHistory(res.data || []);
+      const res = await api.get(`/projects/${id}/history`, {
+        params: {
+          cursor: after,
+          limit: 50,
+          fields: "id,section_id,section_title,action,prompt,timestamp",
+        },
+      });
+      setItems((prev) => (after ? [...prev, ...res.data.items] : res.data.items));
+      setCursor(res.data.next_cursor);
     } catch (err) {
       alert("Failed to load history");
     } finally {
@@ -24,6 +36,29 @@ export default function HistoryPage() {
     }
   };
 
+  const toggle = async (revisionId) => {
+    const open = !expanded[revisionId];
+    setExpanded((prev) => ({ ...prev, [revisionId]: open }));
+    if (!open || bodies[revisionId]) return;
+
+    try {
+      const res = await api.get(`/projects/${id}/history/${revisionId}`);
+      setBodies((prev) => ({ ...prev, [revisionId]: { old: res.data.old, new: res.data.new } }));
+    } catch (err) {
+      setExpanded((prev) => ({ ...prev, [revisionId]: false }));
+      alert("Failed to load revision");
+    }
+  };
+
+  // revisions arrive newest first; group them per section for the timeline
+  const history = Object.values(
+    items.reduce((acc, h) => {
+      acc[h.section_id] ||= { section_id: h.section_id, title: h.section_title, history: [] };
+      acc[h.section_id].history.push(h);
+      return acc;
+    }, {})
+  );
+
   useEffect(() => {
     load();
   }, []);
@@ -54,7 +89,7 @@ export default function HistoryPage() {
       </div>
 
       {/* LOADING */}
-      {loading ? (
+      {loading && items.length === 0 ? (
         <div className="text-gray-400">Loading…</div>
       ) : (
         <div className="space-y-10">
@@ -80,11 +115,9 @@ export default function HistoryPage() {
 
                   {/* Timeline Items */}
                   {sec.history
-                    .slice()
-                    .reverse()
-                    .map((h, idx) => (
+                    .map((h) => (
                       <div
-                        key={idx}
+                        key={h.id}
                         className="relative pl-10 mb-8"
                       >
                         {/* Glowing dot */}
@@ -121,15 +154,29 @@ export default function HistoryPage() {
                             <b>Prompt:</b> {h.prompt}
                           </p>
 
-                          {/* OLD TEXT */}
-                          <p className="text-gray-400 text-sm whitespace-pre-wrap border-l-2 border-red-400/40 pl-3 mb-3">
-                            <b>Old:</b> {h.old || "—"}
-                          </p>
-
-                          {/* NEW TEXT */}
-                          <p className="text-gray-200 whitespace-pre-wrap border-l-2 border-green-400/40 pl-3">
-                            <b>New:</b> {h.new}
-                          </p>
+                          <button
+                            onClick={() => toggle(h.id)}
+                            className="text-xs text-cyan-300 hover:text-cyan-200 transition"
+                          >
+                            {expanded[h.id] ? "Hide changes" : "Show changes"}
+                          </button>
+
+                          {expanded[h.id] &&
+                            (bodies[h.id] ? (
+                              <div className="mt-3">
+                                {/* OLD TEXT */}
+                                <p className="text-gray-400 text-sm whitespace-pre-wrap border-l-2 border-red-400/40 pl-3 mb-3">
+                                  <b>Old:</b> {bodies[h.id].old || "—"}
+                                </p>
+
+                                {/* NEW TEXT */}
+                                <p className="text-gray-200 whitespace-pre-wrap border-l-2 border-green-400/40 pl-3">
+                                  <b>New:</b> {bodies[h.id].new}
+                                </p>
+                              </div>
+                            ) : (
+                              <div className="text-gray-400 text-sm mt-3">Loading…</div>
+                            ))}
                         </div>
                       </div>
                     ))}
@@ -137,6 +184,17 @@ export default function HistoryPage() {
               </div>
             ))
           )}
+
+          {cursor && (
+            <button
+              onClick={() => load(cursor)}
+              disabled={loading}
+              className="px-6 py-3 rounded-xl bg-gray-700/60 text-gray-200 
+                hover:bg-gray-600/60 transition active:scale-95"
+            >
+              {loading ? "Loading…" : "Load older revisions"}
+            </button>
+          )}
         </div>
       )}
     </div>
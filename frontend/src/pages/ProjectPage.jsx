@@ -86,13 +86,26 @@ export default function ProjectPage() {
   // -------------------------------------
   // Generate All (LLM)
   // -------------------------------------
+  // once sections have text, generating again must skip the server's
+  // response cache or it would hand back the same text
+  const hasContent = sections.some((s) => s.content);
+
   const generateAll = async () => {
     try {
       setLoading(true);
-      await api.post(`/projects/${id}/generate`);
+      await api.post(`/projects/${id}/generate`, null, {
+        params: { fresh: hasContent },
+      });
+      load();
+    } catch (err) {
+      const status = err.response?.status;
+      if (status === 503 || status === 504) {
+        alert("The AI service is busy or slow right now. Sections that failed were left unchanged; try again shortly.");
+      } else {
+        alert("Generate failed");
+      }
+      // sections that did generate were saved
       load();
-    } catch {
-      alert("Generate failed");
     } finally {
       setLoading(false);
     }
@@ -189,7 +202,7 @@ export default function ProjectPage() {
     disabled={loading}
     className="btn-neon px-5 py-2"
   >
-    {loading ? "Generating..." : "Generate All"}
+    {loading ? "Generating..." : hasContent ? "Regenerate All" : "Generate All"}
   </button>
 
   <button